@@ -1,54 +1,449 @@
 # -*- coding: utf-8 -*-
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import CoolProp.CoolProp as CP
-import pandas as pd
+import numpy as np
 import math
+import json
+import csv
+import io
+import base64
+import gzip
+import time
+import itertools
+import functools
+import gc
+import bisect
+import hashlib
+import contextlib
+import hmac
+import re
+from collections import OrderedDict
 import logging
+import queue
+import atexit
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+import threading
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 
 app = Flask(__name__, static_folder='.', static_url_path='')
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-# Configuración de logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+# Configuración de logging: nivel configurable, E/S en un hilo aparte (QueueHandler/QueueListener),
+# identificador de correlación por petición y muestreo de los payloads pesados
+LOG_LEVEL = os.environ.get('THERMO_LOG_LEVEL', 'INFO').upper()
+LOG_ASYNC = os.environ.get('THERMO_LOG_ASYNC', '1').lower() in ('1', 'true', 'yes')
+LOG_FILE = os.environ.get('THERMO_LOG_FILE')
+LOG_SAMPLE_RATE = max(1, int(os.environ.get('THERMO_LOG_SAMPLE_RATE', 100)))
+LOG_SLOW_MS = float(os.environ.get('THERMO_LOG_SLOW_MS', 500))
+LOG_FORMAT = '%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+_log_context = threading.local()
+_log_listener = None
+_log_sample_counter = itertools.count()
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = getattr(_log_context, 'request_id', '-')
+        return True
+
+def _build_log_handlers():
+    handlers = [logging.StreamHandler()]
+    if LOG_FILE:
+        handlers.append(logging.FileHandler(LOG_FILE, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handlers
+
+def configure_logging(use_queue=LOG_ASYNC):
+    """Instala los handlers del logger raíz; con use_queue el formateo de E/S ocurre en el hilo del QueueListener."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    handlers = _build_log_handlers()
+    if use_queue:
+        queue_handler = QueueHandler(queue.SimpleQueue())
+        queue_handler.addFilter(RequestIdFilter())
+        root.addHandler(queue_handler)
+        _log_listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _log_listener.start()
+    else:
+        for handler in handlers:
+            handler.addFilter(RequestIdFilter())
+            root.addHandler(handler)
+
+def _restart_logging_after_fork():
+    # El hilo del listener no sobrevive al fork: el hijo necesita su propia cola y listener
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener = None
+        configure_logging()
+
+configure_logging()
+atexit.register(lambda: _log_listener is not None and _log_listener.stop())
+os.register_at_fork(after_in_child=_restart_logging_after_fork)
 logger = logging.getLogger(__name__)
 
-# Carga de archivos CSV
-try:
-    df_refrigerants = pd.read_csv('refrigerants.csv', encoding='utf-8-sig')
-    logger.info("Columnas en refrigerants.csv: %s", df_refrigerants.columns.tolist())
-    logger.debug("Primeras filas de refrigerants.csv:\n%s", df_refrigerants.head().to_string())
-except FileNotFoundError:
-    df_refrigerants = pd.DataFrame()
-    logger.error("refrigerants.csv no encontrado")
-except Exception as e:
-    df_refrigerants = pd.DataFrame()
-    logger.error("Error al leer refrigerants.csv: %s", str(e), exc_info=True)
+@app.before_request
+def start_request_logging():
+    _log_context.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+    _log_context.sampled = next(_log_sample_counter) % LOG_SAMPLE_RATE == 0
 
-try:
-    df_capillary = pd.read_csv('capillary_constants.csv', encoding='utf-8-sig')
-    logger.info("Columnas en capillary_constants.csv: %s", df_capillary.columns.tolist())
-    logger.debug("Primeras filas de capillary_constants.csv:\n%s", df_capillary.head().to_string())
-    # Validar columnas esperadas
-    expected_columns = ['Refrigerant', 'c 200', 'c 300', 'c 400', 'c 500', 'c 600', 'c 750', 'c 1000', 'c 1500', 'c 2000', 'c 2500', 'c 3000', 
-                        'c 5000', 'c 10000', 'c 12000', 'c 14000', 'c 16000', 'c 18000', 'c 24000', 
-                        'c 30000', 'c 36000', 'c 48000', 'c 60000']
-    missing_columns = [col for col in expected_columns if col not in df_capillary.columns]
-    if missing_columns:
-        logger.error("Faltan columnas en capillary_constants.csv: %s", missing_columns)
+@app.after_request
+def finish_request_logging(response):
+    response.headers['X-Request-ID'] = getattr(_log_context, 'request_id', '-')
+    return response
+
+@app.teardown_request
+def clear_request_logging(exc):
+    _log_context.request_id = '-'
+    _log_context.sampled = False
+
+def log_payload(message, payload, elapsed=None):
+    """Registra un payload pesado solo en 1 de cada THERMO_LOG_SAMPLE_RATE peticiones (DEBUG) o si la petición fue lenta (INFO)."""
+    if elapsed is not None and elapsed * 1000 >= LOG_SLOW_MS:
+        logger.info("Petición lenta (%.1f ms). " + message, elapsed * 1000, payload)
+    elif getattr(_log_context, 'sampled', True) and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, payload)
+
+# Métricas: temporizadores por etapa, contador de llamadas al motor de propiedades y /metrics en formato Prometheus.
+# Con THERMO_METRICS=0 stage() devuelve un contexto nulo compartido y no se registran hooks de Flask.
+METRICS_ENABLED = os.environ.get('THERMO_METRICS', '1').lower() in ('1', 'true', 'yes')
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_request_metrics = threading.local()
+_NULL_STAGE = contextlib.nullcontext()
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        current = getattr(_request_metrics, 'current', None)
+        if current is not None:
+            timings = current['timings']
+            timings[self.name] = timings.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+def stage(name):
+    """Context manager que acumula el tiempo de una etapa en la petición en curso."""
+    return _Stage(name) if METRICS_ENABLED else _NULL_STAGE
+
+def count_property_calls(n=1):
+    if METRICS_ENABLED:
+        current = getattr(_request_metrics, 'current', None)
+        if current is not None:
+            current['property_calls'] += n
+
+class Histogram:
+    """Histograma acumulativo con etiquetas, renderizable en formato de texto de Prometheus."""
+
+    def __init__(self, name, help_text, label, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * len(self.buckets), 0, 0.0]
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_value, (counts, total, value_sum) in sorted(self._series.items()):
+                label = f'{self.label}="{label_value}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {total}')
+                lines.append(f'{self.name}_sum{{{label}}} {value_sum}')
+                lines.append(f'{self.name}_count{{{label}}} {total}')
+        return lines
+
+endpoint_latency = Histogram('thermo_request_duration_seconds', 'Latencia por endpoint', 'endpoint')
+refrigerant_latency = Histogram('thermo_refrigerant_duration_seconds', 'Latencia de /thermo por refrigerante', 'refrigerant')
+stage_latency = Histogram('thermo_stage_duration_seconds', 'Duración de cada etapa del cálculo', 'stage')
+property_calls_total = {}
+_property_calls_lock = threading.Lock()
+
+if METRICS_ENABLED:
+    @app.before_request
+    def start_request_metrics():
+        _request_metrics.current = {'start': time.perf_counter(), 'timings': {}, 'property_calls': 0, 'refrigerant': None}
+
+    @app.after_request
+    def finish_request_metrics(response):
+        current = getattr(_request_metrics, 'current', None)
+        if current is None:
+            return response
+        total = time.perf_counter() - current['start']
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'static'
+        endpoint_latency.observe(endpoint, total)
+        if current['refrigerant'] is not None:
+            refrigerant_latency.observe(current['refrigerant'], total)
+        for name, duration in current['timings'].items():
+            stage_latency.observe(name, duration)
+        if current['property_calls']:
+            with _property_calls_lock:
+                property_calls_total[endpoint] = property_calls_total.get(endpoint, 0) + current['property_calls']
+        timings = [f'{name};dur={duration * 1000:.3f}' for name, duration in current['timings'].items()]
+        timings.append(f'property-calls;desc="{current["property_calls"]}"')
+        timings.append(f'total;dur={total * 1000:.3f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    @app.teardown_request
+    def clear_request_metrics(exc):
+        _request_metrics.current = None
+
+def set_metrics_refrigerant(refrigerant):
+    """Etiqueta la petición en curso con el refrigerante (solo nombres conocidos, para acotar la cardinalidad)."""
+    if METRICS_ENABLED:
+        current = getattr(_request_metrics, 'current', None)
+        if current is not None:
+            known = refrigerant in current_data().custom or refrigerant in _known_fluids()
+            current['refrigerant'] = refrigerant if known else 'other'
+
+@functools.lru_cache(maxsize=1)
+def _known_fluids():
+    return frozenset(CP.FluidsList())
+
+# Ejecutor acotado para los cálculos pesados: como mucho THERMO_MAX_CONCURRENCY en curso y THERMO_MAX_QUEUE en
+# espera por proceso; por encima se responde 503 con Retry-After. Cada cálculo tiene un plazo que el motor de
+# propiedades revisa (check_deadline), así un cálculo desbocado se aborta en vez de seguir ocupando el ejecutor.
+# Las rutas livianas (/refrigerants, estáticos, /metrics) no pasan por aquí y siguen respondiendo.
+MAX_CONCURRENCY = max(1, int(os.environ.get('THERMO_MAX_CONCURRENCY', 2)))
+MAX_QUEUE = max(0, int(os.environ.get('THERMO_MAX_QUEUE', 16)))
+REQUEST_TIMEOUT = float(os.environ.get('THERMO_REQUEST_TIMEOUT', 30))
+STREAM_TIMEOUT = float(os.environ.get('THERMO_STREAM_TIMEOUT', 300))
+RETRY_AFTER = max(1, int(os.environ.get('THERMO_RETRY_AFTER', 1)))
+
+class ServerBusy(Exception):
+    """No queda lugar en el ejecutor acotado (en curso + en cola)."""
+
+class CalculationTimeout(Exception):
+    """El cálculo superó su plazo."""
+
+_heavy_executor = None
+_heavy_executor_lock = threading.Lock()
+_deadline = threading.local()
+executor_stats = {'pending': 0, 'rejected': 0, 'timeouts': 0}
+
+def _admit():
+    with _heavy_executor_lock:
+        if executor_stats['pending'] >= MAX_CONCURRENCY + MAX_QUEUE:
+            executor_stats['rejected'] += 1
+            raise ServerBusy()
+        executor_stats['pending'] += 1
+
+def _release():
+    with _heavy_executor_lock:
+        executor_stats['pending'] -= 1
+
+def get_heavy_executor():
+    global _heavy_executor
+    with _heavy_executor_lock:
+        if _heavy_executor is None:
+            _heavy_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix='thermo-calc')
+        return _heavy_executor
+
+def _forget_heavy_executor_after_fork():
+    # Los hilos del ejecutor no sobreviven al fork: cada worker crea el suyo. El pool de /thermo/batch se bifurca
+    # desde un hilo del ejecutor y el hijo no debe heredar el plazo de ese cálculo (lo recibe por elemento)
+    global _heavy_executor, _heavy_executor_lock
+    _heavy_executor = None
+    _heavy_executor_lock = threading.Lock()
+    _deadline.value = None
+    executor_stats.update(pending=0, rejected=0, timeouts=0)
+
+os.register_at_fork(after_in_child=_forget_heavy_executor_after_fork)
+
+def check_deadline():
+    """Lanza CalculationTimeout si el cálculo en curso en este hilo superó su plazo."""
+    deadline = getattr(_deadline, 'value', None)
+    if deadline is not None and time.monotonic() > deadline:
+        raise CalculationTimeout("El cálculo superó el tiempo máximo permitido")
+
+def time_remaining():
+    """Segundos que le quedan al cálculo en curso en este hilo, o None si no tiene plazo."""
+    deadline = getattr(_deadline, 'value', None)
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+def run_bounded(fn, *args, timeout=None, **kwargs):
+    """Ejecuta fn(*args, **kwargs) en el ejecutor acotado, con el contexto de logging y métricas de la petición.
+
+    Lanza ServerBusy si no hay lugar y CalculationTimeout si no termina dentro del plazo.
+    Dentro de un cálculo ya acotado simplemente llama a fn.
+
+    El plazo es cooperativo: el cliente recibe el 504 al vencer, pero un cálculo que ya empezó conserva su lugar
+    del ejecutor hasta su siguiente check_deadline() (state_props lo llama en cada evaluación). El código que no
+    pasa por ahí debe revisar el plazo por su cuenta, como map_on_pool, o acotar su trabajo por tamaño.
+    """
+    if getattr(_deadline, 'value', None) is not None:
+        return fn(*args, **kwargs)
+    timeout = REQUEST_TIMEOUT if timeout is None else timeout
+    _admit()
+    deadline = time.monotonic() + timeout
+    request_id = getattr(_log_context, 'request_id', '-')
+    sampled = getattr(_log_context, 'sampled', False)
+    metrics = getattr(_request_metrics, 'current', None)
+    store = current_data()
+    submitted = time.perf_counter()
+
+    def task():
+        _log_context.request_id = request_id
+        _log_context.sampled = sampled
+        _request_metrics.current = metrics
+        _pinned_data.store = store
+        _deadline.value = deadline
+        try:
+            if metrics is not None:
+                metrics['timings']['queue'] = time.perf_counter() - submitted
+            check_deadline()
+            return fn(*args, **kwargs)
+        finally:
+            _deadline.value = None
+            _pinned_data.store = None
+            _request_metrics.current = None
+            _log_context.request_id = '-'
+            _release()
+
+    try:
+        future = get_heavy_executor().submit(task)
+    except Exception:
+        _release()
+        raise
+    try:
+        return future.result(timeout=timeout)
+    except FuturesTimeoutError:
+        if future.cancel():
+            _release()
+        raise CalculationTimeout(f"El cálculo superó el tiempo máximo de {timeout:g} s") from None
+
+class BoundedStream:
+    """Iterable de respuesta que ocupa un lugar del ejecutor acotado mientras se transmite.
+
+    El plazo se revisa dentro del generador; al vencer se emite una línea NDJSON de error y se corta el stream.
+    """
+
+    def __init__(self, iterable, timeout=None):
+        _admit()
+        self._iterable = iter(iterable)
+        self._deadline = time.monotonic() + (STREAM_TIMEOUT if timeout is None else timeout)
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        _deadline.value = self._deadline
+        try:
+            return next(self._iterable)
+        except CalculationTimeout as e:
+            with _heavy_executor_lock:
+                executor_stats['timeouts'] += 1
+            logger.warning("Stream cortado: %s", str(e))
+            self.close()
+            return json.dumps({'type': 'error', 'message': str(e)}, separators=(',', ':')) + '\n'
+        except BaseException:
+            self.close()
+            raise
+        finally:
+            _deadline.value = None
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            if hasattr(self._iterable, 'close'):
+                self._iterable.close()
+            _release()
+
+@app.errorhandler(ServerBusy)
+def handle_server_busy(e):
+    logger.warning("Ejecutor saturado (%s en curso o en cola), respondiendo 503", executor_stats['pending'])
+    return (jsonify({'status': 'error', 'message': 'Servidor saturado, reintente en unos segundos'}), 503,
+            {'Retry-After': str(RETRY_AFTER)})
+
+@app.errorhandler(CalculationTimeout)
+def handle_calculation_timeout(e):
+    with _heavy_executor_lock:
+        executor_stats['timeouts'] += 1
+    logger.warning("Cálculo cancelado: %s", str(e))
+    return jsonify({'status': 'error', 'message': str(e)}), 504
+
+# Carga de archivos CSV. pandas solo se importa aquí: con un snapshot vigente los workers no lo cargan
+DATA_FILES = ['refrigerants.csv', 'capillary_constants.csv']
+
+def read_data_frames():
+    """Lee refrigerants.csv y capillary_constants.csv con pandas; devuelve (df_refrigerants, df_capillary)."""
+    import pandas as pd
+
+    try:
+        df_refrigerants = pd.read_csv('refrigerants.csv', encoding='utf-8-sig')
+        logger.info("Columnas en refrigerants.csv: %s", df_refrigerants.columns.tolist())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Primeras filas de refrigerants.csv:\n%s", df_refrigerants.head().to_string())
+    except FileNotFoundError:
+        df_refrigerants = pd.DataFrame()
+        logger.error("refrigerants.csv no encontrado")
+    except Exception as e:
+        df_refrigerants = pd.DataFrame()
+        logger.error("Error al leer refrigerants.csv: %s", str(e), exc_info=True)
+
+    try:
+        df_capillary = pd.read_csv('capillary_constants.csv', encoding='utf-8-sig')
+        logger.info("Columnas en capillary_constants.csv: %s", df_capillary.columns.tolist())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Primeras filas de capillary_constants.csv:\n%s", df_capillary.head().to_string())
+        # Validar columnas esperadas
+        expected_columns = ['Refrigerant', 'c 200', 'c 300', 'c 400', 'c 500', 'c 600', 'c 750', 'c 1000', 'c 1500', 'c 2000', 'c 2500', 'c 3000', 
+                            'c 5000', 'c 10000', 'c 12000', 'c 14000', 'c 16000', 'c 18000', 'c 24000', 
+                            'c 30000', 'c 36000', 'c 48000', 'c 60000']
+        missing_columns = [col for col in expected_columns if col not in df_capillary.columns]
+        if missing_columns:
+            logger.error("Faltan columnas en capillary_constants.csv: %s", missing_columns)
+            df_capillary = pd.DataFrame(columns=['Refrigerant'])
+        else:
+            # Filtrar filas inválidas (por ejemplo, cabeceras duplicadas)
+            df_capillary = df_capillary[df_capillary['Refrigerant'].str.strip().str.lower() != 'refrigerant']
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Filas válidas en capillary_constants.csv:\n%s", df_capillary.to_string())
+    except FileNotFoundError:
         df_capillary = pd.DataFrame(columns=['Refrigerant'])
-    else:
-        # Filtrar filas inválidas (por ejemplo, cabeceras duplicadas)
-        df_capillary = df_capillary[df_capillary['Refrigerant'].str.strip().str.lower() != 'refrigerant']
-        logger.debug("Filas válidas en capillary_constants.csv:\n%s", df_capillary.to_string())
-except FileNotFoundError:
-    df_capillary = pd.DataFrame(columns=['Refrigerant'])
-    logger.error("capillary_constants.csv no encontrado")
-except Exception as e:
-    df_capillary = pd.DataFrame(columns=['Refrigerant'])
-    logger.error("Error al leer capillary_constants.csv: %s", str(e), exc_info=True)
-
-custom_refrigerants = ['R-454B', 'R-417A', 'R-454C', 'R-450A', 'R-452A']
+        logger.error("capillary_constants.csv no encontrado")
+    except Exception as e:
+        df_capillary = pd.DataFrame(columns=['Refrigerant'])
+        logger.error("Error al leer capillary_constants.csv: %s", str(e), exc_info=True)
+    return df_refrigerants, df_capillary
+
 
 COMMERCIAL_DIAMETERS = [
  0.000635, 0.0006604, 0.0007112, 0.000762, 0.0007874, 0.0008128, 0.0008382,
@@ -60,157 +455,555 @@ COMMERCIAL_DIAMETERS = [
 0.0017526, 0.001778
 ]
 
-def interpolate(x, x0, x1, y0, y1):
-    try:
-        if x0 == x1:
-            logger.warning("Interpolación: x0 == x1 (%s), retornando y0", x0)
-            return y0
-        return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
-    except Exception as e:
-        logger.error("Error en interpolación: %s", str(e), exc_info=True)
-        raise
+# Columnas de propiedades en refrigerants.csv: (clave de salida, columna, factor a SI, valor por defecto)
+CSV_PROPERTY_COLUMNS = [
+    ('pressure_bubble', 'Presión Burbuja (bar)', 100000, 0),
+    ('pressure_dew', 'Presión Rocío (bar)', 100000, 0),
+    ('h_liquid', 'Entalpía Líquido (kJ/kg)', 1000, 0),
+    ('h_vapor', 'Entalpía Vapor (kJ/kg)', 1000, 0),
+    ('s_liquid', 'Entropía Líquido (kJ/kg·K)', 1000, 0),
+    ('s_vapor', 'Entropía Vapor (kJ/kg·K)', 1000, 0),
+    ('cp_vapor', 'Cp Vapor (kJ/kg·K)', 1000, 0),
+    ('density_liquid', 'Densidad Líquido (kg/m³)', 1, 1200),
+    ('density_vapor', 'Densidad Vapor (kg/m³)', 1, 50)
+]
+
+def build_refrigerant_index(df):
+    """Compila refrigerants.csv en arreglos float64 ordenados por temperatura, uno por refrigerante."""
+    import pandas as pd
+
+    index = {}
+    if df.empty:
+        return index
+
+    possible_columns = [col for col in df.columns if col.strip().lower() in ['refrigerante', 'refrigerant']]
+    temp_col = next((col for col in df.columns if 'Temperatura' in col), None)
+    if not possible_columns or not temp_col:
+        logger.error("refrigerants.csv sin columnas de refrigerante o temperatura, índice vacío")
+        return index
+    refrigerant_col = possible_columns[0]
+
+    for refrigerant, df_ref in df.groupby(refrigerant_col, sort=False):
+        temps = pd.to_numeric(df_ref[temp_col], errors='coerce').to_numpy(dtype=np.float64)
+        valid = ~np.isnan(temps)
+        if not valid.any():
+            continue
+        # np.unique conserva la primera fila de cada temperatura, igual que el filtrado anterior con iloc[0]
+        temps, first = np.unique(temps[valid], return_index=True)
+        entry = {'temperature': temps}
+        for key, column, _, default in CSV_PROPERTY_COLUMNS:
+            if column in df_ref.columns:
+                values = pd.to_numeric(df_ref[column], errors='coerce').fillna(default).to_numpy(dtype=np.float64)
+                entry[key] = values[valid][first]
+            else:
+                entry[key] = np.full(temps.shape, float(default))
+            entry[key].flags.writeable = False
+        temps.flags.writeable = False
+        index[refrigerant] = entry
+    logger.info("Índice de propiedades compilado para: %s", list(index))
+    return index
 
 def get_properties_from_csv(refrigerant, temp_c):
-    logger.debug("Obteniendo propiedades de %s a %s°C", refrigerant, temp_c)
-    if df_refrigerants.empty:
+    """Interpola linealmente las propiedades de saturación; acepta un escalar o un arreglo de temperaturas (°C)."""
+    index = current_data().index
+    if not index:
         raise ValueError("Archivo refrigerants.csv no cargado o vacío")
-    
-    possible_columns = [col for col in df_refrigerants.columns if col.strip().lower() in ['refrigerante', 'refrigerant']]
-    if not possible_columns:
-        raise ValueError("Columna 'Refrigerante' no encontrada en refrigerants.csv")
-    refrigerant_col = possible_columns[0]
-    
-    df_ref = df_refrigerants[df_refrigerants[refrigerant_col] == refrigerant]
-    if df_ref.empty:
+    entry = index.get(refrigerant)
+    if entry is None:
         raise ValueError(f"Refrigerante {refrigerant} no encontrado en refrigerants.csv")
-    
-    temp_col = next((col for col in df_refrigerants.columns if 'Temperatura' in col), None)
-    if not temp_col:
-        raise ValueError("Columna de temperatura no encontrada en refrigerants.csv")
-    
-    temps = df_ref[temp_col].astype(float).tolist()
-    if not temps:
-        raise ValueError(f"No hay datos de temperatura para {refrigerant}")
-    
-    temp_lower = max([t for t in temps if t <= temp_c], default=min(temps))
-    temp_upper = min([t for t in temps if t >= temp_c], default=max(temps))
-    
-    logger.debug("Temperaturas: lower=%s, upper=%s, target=%s", temp_lower, temp_upper, temp_c)
-    
-    if temp_lower == temp_upper or temp_c < min(temps) or temp_c > max(temps):
-        row = df_ref[df_ref[temp_col] == temp_lower].iloc[0]
-        return {
-            'pressure_bubble': float(row.get('Presión Burbuja (bar)', 0)) * 100000,
-            'pressure_dew': float(row.get('Presión Rocío (bar)', 0)) * 100000,
-            'h_liquid': float(row.get('Entalpía Líquido (kJ/kg)', 0)) * 1000,
-            'h_vapor': float(row.get('Entalpía Vapor (kJ/kg)', 0)) * 1000,
-            's_liquid': float(row.get('Entropía Líquido (kJ/kg·K)', 0)) * 1000,
-            's_vapor': float(row.get('Entropía Vapor (kJ/kg·K)', 0)) * 1000,
-            'cp_vapor': float(row.get('Cp Vapor (kJ/kg·K)', 0)) * 1000,
-            'density_liquid': float(row.get('Densidad Líquido (kg/m³)', 1200)),
-            'density_vapor': float(row.get('Densidad Vapor (kg/m³)', 50))
-        }
-    
-    row_lower = df_ref[df_ref[temp_col] == temp_lower].iloc[0]
-    row_upper = df_ref[df_ref[temp_col] == temp_upper].iloc[0]
-    
-    props = {}
-    for key in ['Presión Burbuja (bar)', 'Presión Rocío (bar)', 'Entalpía Líquido (kJ/kg)', 
-                'Entalpía Vapor (kJ/kg)', 'Entropía Líquido (kJ/kg·K)', 'Entropía Vapor (kJ/kg·K)', 
-                'Cp Vapor (kJ/kg·K)', 'Densidad Líquido (kg/m³)', 'Densidad Vapor (kg/m³)']:
+
+    count_property_calls(np.size(temp_c))
+    temps = entry['temperature']
+    scalar = np.ndim(temp_c) == 0
+    t = np.clip(np.asarray(temp_c, dtype=np.float64), temps[0], temps[-1])
+
+    if temps.size == 1:
+        props = {key: entry[key][np.zeros(t.shape, dtype=np.intp)] * scale
+                 for key, _, scale, _ in CSV_PROPERTY_COLUMNS}
+    else:
+        i = np.clip(np.searchsorted(temps, t, side='right') - 1, 0, temps.size - 2)
+        t0 = temps[i]
+        t1 = temps[i + 1]
+        props = {}
+        for key, _, scale, _ in CSV_PROPERTY_COLUMNS:
+            y0 = entry[key][i]
+            y1 = entry[key][i + 1]
+            props[key] = (y0 + (y1 - y0) * (t - t0) / (t1 - t0)) * scale
+
+    if scalar:
+        return {key: float(value) for key, value in props.items()}
+    return props
+
+# Motor de propiedades CoolProp: un AbstractState por (refrigerante, backend, hilo), reutilizado con update()
+# Los backends tabulares cambian un error pequeño y acotado por velocidad; sus tablas se generan una vez
+# por refrigerante y CoolProp las guarda en disco (THERMO_TABLES_DIR o ~/.CoolProp/Tables).
+PROPERTY_BACKENDS = {
+    'HEOS': 'HEOS',
+    'BICUBIC': 'BICUBIC&HEOS',
+    'TTSE': 'TTSE&HEOS'
+}
+PROPERTY_BACKEND = os.environ.get('THERMO_BACKEND', 'HEOS').upper()
+if PROPERTY_BACKEND not in PROPERTY_BACKENDS:
+    logger.error("THERMO_BACKEND desconocido: %s, usando HEOS", PROPERTY_BACKEND)
+    PROPERTY_BACKEND = 'HEOS'
+TABLES_DIR = os.environ.get('THERMO_TABLES_DIR')
+if TABLES_DIR:
+    os.makedirs(TABLES_DIR, exist_ok=True)
+    CP.set_config_string(CP.ALTERNATIVE_TABLES_DIRECTORY, os.path.join(os.path.abspath(TABLES_DIR), ''))
+
+_state_pool = threading.local()
+
+def resolve_backend(name):
+    """Traduce el nombre de backend de la API (HEOS, BICUBIC, TTSE) a la cadena de CoolProp."""
+    key = (name or PROPERTY_BACKEND).strip().upper()
+    if key not in PROPERTY_BACKENDS:
+        raise ValueError(f"Backend desconocido: {name}. Opciones: {', '.join(PROPERTY_BACKENDS)}")
+    return PROPERTY_BACKENDS[key]
+
+def get_state(refrigerant, backend='HEOS'):
+    states = getattr(_state_pool, 'states', None)
+    if states is None:
+        states = _state_pool.states = {}
+    key = (backend, refrigerant)
+    state = states.get(key)
+    if state is None:
+        logger.debug("Creando AbstractState %s::%s", backend, refrigerant)
+        state = create_blend_state(refrigerant, backend) if refrigerant in BLEND_COMPOSITIONS else CP.AbstractState(backend, refrigerant)
+        states[key] = state
+    return state
+
+def state_props(refrigerant, input_pair, value1, value2, *outputs, backend='HEOS', phase=None):
+    """Evalúa un estado con un par de entradas de CoolProp (p. ej. CP.PT_INPUTS) y devuelve las salidas pedidas.
+
+    `phase` (p. ej. CP.iphase_gas) impone la fase y evita la prueba de estabilidad, lo más caro en mezclas.
+    """
+    count_property_calls()
+    check_deadline()
+    state = get_state(refrigerant, backend)
+    if phase is None:
+        state.update(input_pair, value1, value2)
+    else:
+        state.specify_phase(phase)
         try:
-            y0 = float(row_lower.get(key, 1200 if key == 'Densidad Líquido (kg/m³)' else 50 if key == 'Densidad Vapor (kg/m³)' else 0))
-            y1 = float(row_upper.get(key, 1200 if key == 'Densidad Líquido (kg/m³)' else 50 if key == 'Densidad Vapor (kg/m³)' else 0))
-            props[key] = interpolate(temp_c, temp_lower, temp_upper, y0, y1)
-        except ValueError as e:
-            logger.error("Error convirtiendo %s para %s: %s", key, refrigerant, str(e))
-            props[key] = 1200 if key == 'Densidad Líquido (kg/m³)' else 50 if key == 'Densidad Vapor (kg/m³)' else 0
-    
+            state.update(input_pair, value1, value2)
+        finally:
+            state.unspecify_phase()
+    if len(outputs) == 1:
+        return state.keyed_output(outputs[0])
+    return tuple(state.keyed_output(key) for key in outputs)
+
+def state_props_batch(refrigerant, input_pair, values1, values2, outputs, backend='HEOS', ignore_errors=False):
+    """Versión por lotes de state_props: devuelve un arreglo float64 por salida.
+
+    Con ignore_errors=True los estados que CoolProp no puede resolver quedan como NaN en vez de lanzar ValueError.
+    """
+    values1, values2 = np.broadcast_arrays(np.asarray(values1, dtype=np.float64), np.asarray(values2, dtype=np.float64))
+    results = [np.empty(values1.shape) for _ in outputs]
+    count_property_calls(values1.size)
+    state = get_state(refrigerant, backend)
+    for i, (value1, value2) in enumerate(zip(values1.flat, values2.flat)):
+        check_deadline()
+        try:
+            state.update(input_pair, value1, value2)
+            for result, key in zip(results, outputs):
+                result.flat[i] = state.keyed_output(key)
+        except ValueError:
+            if not ignore_errors:
+                raise
+            for result in results:
+                result.flat[i] = np.nan
+    return results
+
+def get_temperature_limits(refrigerant, backend='HEOS'):
+    state = get_state(refrigerant, backend)
+    return state.Tmin(), state.T_critical()
+
+def compare_backend_accuracy(refrigerant, backend, num_points=50):
+    """Desviación máxima (%) de P, h, s y ρ de un backend frente a HEOS entre Tmin y Tcrit.
+
+    Se comparan líquido saturado, vapor saturado y vapor sobrecalentado 10 K a la presión de saturación. Los puntos
+    en el borde inferior de presión de las tablas o por debajo se cuentan en 'out_of_table' y no entran en el
+    máximo: ahí el backend tabulado devuelve estados de otra fase (p. ej. densidad de líquido para el vapor).
+    """
+    t_min, t_max = get_temperature_limits(refrigerant)
+    temps = np.linspace(t_min, t_max, num_points + 1)[:-1]
+    outputs = [('P', CP.iP), ('h', CP.iHmass), ('s', CP.iSmass), ('rho', CP.iDmass)]
+    report = {}
+    failures = out_of_table = 0
+    # CoolProp tabula desde la presión de saturación a max(Ttriple, Tmin)
+    table_p_min = None
+    if backend != 'HEOS':
+        table_p_min = state_props(refrigerant, CP.QT_INPUTS, 0, max(get_state(refrigerant).Ttriple(), t_min), CP.iP)
+    for label, input_pair, make_inputs in [
+            ('saturated_liquid', CP.QT_INPUTS, lambda t, p: (0, t)),
+            ('saturated_vapor', CP.QT_INPUTS, lambda t, p: (1, t)),
+            ('superheated_vapor', CP.PT_INPUTS, lambda t, p: (p, t + 10))]:
+        deviations = {name: {'max_rel_dev_pct': 0.0, 'at_temperature': None} for name, _ in outputs}
+        for t in temps.tolist():
+            try:
+                p_sat = state_props(refrigerant, CP.QT_INPUTS, 1, t, CP.iP)
+                if table_p_min is not None and p_sat <= table_p_min * (1 + 1e-6):
+                    out_of_table += 1
+                    continue
+                value1, value2 = make_inputs(t, p_sat)
+                reference = state_props(refrigerant, input_pair, value1, value2, *[key for _, key in outputs])
+                approx = state_props(refrigerant, input_pair, value1, value2, *[key for _, key in outputs], backend=backend)
+            except ValueError as e:
+                logger.debug("Comparación %s fallida para %s a %s K: %s", backend, refrigerant, t, str(e))
+                failures += 1
+                continue
+            for (name, _), ref_value, value in zip(outputs, reference, approx):
+                dev = abs(value - ref_value) / abs(ref_value) * 100 if ref_value != 0 else abs(value)
+                if dev > deviations[name]['max_rel_dev_pct']:
+                    deviations[name] = {'max_rel_dev_pct': dev, 'at_temperature': t}
+        report[label] = deviations
+    overall = {name: max(report[label][name]['max_rel_dev_pct'] for label in report) for name, _ in outputs}
     return {
-        'pressure_bubble': props['Presión Burbuja (bar)'] * 100000,
-        'pressure_dew': props['Presión Rocío (bar)'] * 100000,
-        'h_liquid': props['Entalpía Líquido (kJ/kg)'] * 1000,
-        'h_vapor': props['Entalpía Vapor (kJ/kg)'] * 1000,
-        's_liquid': props['Entropía Líquido (kJ/kg·K)'] * 1000,
-        's_vapor': props['Entropía Vapor (kJ/kg·K)'] * 1000,
-        'cp_vapor': props['Cp Vapor (kJ/kg·K)'] * 1000,
-        'density_liquid': props['Densidad Líquido (kg/m³)'],
-        'density_vapor': props['Densidad Vapor (kg/m³)']
+        'refrigerant': refrigerant,
+        'backend': backend,
+        'temperature_range': [t_min, t_max],
+        'num_points': num_points,
+        'failures': failures,
+        'out_of_table': out_of_table,
+        'table_min_pressure': table_p_min,
+        'max_rel_dev_pct': overall,
+        'states': report
     }
 
-def get_capillary_constant(refrigerant, cooling_power_btu_h):
-    default_c = 0.1
-    if df_capillary.empty:
-        logger.warning("Capillary constants CSV vacío, usando valor por defecto: %s", default_c)
-        return default_c
-    
-    # Normalizar nombres de columnas y refrigerante
-    possible_columns = [col for col in df_capillary.columns if col.strip().lower() in ['refrigerante', 'refrigerant']]
-    logger.debug("Columnas posibles para 'Refrigerant': %s", possible_columns)
-    if not possible_columns:
-        logger.warning("Columna 'Refrigerant' no encontrada en capillary_constants.csv, usando valor por defecto: %s", default_c)
-        return default_c
+def normalize_refrigerant_name(name):
+    return name.strip().replace('-', '').lower()
+
+def build_capillary_table(df):
+    """Compila capillary_constants.csv en {refrigerante normalizado: (potencias BTU/h, constantes C)} de solo lectura.
+
+    Las potencias salen de la cabecera ('c 200' ... 'c 60000'); las celdas vacías se descartan por refrigerante.
+    """
+    import pandas as pd
+
+    table = {}
+    possible_columns = [col for col in df.columns if col.strip().lower() in ['refrigerante', 'refrigerant']]
+    if df.empty or not possible_columns:
+        return table
     refrigerant_col = possible_columns[0]
-    
-    # Normalizar refrigerante para comparación
-    normalized_refrigerant = refrigerant.strip().replace('-', '').lower()
-    df_capillary[refrigerant_col] = df_capillary[refrigerant_col].str.strip().str.replace('-', '').str.lower()
-    logger.debug("Refrigerantes disponibles en capillary_constants.csv: %s", df_capillary[refrigerant_col].tolist())
-    
-    row = df_capillary[df_capillary[refrigerant_col] == normalized_refrigerant]
-    if row.empty:
+
+    power_columns = []
+    for col in df.columns:
+        parts = col.strip().lower().split()
+        if len(parts) == 2 and parts[0] == 'c':
+            try:
+                power_columns.append((float(parts[1]), col))
+            except ValueError:
+                logger.warning("Columna de potencia no reconocida en capillary_constants.csv: %s", col)
+    power_columns.sort()
+    powers = np.array([power for power, _ in power_columns], dtype=np.float64)
+
+    for _, row in df.iterrows():
+        name = normalize_refrigerant_name(str(row[refrigerant_col]))
+        if name in table:
+            continue  # como antes, gana la primera fila si hay duplicados
+        values = pd.to_numeric(row[[col for _, col in power_columns]], errors='coerce').to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        if not valid.any():
+            continue
+        pairs = np.vstack([powers[valid], values[valid]])
+        pairs.flags.writeable = False
+        table[name] = (pairs[0], pairs[1])
+    logger.info("Tabla de constantes capilares compilada para %s refrigerantes", len(table))
+    return table
+
+# Snapshot binario de los índices compilados: encabezado JSON y un bloque float64 contiguo que cada worker
+# mapea en memoria de solo lectura (np.memmap), así que todos comparten las mismas páginas del page cache en
+# lugar de copias. Se regenera cuando cambia el contenido de los CSV. THERMO_SNAPSHOT='' lo desactiva.
+DATA_SNAPSHOT = os.environ.get('THERMO_SNAPSHOT', 'data_snapshot.bin')
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_MAGIC = b'THERMO-SNAPSHOT\n'
+SNAPSHOT_ALIGN = 64
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+def data_files_digest():
+    """Huella SHA-1 del contenido de los CSV de datos; un archivo ausente cuenta como vacío."""
+    digest = hashlib.sha1()
+    for path in DATA_FILES:
+        try:
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            pass
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+_data_lock_depth = threading.local()
+
+@contextlib.contextmanager
+def data_store_lock():
+    """Bloqueo entre procesos (flock sobre <snapshot>.lock): compilar el snapshot o modificar los CSV, de a uno.
+
+    Es reentrante dentro del mismo hilo (una carga de datos modifica los CSV y recompila bajo el mismo bloqueo).
+    """
+    depth = getattr(_data_lock_depth, 'value', 0)
+    if fcntl is None or not DATA_SNAPSHOT or depth:
+        _data_lock_depth.value = depth + 1
+        try:
+            yield
+        finally:
+            _data_lock_depth.value = depth
+        return
+    with open(f'{DATA_SNAPSHOT}.lock', 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        _data_lock_depth.value = 1
+        try:
+            yield
+        finally:
+            _data_lock_depth.value = 0
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def save_data_snapshot(path, index, table, source):
+    """Escribe el índice de propiedades y la tabla de constantes en un snapshot mapeable (reemplazo atómico)."""
+    blocks, offset = [], 0
+    def place(values):
+        nonlocal offset
+        blocks.append(np.ascontiguousarray(values, dtype='<f8'))
+        offset += blocks[-1].size
+        return [offset - blocks[-1].size, blocks[-1].size]
+    layout = {
+        'index': {refrigerant: {key: place(values) for key, values in entry.items()} for refrigerant, entry in index.items()},
+        'capillary': {name: [place(powers), place(constants)] for name, (powers, constants) in table.items()}
+    }
+    header = json.dumps({'format': SNAPSHOT_FORMAT, 'source': source, 'layout': layout}).encode('utf-8')
+    data_offset = -(-(len(SNAPSHOT_MAGIC) + 8 + len(header)) // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC + len(header).to_bytes(8, 'little') + header)
+        f.write(b'\0' * (data_offset - f.tell()))
+        for values in blocks:
+            f.write(values.tobytes())
+    os.replace(tmp_path, path)
+
+def load_data_snapshot(path, source):
+    """Mapea un snapshot; devuelve (índice, tabla) o None si no existe o no corresponde a los CSV actuales."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            logger.info("Snapshot %s en formato anterior, se recompila desde los CSV", path)
+            return None
+        header_length = int.from_bytes(f.read(8), 'little')
+        meta = json.loads(f.read(header_length))
+    if meta.get('format') != SNAPSHOT_FORMAT or meta.get('source') != source:
+        logger.info("Snapshot %s desactualizado, se recompila desde los CSV", path)
+        return None
+    data_offset = -(-(len(SNAPSHOT_MAGIC) + 8 + header_length) // SNAPSHOT_ALIGN) * SNAPSHOT_ALIGN
+    size = (os.path.getsize(path) - data_offset) // 8
+    data = np.memmap(path, dtype='<f8', mode='r', offset=data_offset, shape=(size,)) if size else np.empty(0)
+    view = lambda span: data[span[0]:span[0] + span[1]]
+    index = {refrigerant: {key: view(span) for key, span in entry.items()} for refrigerant, entry in meta['layout']['index'].items()}
+    table = {name: (view(powers), view(constants)) for name, (powers, constants) in meta['layout']['capillary'].items()}
+    return index, table
+
+class DataStore:
+    """Datos de los CSV compilados e inmutables: índice de propiedades, tabla de constantes capilares y la lista
+    de refrigerantes propios (los de refrigerants.csv). Se reemplaza entero con install_data_store."""
+
+    def __init__(self, index, table, digest, origin):
+        self.index = index
+        self.table = table
+        self.custom = tuple(index)
+        self.digest = digest
+        self.version = digest[:12]
+        self.origin = origin
+        self.loaded_at = time.time()
+
+def load_data_store(snapshot_path=DATA_SNAPSHOT):
+    """Devuelve un DataStore: desde el snapshot si está vigente, si no compilado desde los CSV (y se guarda el snapshot)."""
+    source = data_files_digest()
+    if not snapshot_path:
+        df_refrigerants, df_capillary = read_data_frames()
+        return DataStore(build_refrigerant_index(df_refrigerants), build_capillary_table(df_capillary), source, 'csv')
+
+    def from_snapshot():
+        try:
+            return load_data_snapshot(snapshot_path, source)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Snapshot %s ilegible, se recompila: %s", snapshot_path, str(e))
+            return None
+    loaded = from_snapshot()
+    if loaded is not None:
+        logger.info("Datos cargados desde el snapshot %s", snapshot_path)
+        return DataStore(*loaded, source, 'snapshot')
+
+    # Otro proceso puede estar compilando los mismos CSV: se espera su snapshot en lugar de repetir el trabajo
+    with data_store_lock():
+        loaded = from_snapshot()
+        if loaded is not None:
+            return DataStore(*loaded, source, 'snapshot')
+        df_refrigerants, df_capillary = read_data_frames()
+        index = build_refrigerant_index(df_refrigerants)
+        table = build_capillary_table(df_capillary)
+        if not index:
+            return DataStore(index, table, source, 'csv')
+        try:
+            save_data_snapshot(snapshot_path, index, table, source)
+            logger.info("Snapshot de datos escrito en %s", snapshot_path)
+            loaded = load_data_snapshot(snapshot_path, source)
+        except OSError as e:
+            logger.warning("No se pudo escribir el snapshot %s: %s", snapshot_path, str(e))
+    return DataStore(*(loaded or (index, table)), source, 'csv')
+
+_data_load_started = time.perf_counter()
+data_store = load_data_store()
+DATA_SOURCE = data_store.origin
+STARTUP_TIMINGS = {'data': time.perf_counter() - _data_load_started}
+
+# Recarga en caliente: el store vigente se reemplaza de una vez (una asignación) y cada petición fija al empezar
+# el que estaba vigente, así que un cambio de datos nunca la alcanza a mitad de cálculo. Cada worker revisa la
+# firma de los CSV como mucho una vez por segundo al recibir peticiones; con THERMO_DATA_WATCH=1 además lo hace
+# un hilo en segundo plano y la recompilación queda fuera del camino de las peticiones.
+DATA_WATCH = os.environ.get('THERMO_DATA_WATCH', '0').lower() in ('1', 'true', 'yes')
+DATA_WATCH_INTERVAL = float(os.environ.get('THERMO_DATA_WATCH_INTERVAL', 2))
+DATA_CHECK_INTERVAL = 1.0
+
+_pinned_data = threading.local()
+_data_check = {'stamp': None, 'checked': time.monotonic()}
+_data_store_lock = threading.Lock()
+_data_watcher = None
+
+def current_data():
+    """Store fijado por la petición (o el cálculo) en curso; fuera de una petición, el vigente."""
+    return getattr(_pinned_data, 'store', None) or data_store
+
+def data_files_stamp():
+    stamp = []
+    for path in DATA_FILES:
+        try:
+            stat = os.stat(path)
+            stamp.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        except OSError:
+            stamp.append(None)
+    return stamp
+
+def install_data_store(store):
+    """Publica un store nuevo y descarta los resultados calculados con el anterior."""
+    global data_store
+    previous, data_store = data_store, store
+    thermo_cache.clear()
+    node_cache.clear()
+    logger.info("Datos %s -> %s (%s): %s", previous.version, store.version, store.origin, ', '.join(store.custom))
+
+def refresh_data_store(min_interval=DATA_CHECK_INTERVAL):
+    """Recarga el store si cambió el contenido de los CSV; devuelve True si instaló uno nuevo.
+
+    Si otro hilo ya está recargando no espera: la petición sigue con el store anterior.
+    """
+    if time.monotonic() - _data_check['checked'] < min_interval:
+        return False
+    if not _data_store_lock.acquire(blocking=False):
+        return False
+    try:
+        _data_check['checked'] = time.monotonic()
+        stamp = data_files_stamp()
+        if stamp == _data_check['stamp']:
+            return False
+        _data_check['stamp'] = stamp
+        if data_files_digest() == data_store.digest:
+            return False
+        install_data_store(load_data_store())
+        return True
+    finally:
+        _data_store_lock.release()
+
+def _watch_data_files():
+    while True:
+        time.sleep(DATA_WATCH_INTERVAL)
+        try:
+            refresh_data_store(min_interval=0)
+        except Exception as e:
+            logger.error("Error recargando los datos: %s", str(e), exc_info=True)
+
+def ensure_data_watcher():
+    # Se inicia en el primer request de cada proceso: un hilo creado en el maestro no sobrevive al fork
+    global _data_watcher
+    if DATA_WATCH and (_data_watcher is None or not _data_watcher.is_alive()):
+        _data_watcher = threading.Thread(target=_watch_data_files, name='thermo-data-watch', daemon=True)
+        _data_watcher.start()
+
+@app.before_request
+def pin_data_store():
+    ensure_data_watcher()
+    refresh_data_store()
+    _pinned_data.store = data_store
+
+@app.teardown_request
+def unpin_data_store(exc):
+    _pinned_data.store = None
+
+def _unpin_data_after_fork():
+    # El hilo que bifurca puede estar atendiendo una petición; el hijo (p. ej. un proceso del pool) no la hereda
+    global _data_store_lock
+    _pinned_data.store = None
+    _data_store_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_unpin_data_after_fork)
+
+CAPILLARY_INTERPOLATION = os.environ.get('THERMO_CAPILLARY_INTERPOLATION', '0').lower() in ('1', 'true', 'yes')
+
+def get_capillary_constant(refrigerant, cooling_power_btu_h, interpolate=None):
+    """Constante C para la potencia dada: la primera columna con potencia >= cooling_power_btu_h.
+
+    Con interpolate=True (o THERMO_CAPILLARY_INTERPOLATION) interpola linealmente entre columnas vecinas.
+    Fuera del rango de la tabla se usa la columna extrema.
+    """
+    default_c = 0.1
+    entry = current_data().table.get(normalize_refrigerant_name(refrigerant))
+    if entry is None:
         logger.warning("No se encontró constante para %s, usando valor por defecto: %s", refrigerant, default_c)
         return default_c
-    
-    # Seleccionar la primera fila si hay duplicados
-    row = row.iloc[0]
-    logger.debug("Fila seleccionada para %s: %s", refrigerant, row.to_dict())
-    
-    # Definir umbrales de potencia
-    power_thresholds = [
-        (200, 'c 200'), (300, 'c 300'), (400, 'c 400'), (500, 'c 500'),
-        (600, 'c 600'), (750, 'c 750'), (1000, 'c 1000'), (2000, 'c 2000'),
-        (3000, 'c 3000'), (4000, 'c 4000'), (5000, 'c 5000'), (16000, 'c 16000'),
-        (18000, 'c 18000'), (24000, 'c 24000'), (30000, 'c 30000'), (36000, 'c 36000'),
-        (48000, 'c 48000'), (60000, 'c 60000')
-    ]
-    
-    # Seleccionar la columna adecuada
-    selected_column = None
-    for threshold, column in power_thresholds:
-        if cooling_power_btu_h <= threshold:
-            selected_column = column
-            break
-    if selected_column is None:
-        selected_column = power_thresholds[-1][1]
-    logger.debug("Columna seleccionada para %s BTU/h: %s", cooling_power_btu_h, selected_column)
-    
-    # Verificar que la columna existe
-    if selected_column not in df_capillary.columns:
-        logger.warning("Columna %s no encontrada en capillary_constants.csv, usando valor por defecto: %s", selected_column, default_c)
-        return default_c
-    
-    # Obtener y convertir el valor
-    try:
-        value = row[selected_column]
-        logger.debug("Valor en %s para %s: %s", selected_column, refrigerant, value)
-        if pd.isna(value):
-            logger.warning("Valor nulo en %s para %s, usando valor por defecto: %s", selected_column, refrigerant, default_c)
-            return default_c
-        c_value = float(value)
-        logger.debug("Constante C seleccionada para %s a %s BTU/h: %s (columna: %s)", 
-                     refrigerant, cooling_power_btu_h, c_value, selected_column)
-        return c_value
-    except (ValueError, TypeError, KeyError) as e:
-        logger.error("Error al leer constante %s para %s: %s", selected_column, refrigerant, str(e))
-        return default_c
+    powers, constants = entry
 
-def calculate_capillary_lengths(refrigerant, cooling_power, p1, p4, h1, h2, subcooling, evap_temp_c):
-    logger.debug("Calculando longitudes de capilar para %s", refrigerant)
-    is_custom = refrigerant in custom_refrigerants
+    i = bisect.bisect_left(powers, cooling_power_btu_h)
+    if i == len(powers):
+        c_value = float(constants[-1])
+    elif i == 0 or powers[i] == cooling_power_btu_h or not (CAPILLARY_INTERPOLATION if interpolate is None else interpolate):
+        c_value = float(constants[i])
+    else:
+        p0, p1 = powers[i - 1], powers[i]
+        c_value = float(constants[i - 1] + (constants[i] - constants[i - 1]) * (cooling_power_btu_h - p0) / (p1 - p0))
+    logger.debug("Constante C para %s a %s BTU/h: %s", refrigerant, cooling_power_btu_h, c_value)
+    return c_value
+
+def _memo(cache, key, compute):
+    """Memoiza compute() en cache[key]; sin cache simplemente calcula."""
+    if cache is None:
+        return compute()
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+COOLING_POWER_UNITS = ('W', 'Btu/h', 'kcal/h')
+
+def parse_cooling_power(cooling_power):
+    """Valida la potencia de enfriamiento {'value', 'unit'} y devuelve una copia con el valor como float finito."""
+    if not isinstance(cooling_power, dict) or 'value' not in cooling_power or 'unit' not in cooling_power:
+        raise ValueError("cooling_power debe ser un objeto {'value', 'unit'}")
+    if cooling_power['unit'] not in COOLING_POWER_UNITS:
+        raise ValueError(f"Unidad de potencia desconocida: {cooling_power['unit']}. Opciones: {', '.join(COOLING_POWER_UNITS)}")
+    return {'value': finite_float(cooling_power['value']), 'unit': cooling_power['unit']}
+
+def finite_float(value):
+    """float(value), rechazando NaN e infinitos (JSON los admite como NaN e Infinity)."""
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"Valor no finito: {value}")
+    return value
+
+def convert_cooling_power(cooling_power):
+    """Convierte {'value', 'unit'} (W, Btu/h o kcal/h) a (BTU/h, W)."""
     cooling_power_value = cooling_power['value']
     cooling_power_unit = cooling_power['unit']
-    
+
     # Convertir la potencia de enfriamiento a BTU/h
     if cooling_power_unit == 'W':
         cooling_power_btu_h = cooling_power_value * 3.41214
@@ -218,12 +1011,90 @@ def calculate_capillary_lengths(refrigerant, cooling_power, p1, p4, h1, h2, subc
         cooling_power_btu_h = cooling_power_value * 3.96832
     else:
         cooling_power_btu_h = cooling_power_value
-    
+
     cooling_power_watts = cooling_power_value
     if cooling_power_unit == 'Btu/h':
         cooling_power_watts *= 0.293071
     elif cooling_power_unit == 'kcal/h':
         cooling_power_watts *= 1.163
+    return cooling_power_btu_h, cooling_power_watts
+
+def load_diameter_catalog(path):
+    """Lee un catálogo de diámetros de capilar (mm) desde CSV: columna 'diameter_mm' o la primera columna."""
+    import pandas as pd
+
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    column = next((col for col in df.columns if col.strip().lower() in ['diameter_mm', 'diametro_mm', 'diámetro (mm)']), df.columns[0])
+    return parse_diameter_catalog(pd.to_numeric(df[column], errors='coerce').dropna())
+
+def parse_diameter_catalog(diameters_mm):
+    """Valida una lista de diámetros en mm y devuelve un arreglo ordenado, sin duplicados, en metros."""
+    diameters = np.unique(np.asarray(diameters_mm, dtype=np.float64)) / 1000
+    if diameters.size == 0 or not np.all(np.isfinite(diameters)) or diameters[0] <= 0:
+        raise ValueError("El catálogo de diámetros debe contener valores positivos")
+    diameters.flags.writeable = False
+    return diameters
+
+DEFAULT_DIAMETERS = np.array(COMMERCIAL_DIAMETERS, dtype=np.float64)
+DEFAULT_DIAMETERS.flags.writeable = False
+if os.environ.get('THERMO_CAPILLARY_CATALOG'):
+    try:
+        DEFAULT_DIAMETERS = load_diameter_catalog(os.environ['THERMO_CAPILLARY_CATALOG'])
+        logger.info("Catálogo de diámetros cargado: %s diámetros", DEFAULT_DIAMETERS.size)
+    except Exception as e:
+        logger.error("Error al leer el catálogo de diámetros: %s", str(e), exc_info=True)
+
+CAPILLARY_TARGET_LENGTH = 2.0
+
+def capillary_flow_capacity(delta_p, rho, C, diameters):
+    """ΔP·ρ·D⁴·C de la relación de flujo del capilar, L·ṁ/fc: la longitud es esto / ṁ · fc y el caudal, esto · fc / L."""
+    return delta_p * rho * (diameters ** 4) * C
+
+def capillary_correction_factor(evap_temp_c):
+    """Factor de corrección fc(T) de la relación de flujo según la temperatura de evaporación en °C."""
+    return -0.025 * (evap_temp_c - -20) + 1
+
+def size_capillaries(delta_p, rho, m_dot, C, fc, diameters=DEFAULT_DIAMETERS, target_length=CAPILLARY_TARGET_LENGTH):
+    """Kernel vectorizado de dimensionamiento para n casos (ΔP, ρ, ṁ, C, fc) sobre m diámetros.
+
+    L = ΔP·ρ·D⁴·C/ṁ·fc para cada diámetro; el ganador es la longitud válida (0.01-10 m) más cercana a
+    target_length y la tabla final escala su longitud con (D/D_ganador)^4.6. Devuelve un dict de arreglos
+    (n, m) o (n,) con NaN donde no hay solución; 'winner_index' es -1 si el caso no tiene longitudes válidas.
+    """
+    delta_p, rho, m_dot, C, fc = (np.asarray(value, dtype=np.float64).reshape(-1, 1)
+                                  for value in np.broadcast_arrays(delta_p, rho, m_dot, C, fc))
+    diameters = np.asarray(diameters, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        lengths = capillary_flow_capacity(delta_p, rho, C, diameters) / m_dot * fc
+        lengths = np.where((lengths >= 0.001) & (lengths <= 15), lengths, np.nan)
+        candidates = np.where((lengths >= 0.01) & (lengths <= 10), np.abs(target_length - lengths), np.inf)
+        winner_index = np.argmin(candidates, axis=1)
+        has_winner = np.isfinite(candidates[np.arange(candidates.shape[0]), winner_index])
+        winner_index = np.where(has_winner, winner_index, -1)
+        winner_diameter = np.where(has_winner, diameters[winner_index], np.nan)
+        winner_length = np.where(has_winner, lengths[np.arange(lengths.shape[0]), winner_index], np.nan)
+
+        scaled = winner_length[:, None] * ((diameters / winner_diameter[:, None]) ** 4.6)
+        scaled = np.where((scaled >= 0.001) & (scaled <= 15) & (np.abs(diameters) >= 1e-10), scaled, np.nan)
+
+        # Modo inverso: diámetro que da exactamente target_length con la misma relación de flujo
+        required_diameter = (target_length * m_dot[:, 0] / (delta_p[:, 0] * rho[:, 0] * C[:, 0] * fc[:, 0])) ** 0.25
+
+    return {
+        'lengths': lengths,
+        'winner_index': winner_index,
+        'winner_diameter': winner_diameter,
+        'winner_length': winner_length,
+        'scaled_lengths': scaled,
+        'required_diameter': required_diameter
+    }
+
+def calculate_capillary_lengths(refrigerant, cooling_power, p1, p4, h1, h2, subcooling, evap_temp_c, backend='HEOS', cache=None,
+                                diameters=DEFAULT_DIAMETERS, target_length=CAPILLARY_TARGET_LENGTH):
+    logger.debug("Calculando longitudes de capilar para %s", refrigerant)
+    is_custom = refrigerant in current_data().custom
+    cooling_power_btu_h, cooling_power_watts = convert_cooling_power(cooling_power)
 
     if abs(h2 - h1) < 1e-6:
         logger.error("Diferencia de entalpía h2 - h1 es demasiado pequeña: %s", h2 - h1)
@@ -231,18 +1102,23 @@ def calculate_capillary_lengths(refrigerant, cooling_power, p1, p4, h1, h2, subc
     m_dot = cooling_power_watts / (h2 - h1)
     logger.debug("Caudal másico: %s kg/s", m_dot)
 
-    if is_custom:
-        props = get_properties_from_csv(refrigerant, p4['temperature'] - 273.15)
-        rho = props['density_liquid']
-    else:
+    def density_p4():
+        if is_mixture_blend(refrigerant):
+            return p4['density']
+        if is_custom:
+            props = get_properties_from_csv(refrigerant, p4['temperature'] - 273.15)
+            return props['density_liquid']
         try:
             if subcooling == 0:
-                rho = CP.PropsSI('D', 'T', p4['temperature'], 'Q', 0, refrigerant)
-            else:
-                rho = CP.PropsSI('D', 'T', p4['temperature'], 'P', p4['pressure'], refrigerant)
+                return state_props(refrigerant, CP.QT_INPUTS, 0, p4['temperature'], CP.iDmass, backend=backend)
+            return state_props(refrigerant, CP.PT_INPUTS, p4['pressure'], p4['temperature'], CP.iDmass, backend=backend)
         except ValueError as e:
             logger.warning("CoolProp density calculation failed for P4: %s. Using fallback density.", str(e))
-            rho = 1200
+            return 1200
+    rho = _memo(cache, node_key('rho4', refrigerant=refrigerant, backend=backend,
+                                data_version=current_data().version if is_custom else None,
+                                p4_temperature=p4['temperature'], p4_pressure=p4['pressure'], saturated=subcooling == 0),
+                density_p4)
     logger.debug("Densidad P4: %s kg/m³", rho)
 
     delta_p = p4['pressure'] - p1['pressure']
@@ -254,76 +1130,30 @@ def calculate_capillary_lengths(refrigerant, cooling_power, p1, p4, h1, h2, subc
     C = get_capillary_constant(refrigerant, cooling_power_btu_h)
     logger.debug("Constante capilar C: %s", C)
 
-    fc = -0.025 * (evap_temp_c - -20) + 1
+    fc = capillary_correction_factor(evap_temp_c)
     logger.debug("Factor de corrección fc(T) para T=%s°C: %s", evap_temp_c, fc)
 
-    initial_lengths = []
-    for D in COMMERCIAL_DIAMETERS:
-        try:
-            length = (delta_p * rho * (D ** 4) * C) / m_dot * fc
-            if 0.001 <= length <= 15:
-                initial_lengths.append({
-                    'diameter_m': D,
-                    'diameter_mm': D * 1000,
-                    'length_m': length
-                })
-            else:
-                initial_lengths.append({
-                    'diameter_m': D,
-                    'diameter_mm': D * 1000,
-                    'length_m': 'N/A'
-                })
-        except Exception as e:
-            logger.error("Error calculando longitud para diámetro %s: %s", D, str(e), exc_info=True)
-            initial_lengths.append({
-                'diameter_m': D,
-                'diameter_mm': D * 1000,
-                'length_m': 'N/A'
-            })
-
-    valid_lengths = [item for item in initial_lengths if isinstance(item['length_m'], (int, float)) and 0.01 <= item['length_m'] <= 10]
-    if not valid_lengths:
+    sizing = size_capillaries(delta_p, rho, m_dot, C, fc, diameters, target_length)
+    if sizing['winner_index'][0] < 0:
         logger.error("No se encontraron longitudes válidas entre 0.01 y 10 metros")
         raise ValueError("No se encontraron longitudes válidas entre 0.01 y 10 metros")
-    
-    winner = min(valid_lengths, key=lambda x: abs(2 - x['length_m']))
-    winner_diameter = winner['diameter_m']
-    winner_length = winner['length_m']
-    logger.debug("Ganador: diámetro=%s mm, longitud=%s m", winner['diameter_mm'], winner_length)
-
-    capillary_lengths = []
-    for D in COMMERCIAL_DIAMETERS:
-        try:
-            if abs(D) < 1e-10:
-                logger.warning("Diámetro demasiado pequeño: %s", D)
-                capillary_lengths.append({
-                    'diameter_mm': D * 1000,
-                    'length_m': 'N/A'
-                })
-                continue
-            ratio = D / winner_diameter
-            new_length = winner_length * (ratio ** 4.6)
-            if 0.001 <= new_length <= 15:
-                new_length = round(new_length, 3)
-            else:
-                new_length = 'N/A'
-            capillary_lengths.append({
-                'diameter_mm': D * 1000,
-                'length_m': new_length
-            })
-        except Exception as e:
-            logger.error("Error calculando nueva longitud para diámetro %s: %s", D, str(e), exc_info=True)
-            capillary_lengths.append({
-                'diameter_mm': D * 1000,
-                'length_m': 'N/A'
-            })
+    winner_diameter = float(sizing['winner_diameter'][0])
+    winner_length = float(sizing['winner_length'][0])
+    logger.debug("Ganador: diámetro=%s mm, longitud=%s m", winner_diameter * 1000, winner_length)
+
+    capillary_lengths = [
+        {'diameter_mm': D * 1000, 'length_m': 'N/A' if math.isnan(length) else round(length, 3)}
+        for D, length in zip(np.asarray(diameters).tolist(), sizing['scaled_lengths'][0].tolist())
+    ]
 
     result = {
         'winner': {
-            'diameter_mm': winner['diameter_mm'],
-            'length_m': round(winner_length, 3) if isinstance(winner_length, (int, float)) else winner_length
+            'diameter_mm': winner_diameter * 1000,
+            'length_m': round(winner_length, 3)
         },
-        'capillary_lengths': capillary_lengths
+        'capillary_lengths': capillary_lengths,
+        'target_length_m': target_length,
+        'required_diameter_mm': float(sizing['required_diameter'][0]) * 1000
     }
 
     return result, m_dot
@@ -332,249 +1162,2934 @@ def calculate_capillary_lengths(refrigerant, cooling_power, p1, p4, h1, h2, subc
 def get_refrigerants():
     logger.info("Request received for /refrigerants")
     try:
-        refrigerants = CP.FluidsList() + custom_refrigerants
+        refrigerants = CP.FluidsList() + list(current_data().custom)
         logger.debug("Refrigerantes soportados: %s", refrigerants)
         return jsonify({'status': 'success', 'refrigerants': refrigerants})
     except Exception as e:
         logger.error("Error en /refrigerants: %s", str(e), exc_info=True)
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
-@app.route('/thermo', methods=['POST'])
-def get_thermo_properties():
-    data = request.get_json()
-    logger.info("Request received for /thermo with data: %s", data)
-    
-    try:
-        refrigerant = data.get('refrigerant', 'R134a')
-        evap_temp = float(data.get('evap_temp', 243.15))
-        cond_temp = float(data.get('cond_temp', 313.15))
-        superheat = float(data.get('superheat', 0))
-        subcooling = float(data.get('subcooling', 0))
-        cooling_power = data.get('cooling_power', {'value': 1000, 'unit': 'W'})
-        logger.debug("Parámetros: refrigerant=%s, evap_temp=%s, cond_temp=%s, superheat=%s, subcooling=%s, cooling_power=%s",
-                     refrigerant, evap_temp, cond_temp, superheat, subcooling, cooling_power)
-    except (TypeError, ValueError) as e:
-        logger.error("Datos de entrada inválidos: %s", str(e), exc_info=True)
-        return jsonify({'status': 'error', 'message': 'Datos de entrada inválidos'}), 400
-
+def validate_operating_point(evap_temp, cond_temp, superheat, subcooling, cooling_power_value):
+    """Devuelve el mensaje de error para un punto de operación inválido, o None si es válido."""
     if cond_temp <= evap_temp:
         logger.error("Temperatura de condensación menor o igual a la de evaporación: cond_temp=%s, evap_temp=%s", cond_temp, evap_temp)
-        return jsonify({'status': 'error', 'message': 'La temperatura de condensación debe ser mayor que la de evaporación'}), 400
+        return 'La temperatura de condensación debe ser mayor que la de evaporación'
     if superheat < 0 or subcooling < 0:
         logger.error("Sobrecalentamiento o subenfriamiento negativo: superheat=%s, subcooling=%s", superheat, subcooling)
-        return jsonify({'status': 'error', 'message': 'El sobrecalentamiento y subenfriamiento no pueden ser negativos'}), 400
-    if cooling_power['value'] <= 0:
-        logger.error("Potencia de enfriamiento inválida: %s", cooling_power['value'])
-        return jsonify({'status': 'error', 'message': 'La potencia de enfriamiento debe ser mayor que cero'}), 400
+        return 'El sobrecalentamiento y subenfriamiento no pueden ser negativos'
+    if cooling_power_value <= 0:
+        logger.error("Potencia de enfriamiento inválida: %s", cooling_power_value)
+        return 'La potencia de enfriamiento debe ser mayor que cero'
+    return None
 
-    is_custom = refrigerant in custom_refrigerants
+def calculate_cycle_custom(refrigerant, evap_temp, cond_temp, superheat, subcooling, cache=None):
+    logger.debug("Procesando refrigerante personalizado: %s", refrigerant)
     evap_temp_c = evap_temp - 273.15
     cond_temp_c = cond_temp - 273.15
+    version = current_data().version
+    csv_props = lambda temp_c: _memo(cache, node_key('csv', refrigerant=refrigerant, data_version=version, temperature=temp_c),
+                                     lambda: get_properties_from_csv(refrigerant, temp_c))
+    evap_props = csv_props(evap_temp_c)
+    cond_props = csv_props(cond_temp_c)
 
-    try:
-        if is_custom:
-            logger.debug("Procesando refrigerante personalizado: %s", refrigerant)
-            evap_props = get_properties_from_csv(refrigerant, evap_temp_c)
-            cond_props = get_properties_from_csv(refrigerant, cond_temp_c)
+    p4_pressure = cond_props['pressure_bubble']
+    if subcooling == 0:
+        p4_enthalpy = cond_props['h_liquid']
+        p4_temp = cond_temp
+        p4_density = cond_props['density_liquid']
+    else:
+        p4_temp = cond_temp - subcooling
+        temp_sub = cond_temp_c - subcooling
+        sub_props = csv_props(temp_sub)
+        p4_enthalpy = sub_props['h_liquid']
+        p4_density = sub_props['density_liquid']
 
-            p4_pressure = cond_props['pressure_bubble']
-            if subcooling == 0:
-                p4_enthalpy = cond_props['h_liquid']
-                p4_temp = cond_temp
-                p4_density = cond_props['density_liquid']
-            else:
-                p4_temp = cond_temp - subcooling
-                temp_sub = cond_temp_c - subcooling
-                sub_props = get_properties_from_csv(refrigerant, temp_sub)
-                p4_enthalpy = sub_props['h_liquid']
-                p4_density = sub_props['density_liquid']
-
-            p1_pressure = evap_props['pressure_dew']
-            p1_enthalpy = p4_enthalpy
-            p1_temp = evap_temp
-            p1_density = evap_props['density_liquid']
-
-            p2_pressure = p1_pressure
-            if superheat == 0:
-                p2_enthalpy = evap_props['h_vapor']
-                p2_temp = evap_temp
-                p2_density = evap_props['density_vapor']
-            else:
-                p2_temp = evap_temp + superheat
-                temp_sh = evap_temp_c + superheat
-                sh_props = get_properties_from_csv(refrigerant, temp_sh)
-                p2_enthalpy = sh_props['h_vapor']
-                p2_density = sh_props['density_vapor']
-            s2 = evap_props['s_vapor']
-
-            p3_pressure = p4_pressure
+    p1_pressure = evap_props['pressure_dew']
+    p1_enthalpy = p4_enthalpy
+    p1_temp = evap_temp
+    p1_density = evap_props['density_liquid']
+
+    p2_pressure = p1_pressure
+    if superheat == 0:
+        p2_enthalpy = evap_props['h_vapor']
+        p2_temp = evap_temp
+        p2_density = evap_props['density_vapor']
+    else:
+        p2_temp = evap_temp + superheat
+        temp_sh = evap_temp_c + superheat
+        sh_props = csv_props(temp_sh)
+        p2_enthalpy = sh_props['h_vapor']
+        p2_density = sh_props['density_vapor']
+
+    p3_pressure = p4_pressure
+    t_evap_k = evap_temp
+    t_cond_k = cond_temp
+    cop_ideal = t_evap_k / (t_cond_k - t_evap_k)
+    cop_real = cop_ideal * 0.75
+    p3_enthalpy = p2_enthalpy + (p2_enthalpy - p4_enthalpy) / cop_real
+
+    h_g_cond = cond_props['h_vapor']
+    delta_h_superheat = p3_enthalpy - h_g_cond
+    cp_vapor = cond_props['cp_vapor'] or 1000
+    delta_t_superheat = delta_h_superheat / cp_vapor
+    p3_temp = cond_temp + delta_t_superheat
+    p3_density = cond_props['density_vapor']
+
+    return {
+        '1': {'pressure': p1_pressure, 'enthalpy': p1_enthalpy, 'temperature': p1_temp, 'density': p1_density},
+        '2': {'pressure': p2_pressure, 'enthalpy': p2_enthalpy, 'temperature': p2_temp, 'density': p2_density},
+        '3': {'pressure': p3_pressure, 'enthalpy': p3_enthalpy, 'temperature': p3_temp, 'density': p3_density},
+        '4': {'pressure': p4_pressure, 'enthalpy': p4_enthalpy, 'temperature': p4_temp, 'density': p4_density}
+    }
+
+def calculate_cycle_coolprop(refrigerant, evap_temp, cond_temp, superheat, subcooling, backend='HEOS', cache=None):
+    logger.debug("Procesando refrigerante CoolProp: %s", refrigerant)
+    t_min, t_max = _memo(cache, node_key('limits', refrigerant=refrigerant, backend=backend),
+                         lambda: get_temperature_limits(refrigerant, backend))
+    logger.debug("Rango de temperatura para %s: [%s°C, %s°C]", refrigerant, t_min-273.15, t_max-273.15)
+    if evap_temp < t_min or cond_temp > t_max:
+        raise ValueError(f"Temperatura fuera de rango para {refrigerant}: [{t_min-273.15}°C, {t_max-273.15}°C]")
+
+    p_cond = _memo(cache, node_key('psat_cond', refrigerant=refrigerant, backend=backend, cond_temp=cond_temp),
+                   lambda: state_props(refrigerant, CP.QT_INPUTS, 1, cond_temp, CP.iP, backend=backend))
+    p_evap = _memo(cache, node_key('psat_evap', refrigerant=refrigerant, backend=backend, evap_temp=evap_temp),
+                   lambda: state_props(refrigerant, CP.QT_INPUTS, 0, evap_temp, CP.iP, backend=backend))
+
+    def point4():
+        p4_pressure = p_cond
+        logger.debug("P4: pressure=%s Pa", p4_pressure)
+        if subcooling == 0:
+            p4_temp = cond_temp
+            p4_enthalpy, p4_density = state_props(refrigerant, CP.QT_INPUTS, 0, cond_temp, CP.iHmass, CP.iDmass, backend=backend)
+        else:
+            p4_temp = cond_temp - subcooling
+            p4_enthalpy, p4_density = state_props(refrigerant, CP.PT_INPUTS, p4_pressure, p4_temp, CP.iHmass, CP.iDmass, backend=backend)
+        logger.debug("P4: temp=%s K, enthalpy=%s J/kg, density=%s kg/m³", p4_temp, p4_enthalpy, p4_density)
+        return p4_pressure, p4_enthalpy, p4_temp, p4_density
+    p4_pressure, p4_enthalpy, p4_temp, p4_density = _memo(
+        cache, node_key('p4', refrigerant=refrigerant, backend=backend, cond_temp=cond_temp, subcooling=subcooling), point4)
+
+    def point1():
+        p1_pressure = p_evap
+        try:
+            p1_density = state_props(refrigerant, CP.PT_INPUTS, p1_pressure, evap_temp, CP.iDmass, backend=backend)
+        except ValueError as e:
+            logger.warning("CoolProp density calculation failed for P1: %s. Using fallback density.", str(e))
+            p1_density = 1200
+        return p1_pressure, p1_density
+    p1_pressure, p1_density = _memo(cache, node_key('p1', refrigerant=refrigerant, backend=backend, evap_temp=evap_temp), point1)
+    p1_enthalpy = p4_enthalpy
+    p1_temp = evap_temp
+    logger.debug("P1: pressure=%s Pa, enthalpy=%s J/kg, temp=%s K, density=%s kg/m³", p1_pressure, p1_enthalpy, p1_temp, p1_density)
+
+    def point2():
+        p2_pressure = p1_pressure
+        if superheat == 0:
+            p2_temp = evap_temp
+            p2_enthalpy, p2_density = state_props(refrigerant, CP.QT_INPUTS, 1, evap_temp, CP.iHmass, CP.iDmass, backend=backend)
+        else:
+            p2_temp = evap_temp + superheat
+            p2_enthalpy, p2_density = state_props(refrigerant, CP.PT_INPUTS, p2_pressure, p2_temp, CP.iHmass, CP.iDmass, backend=backend)
+        s2 = state_props(refrigerant, CP.HmassP_INPUTS, p2_enthalpy, p2_pressure, CP.iSmass, backend=backend)
+        logger.debug("P2: pressure=%s Pa, enthalpy=%s J/kg, temp=%s K, density=%s kg/m³, entropy=%s J/kg·K",
+                     p2_pressure, p2_enthalpy, p2_temp, p2_density, s2)
+        return p2_pressure, p2_enthalpy, p2_temp, p2_density, s2
+    p2_pressure, p2_enthalpy, p2_temp, p2_density, s2 = _memo(
+        cache, node_key('p2', refrigerant=refrigerant, backend=backend, evap_temp=evap_temp, superheat=superheat), point2)
+
+    def point3():
+        p3_pressure = p4_pressure
+        try:
+            p3_enthalpy = state_props(refrigerant, CP.PSmass_INPUTS, p3_pressure, s2, CP.iHmass, backend=backend)
+            p3_temp, p3_density = state_props(refrigerant, CP.HmassP_INPUTS, p3_enthalpy, p3_pressure, CP.iT, CP.iDmass, backend=backend)
+        except ValueError as e:
+            logger.warning("Cálculo isentrópico fallido: %s. Usando aproximación.", str(e))
             t_evap_k = evap_temp
             t_cond_k = cond_temp
             cop_ideal = t_evap_k / (t_cond_k - t_evap_k)
             cop_real = cop_ideal * 0.75
             p3_enthalpy = p2_enthalpy + (p2_enthalpy - p4_enthalpy) / cop_real
+            p3_temp = cond_temp + 10
+            p3_density = state_props(refrigerant, CP.PT_INPUTS, p3_pressure, p3_temp, CP.iDmass, backend=backend)
+        logger.debug("P3: pressure=%s Pa, enthalpy=%s J/kg, temp=%s K, density=%s kg/m³",
+                     p3_pressure, p3_enthalpy, p3_temp, p3_density)
+        return p3_pressure, p3_enthalpy, p3_temp, p3_density
+    p3_pressure, p3_enthalpy, p3_temp, p3_density = _memo(
+        cache, node_key('p3', refrigerant=refrigerant, backend=backend, evap_temp=evap_temp, cond_temp=cond_temp,
+                        superheat=superheat, subcooling=subcooling), point3)
 
-            h_g_cond = cond_props['h_vapor']
-            delta_h_superheat = p3_enthalpy - h_g_cond
-            cp_vapor = cond_props['cp_vapor'] or 1000
-            delta_t_superheat = delta_h_superheat / cp_vapor
-            p3_temp = cond_temp + delta_t_superheat
-            p3_density = cond_props['density_vapor']
-
-            q_evap = p2_enthalpy - p1_enthalpy
-            w_comp = p3_enthalpy - p2_enthalpy
-            cop = q_evap / w_comp if w_comp != 0 else 0
-            logger.debug("COP calculado: %s, q_evap=%s, w_comp=%s", cop, q_evap, w_comp)
-
-            possible_columns = [col for col in df_refrigerants.columns if col.strip().lower() in ['refrigerante', 'refrigerant']]
-            refrigerant_col = possible_columns[0]
-            temp_col = next((col for col in df_refrigerants.columns if 'Temperatura' in col), None)
-            df_ref = df_refrigerants[df_refrigerants[refrigerant_col] == refrigerant]
-            num_points = 50
-            temp_range = (cond_temp_c - evap_temp_c) * 1.5
-            temp_min = evap_temp_c - temp_range * 0.25
-            temp_max = cond_temp_c + temp_range * 0.25
-            temp_step = (temp_max - temp_min) / (num_points - 1)
-            saturation_data = {'liquid': [], 'vapor': []}
-            for i in range(num_points):
-                temp = temp_min + i * temp_step
-                if temp < min(df_ref[temp_col].astype(float)) or temp > max(df_ref[temp_col].astype(float)):
-                    logger.debug("Temperatura fuera de rango para saturación: %s", temp)
-                    continue
-                props = get_properties_from_csv(refrigerant, temp)
-                saturation_data['liquid'].append({
-                    'temperature': temp,
-                    'pressure': props['pressure_bubble'],
-                    'enthalpy': props['h_liquid']
-                })
-                saturation_data['vapor'].append({
-                    'temperature': temp,
-                    'pressure': props['pressure_dew'],
-                    'enthalpy': props['h_vapor']
-                })
+    return {
+        '1': {'pressure': p1_pressure, 'enthalpy': p1_enthalpy, 'temperature': p1_temp, 'density': p1_density},
+        '2': {'pressure': p2_pressure, 'enthalpy': p2_enthalpy, 'temperature': p2_temp, 'density': p2_density},
+        '3': {'pressure': p3_pressure, 'enthalpy': p3_enthalpy, 'temperature': p3_temp, 'density': p3_density},
+        '4': {'pressure': p4_pressure, 'enthalpy': p4_enthalpy, 'temperature': p4_temp, 'density': p4_density}
+    }
 
-        else:
-            logger.debug("Procesando refrigerante CoolProp: %s", refrigerant)
-            t_min = CP.PropsSI('Tmin', refrigerant)
-            t_max = CP.PropsSI('Tcrit', refrigerant)
-            logger.debug("Rango de temperatura para %s: [%s°C, %s°C]", refrigerant, t_min-273.15, t_max-273.15)
-            if evap_temp < t_min or cond_temp > t_max:
-                raise ValueError(f"Temperatura fuera de rango para {refrigerant}: [{t_min-273.15}°C, {t_max-273.15}°C]")
-
-            p4_pressure = CP.PropsSI('P', 'T', cond_temp, 'Q', 1, refrigerant)
-            logger.debug("P4: pressure=%s Pa", p4_pressure)
-            if subcooling == 0:
-                p4_enthalpy = CP.PropsSI('H', 'T', cond_temp, 'Q', 0, refrigerant)
-                p4_temp = cond_temp
-                p4_density = CP.PropsSI('D', 'T', cond_temp, 'Q', 0, refrigerant)
-            else:
-                p4_temp = cond_temp - subcooling
-                p4_enthalpy = CP.PropsSI('H', 'T', p4_temp, 'P', p4_pressure, refrigerant)
-                p4_density = CP.PropsSI('D', 'T', p4_temp, 'P', p4_pressure, refrigerant)
-            logger.debug("P4: temp=%s K, enthalpy=%s J/kg, density=%s kg/m³", p4_temp, p4_enthalpy, p4_density)
-
-            p1_pressure = CP.PropsSI('P', 'T', evap_temp, 'Q', 0, refrigerant)
-            p1_enthalpy = p4_enthalpy
-            p1_temp = evap_temp
-            try:
-                p1_density = CP.PropsSI('D', 'T', p1_temp, 'P', p1_pressure, refrigerant)
-            except ValueError as e:
-                logger.warning("CoolProp density calculation failed for P1: %s. Using fallback density.", str(e))
-                p1_density = 1200
-            logger.debug("P1: pressure=%s Pa, enthalpy=%s J/kg, temp=%s K, density=%s kg/m³", p1_pressure, p1_enthalpy, p1_temp, p1_density)
-
-            p2_pressure = p1_pressure
-            if superheat == 0:
-                p2_enthalpy = CP.PropsSI('H', 'T', evap_temp, 'Q', 1, refrigerant)
-                p2_temp = evap_temp
-                p2_density = CP.PropsSI('D', 'T', evap_temp, 'Q', 1, refrigerant)
-            else:
-                p2_temp = evap_temp + superheat
-                p2_enthalpy = CP.PropsSI('H', 'T', p2_temp, 'P', p2_pressure, refrigerant)
-                p2_density = CP.PropsSI('D', 'T', p2_temp, 'P', p2_pressure, refrigerant)
-            s2 = CP.PropsSI('S', 'H', p2_enthalpy, 'P', p2_pressure, refrigerant)
-            logger.debug("P2: pressure=%s Pa, enthalpy=%s J/kg, temp=%s K, density=%s kg/m³, entropy=%s J/kg·K", 
-                         p2_pressure, p2_enthalpy, p2_temp, p2_density, s2)
-
-            p3_pressure = p4_pressure
-            try:
-                p3_enthalpy = CP.PropsSI('H', 'P', p3_pressure, 'S', s2, refrigerant)
-                p3_temp = CP.PropsSI('T', 'P', p3_pressure, 'H', p3_enthalpy, refrigerant)
-                p3_density = CP.PropsSI('D', 'P', p3_pressure, 'H', p3_enthalpy, refrigerant)
-            except ValueError as e:
-                logger.warning("Cálculo isentrópico fallido: %s. Usando aproximación.", str(e))
-                t_evap_k = evap_temp
-                t_cond_k = cond_temp
-                cop_ideal = t_evap_k / (t_cond_k - t_evap_k)
-                cop_real = cop_ideal * 0.75
-                p3_enthalpy = p2_enthalpy + (p2_enthalpy - p4_enthalpy) / cop_real
-                p3_temp = cond_temp + 10
-                p3_density = CP.PropsSI('D', 'T', p3_temp, 'P', p3_pressure, refrigerant)
-            logger.debug("P3: pressure=%s Pa, enthalpy=%s J/kg, temp=%s K, density=%s kg/m³", 
-                         p3_pressure, p3_enthalpy, p3_temp, p3_density)
-
-            q_evap = p2_enthalpy - p1_enthalpy
-            w_comp = p3_enthalpy - p2_enthalpy
-            cop = q_evap / w_comp if w_comp != 0 else 0
-            logger.debug("COP calculado: %s, q_evap=%s, w_comp=%s", cop, q_evap, w_comp)
-
-            num_points = 50
-            temp_range = (cond_temp - evap_temp) * 1.5
-            temp_min = evap_temp - temp_range * 0.25
-            temp_max = cond_temp + temp_range * 0.25
-            temp_step = (temp_max - temp_min) / (num_points - 1)
-            saturation_data = {'liquid': [], 'vapor': []}
-            for i in range(num_points):
-                temp = temp_min + i * temp_step
-                if temp < t_min or temp > t_max:
-                    logger.debug("Temperatura fuera de rango para saturación: %s K", temp)
-                    continue
-                p_liquid = CP.PropsSI('P', 'T', temp, 'Q', 0, refrigerant)
-                h_liquid = CP.PropsSI('H', 'T', temp, 'Q', 0, refrigerant)
-                p_vapor = CP.PropsSI('P', 'T', temp, 'Q', 1, refrigerant)
-                h_vapor = CP.PropsSI('H', 'T', temp, 'Q', 1, refrigerant)
-                saturation_data['liquid'].append({'temperature': temp - 273.15, 'pressure': p_liquid, 'enthalpy': h_liquid})
-                saturation_data['vapor'].append({'temperature': temp - 273.15, 'pressure': p_vapor, 'enthalpy': h_vapor})
-
-        p1 = {'pressure': p1_pressure, 'enthalpy': p1_enthalpy, 'temperature': p1_temp, 'density': p1_density}
-        p2 = {'pressure': p2_pressure, 'enthalpy': p2_enthalpy, 'temperature': p2_temp, 'density': p2_density}
-        p3 = {'pressure': p3_pressure, 'enthalpy': p3_enthalpy, 'temperature': p3_temp, 'density': p3_density}
-        p4 = {'pressure': p4_pressure, 'enthalpy': p4_enthalpy, 'temperature': p4_temp, 'density': p4_density}
+# Mezclas zeotrópicas con la ecuación de estado de la mezcla (HEOS con las fracciones másicas nominales). Una
+# evaluación bifásica de mezcla cuesta 10-100 veces más que la de un fluido puro, así que las curvas de burbuja y
+# rocío se tabulan una vez por mezcla cada THERMO_BLEND_STEP K, se guardan en disco (THERMO_BLEND_DIR) y se
+# interpolan; donde el error estimado de la interpolación supera THERMO_BLEND_TOLERANCE se evalúa el estado exacto.
+# Los estados monofásicos (líquido subenfriado, vapor sobrecalentado) se calculan con la fase impuesta, que evita
+# la prueba de estabilidad, y la compresión isentrópica con Newton sobre T: CoolProp no resuelve P-S en mezclas.
+# Los resultados de esos flashes exactos se guardan junto a la envolvente (ver blend_flash). Es el modelo por
+# defecto; fuera del tramo que cubre la envolvente, con THERMO_BLEND_MODEL=csv o con 'blend_model': 'csv' en la
+# petición de /thermo, las mezclas se calculan con la tabla de refrigerants.csv. Con la mezcla h y s quedan en el
+# estado de referencia de CoolProp (IIR, h=200 kJ/kg y s=1 kJ/kg·K en líquido saturado a 0°C), no en el de la
+# tabla, y el COP difiere del de la tabla.
+BLEND_COMPOSITIONS = {
+    'R-454B': {'R32': 0.689, 'R1234yf': 0.311},
+    'R-454C': {'R32': 0.215, 'R1234yf': 0.785},
+    'R-452A': {'R125': 0.59, 'R32': 0.11, 'R1234yf': 0.30},
+    'R-417A': {'R125': 0.466, 'R134a': 0.50, 'n-Butane': 0.034},
+    'R-450A': {'R134a': 0.42, 'R1234ze(E)': 0.58}
+}
+BLEND_MODELS = ('mixture', 'csv')
+BLEND_MODEL = os.environ.get('THERMO_BLEND_MODEL', 'mixture').strip().lower()
+BLEND_BACKEND = 'HEOS'
+BLEND_STEP = float(os.environ.get('THERMO_BLEND_STEP', 0.5))
+BLEND_TOLERANCE = float(os.environ.get('THERMO_BLEND_TOLERANCE', 2e-4))
+BLEND_TEMP_RANGE = (213.15, 343.15)
+BLEND_DIR = os.environ.get('THERMO_BLEND_DIR', 'blend_cache')
+BLEND_FORMAT = 1
+BLEND_SIDES = {0: ('pressure_bubble', 'h_liquid', 's_liquid', 'density_liquid'),
+               1: ('pressure_dew', 'h_vapor', 's_vapor', 'density_vapor')}
+BLEND_NEWTON_MAX_ITER = 30
+# Flashes exactos persistidos: entradas redondeadas a THERMO_BLEND_FLASH_DIGITS cifras significativas (el flash
+# se evalúa en las entradas redondeadas, así el valor guardado corresponde exactamente a su clave); se escriben al
+# disco cada THERMO_BLEND_FLASH_FLUSH flashes nuevos y al salir, hasta THERMO_BLEND_FLASH_MAX por mezcla.
+BLEND_FLASH_DIGITS = int(os.environ.get('THERMO_BLEND_FLASH_DIGITS', 10))
+BLEND_FLASH_FLUSH = int(os.environ.get('THERMO_BLEND_FLASH_FLUSH', 256))
+BLEND_FLASH_MAX = int(os.environ.get('THERMO_BLEND_FLASH_MAX', 200000))
+BLEND_FLASH_OUTPUTS = (CP.iT, CP.iP, CP.iHmass, CP.iSmass, CP.iDmass, CP.iCpmass)
 
-        logger.debug("Calculando longitudes de capilar")
-        capillary_result, mass_flow = calculate_capillary_lengths(
-            refrigerant, cooling_power, p1, p4, p1_enthalpy, p2_enthalpy, subcooling, evap_temp_c
-        )
+_blend_envelopes = {}
+_blend_lock = threading.Lock()
+blend_info = {}
+blend_stats = {'interpolated': 0, 'exact': 0, 'flash_hits': 0, 'flash_misses': 0}
+_blend_stats_lock = threading.Lock()
+_blend_flashes = {}
+_blend_flash_lock = threading.Lock()
+_blend_model = threading.local()
 
-        response = {
-            'status': 'success',
-            'refrigerant': refrigerant,
-            'evap_temp': evap_temp,
-            'cond_temp': cond_temp,
-            'superheat': superheat,
+def parse_blend_model(value):
+    """Modelo de mezclas pedido ('mixture' o 'csv'); None deja el de THERMO_BLEND_MODEL."""
+    if value is None:
+        return None
+    if not isinstance(value, str) or value.strip().lower() not in BLEND_MODELS:
+        raise ValueError(f"blend_model debe ser uno de: {', '.join(BLEND_MODELS)}")
+    return value.strip().lower()
+
+@contextlib.contextmanager
+def use_blend_model(model):
+    """Impone el modelo de mezclas en este hilo mientras dura el bloque (None: el de THERMO_BLEND_MODEL)."""
+    previous = getattr(_blend_model, 'value', None)
+    _blend_model.value = model
+    try:
+        yield
+    finally:
+        _blend_model.value = previous
+
+def current_blend_model():
+    return getattr(_blend_model, 'value', None) or BLEND_MODEL
+
+def is_mixture_blend(refrigerant):
+    return current_blend_model() == 'mixture' and refrigerant in BLEND_COMPOSITIONS
+
+def property_backend(refrigerant, backend, evap_temp=None, cond_temp=None):
+    """Origen real de las propiedades de `refrigerant`: la mezcla HEOS, la tabla 'CSV' o el backend pedido.
+
+    Con evap_temp y cond_temp (K) una mezcla se resuelve con la tabla del CSV si la envolvente no cubre el ciclo.
+    """
+    custom = refrigerant in current_data().custom
+    if is_mixture_blend(refrigerant) and (evap_temp is None or not custom or blend_covers(refrigerant, evap_temp, cond_temp)):
+        return BLEND_BACKEND
+    return 'CSV' if custom else backend
+
+def create_blend_state(refrigerant, backend):
+    components = BLEND_COMPOSITIONS[refrigerant]
+    try:
+        state = CP.AbstractState(backend, '&'.join(components))
+    except ValueError as e:
+        if 'binary pair' not in str(e):
+            raise
+        # CoolProp no trae parámetros de interacción para todos los pares (p. ej. R134a/R1234ze(E)). La regla de
+        # Lorentz-Berthelot se registra recién tras el fallo: antes, la biblioteca de pares aún no está cargada y
+        # registrarla impediría cargar los pares conocidos.
+        logger.warning("%s: pares binarios sin parámetros de interacción, se usa Lorentz-Berthelot", refrigerant)
+        for first, second in itertools.combinations(components, 2):
+            with contextlib.suppress(ValueError):
+                CP.apply_simple_mixing_rule(CP.get_fluid_param_string(first, 'CAS'),
+                                            CP.get_fluid_param_string(second, 'CAS'), 'Lorentz-Berthelot')
+        state = CP.AbstractState(backend, '&'.join(components))
+    state.set_mass_fractions(list(components.values()))
+    return state
+
+def build_blend_envelope(refrigerant):
+    """Curvas de burbuja y rocío de una mezcla en el tramo de temperaturas más largo en que CoolProp las resuelve."""
+    temps = np.arange(BLEND_TEMP_RANGE[0], BLEND_TEMP_RANGE[1] + BLEND_STEP / 2, BLEND_STEP)
+    outputs = [CP.iP, CP.iHmass, CP.iSmass, CP.iDmass]
+    table = {'temperature': temps}
+    for quality, keys in BLEND_SIDES.items():
+        values = state_props_batch(refrigerant, CP.QT_INPUTS, quality, temps, outputs, backend=BLEND_BACKEND, ignore_errors=True)
+        table.update(zip(keys, values))
+    valid = np.all([np.isfinite(values) for values in table.values()], axis=0)
+    with np.errstate(invalid='ignore'):
+        valid[1:] &= (np.diff(table['pressure_bubble']) > 0) & (np.diff(table['pressure_dew']) > 0)
+    # Cerca del punto crítico el solver de mezclas falla en algunos puntos: se conserva el tramo contiguo más largo
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], valid.astype(np.int8), [0]))))
+    starts, stops = edges[::2], edges[1::2]
+    if starts.size == 0 or (stops - starts).max() < 3:
+        raise ValueError(f"No se pudo calcular la envolvente de fases de {refrigerant}")
+    longest = np.argmax(stops - starts)
+    return {key: values[starts[longest]:stops[longest]] for key, values in table.items()}
+
+def blend_interpolation_error(table):
+    """Error relativo estimado de interpolar en cada intervalo de la tabla.
+
+    Cada nodo interior se compara con la interpolación entre sus vecinos (paso doble); con el paso real el error
+    de la interpolación lineal es del orden de la cuarta parte. La presión se interpola como ln P frente a 1/T.
+    """
+    temps = table['temperature']
+    w_log = (1 / temps[1:-1] - 1 / temps[:-2]) / (1 / temps[2:] - 1 / temps[:-2])
+    w_lin = (temps[1:-1] - temps[:-2]) / (temps[2:] - temps[:-2])
+    errors = []
+    for keys in BLEND_SIDES.values():
+        log_p = np.log(table[keys[0]])
+        errors.append(np.abs(np.expm1(log_p[:-2] + w_log * (log_p[2:] - log_p[:-2]) - log_p[1:-1])))
+        for key in keys[1:]:
+            values = table[key]
+            errors.append(np.abs((values[:-2] + w_lin * (values[2:] - values[:-2])) / values[1:-1] - 1))
+    node_error = np.max(errors, axis=0) / 4
+    padded = np.concatenate((node_error[:1], node_error, node_error[-1:]))
+    return np.maximum(padded[:-1], padded[1:])
+
+def _blend_path(refrigerant):
+    spec = [BLEND_FORMAT, BLEND_COMPOSITIONS[refrigerant], BLEND_STEP, BLEND_TEMP_RANGE, CP.get_global_param_string('version')]
+    fingerprint = hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:12]
+    return os.path.join(BLEND_DIR, f'{refrigerant}-{fingerprint}.npz')
+
+def load_blend_envelope(refrigerant):
+    started = time.perf_counter()
+    table, source = None, 'disk'
+    if BLEND_DIR:
+        with contextlib.suppress(OSError, ValueError):
+            with np.load(_blend_path(refrigerant), allow_pickle=False) as stored:
+                table = {key: stored[key] for key in stored.files}
+    if table is None:
+        source = 'built'
+        logger.info("Calculando envolvente de fases de %s (paso %s K)", refrigerant, BLEND_STEP)
+        table = build_blend_envelope(refrigerant)
+        table['error'] = blend_interpolation_error(table)
+        if BLEND_DIR:
+            try:
+                os.makedirs(BLEND_DIR, exist_ok=True)
+                tmp_path = f'{_blend_path(refrigerant)}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, **table)
+                os.replace(tmp_path, _blend_path(refrigerant))
+            except OSError as e:
+                logger.warning("No se pudo guardar la envolvente de %s: %s", refrigerant, str(e))
+    table['accurate'] = table['error'] <= BLEND_TOLERANCE
+    table['log_pressure_bubble'] = np.log(table['pressure_bubble'])
+    table['log_pressure_dew'] = np.log(table['pressure_dew'])
+    for values in table.values():
+        values.flags.writeable = False
+    blend_info[refrigerant] = {
+        'source': source,
+        'seconds': round(time.perf_counter() - started, 3),
+        'points': int(table['temperature'].size),
+        't_min': float(table['temperature'][0]),
+        't_max': float(table['temperature'][-1]),
+        'exact_intervals': int((~table['accurate']).sum()),
+        'max_error': float(table['error'].max())
+    }
+    return table
+
+def blend_envelope(refrigerant):
+    """Tabla de burbuja y rocío de la mezcla (claves del domo de saturación), del disco o calculada una vez."""
+    envelope = _blend_envelopes.get(refrigerant)
+    if envelope is None:
+        with _blend_lock:
+            envelope = _blend_envelopes.get(refrigerant)
+            if envelope is None:
+                envelope = _blend_envelopes[refrigerant] = load_blend_envelope(refrigerant)
+    return envelope
+
+def blend_covers(refrigerant, evap_temp, cond_temp):
+    """True si la envolvente cubre el ciclo: rocío a evap_temp, burbuja a cond_temp y la entrada al evaporador."""
+    envelope = blend_envelope(refrigerant)
+    temps = envelope['temperature']
+    if not temps[0] <= evap_temp < cond_temp <= temps[-1]:
+        return False
+    # La entrada al evaporador está a la temperatura de burbuja de la presión de rocío, por debajo de evap_temp
+    return np.interp(evap_temp, temps, envelope['log_pressure_dew']) >= envelope['log_pressure_bubble'][0]
+
+def _count_blend(kind):
+    with _blend_stats_lock:
+        blend_stats[kind] += 1
+
+def _blend_flash_path(refrigerant):
+    spec = [BLEND_FORMAT, BLEND_COMPOSITIONS[refrigerant], BLEND_FLASH_DIGITS, CP.get_global_param_string('version')]
+    fingerprint = hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:12]
+    return os.path.join(BLEND_DIR, f'{refrigerant}-flash-{fingerprint}.npz')
+
+def _read_blend_flashes(refrigerant):
+    """Flashes guardados de la mezcla: {(par de entradas, fase, valor1, valor2): BLEND_FLASH_OUTPUTS}."""
+    if BLEND_DIR:
+        with contextlib.suppress(OSError, ValueError, KeyError):
+            with np.load(_blend_flash_path(refrigerant), allow_pickle=False) as stored:
+                keys, values = stored['keys'].tolist(), stored['values'].tolist()
+            return {tuple(key): tuple(row) for key, row in zip(keys, values)}
+    return {}
+
+def _blend_flash_entry(refrigerant):
+    entry = _blend_flashes.get(refrigerant)
+    if entry is None:
+        with _blend_flash_lock:
+            entry = _blend_flashes.get(refrigerant)
+            if entry is None:
+                entry = _blend_flashes[refrigerant] = {'table': _read_blend_flashes(refrigerant), 'pending': 0}
+    return entry
+
+def save_blend_flashes(refrigerant=None):
+    """Escribe los flashes nuevos unidos a los del disco (otro proceso pudo agregar los suyos); reemplazo atómico."""
+    if not BLEND_DIR:
+        return
+    with _blend_flash_lock:
+        for name, entry in _blend_flashes.items():
+            if refrigerant not in (None, name) or not entry['pending']:
+                continue
+            table = _read_blend_flashes(name)
+            table.update(entry['table'])
+            table = entry['table'] = dict(itertools.islice(table.items(), BLEND_FLASH_MAX))
+            entry['pending'] = 0
+            path = _blend_flash_path(name)
+            try:
+                os.makedirs(BLEND_DIR, exist_ok=True)
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, keys=np.array(list(table), dtype=np.float64).reshape(-1, 4),
+                             values=np.array(list(table.values()), dtype=np.float64).reshape(-1, len(BLEND_FLASH_OUTPUTS)))
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning("No se pudieron guardar los flashes de %s: %s", name, str(e))
+
+atexit.register(save_blend_flashes)
+
+def _reset_blend_model_after_fork():
+    # Un proceso del pool no hereda el modelo impuesto por la petición del hilo que bifurcó ni su candado
+    global _blend_flash_lock
+    _blend_flash_lock = threading.Lock()
+    _blend_model.value = None
+
+os.register_at_fork(after_in_child=_reset_blend_model_after_fork)
+
+def blend_flash(refrigerant, input_pair, value1, value2, *outputs, phase=None):
+    """state_props de la mezcla (HEOS) con los flashes guardados en disco junto a la envolvente.
+
+    Las entradas se redondean a BLEND_FLASH_DIGITS cifras significativas y `outputs` sale de BLEND_FLASH_OUTPUTS.
+    """
+    value1, value2 = (float(f'{value:.{BLEND_FLASH_DIGITS}g}') for value in (value1, value2))
+    key = (float(input_pair), -1.0 if phase is None else float(phase), value1, value2)
+    entry = _blend_flash_entry(refrigerant)
+    values = entry['table'].get(key)
+    if values is not None:
+        _count_blend('flash_hits')
+    else:
+        _count_blend('flash_misses')
+        # cp no está definido dentro del domo
+        two_phase = input_pair in (CP.QT_INPUTS, CP.PQ_INPUTS)
+        keys = BLEND_FLASH_OUTPUTS[:-1] if two_phase else BLEND_FLASH_OUTPUTS
+        values = state_props(refrigerant, input_pair, value1, value2, *keys, backend=BLEND_BACKEND, phase=phase)
+        values += (math.nan,) if two_phase else ()
+        with _blend_flash_lock:
+            flush = False
+            if len(entry['table']) < BLEND_FLASH_MAX:
+                entry['table'][key] = values
+                entry['pending'] += 1
+                flush = entry['pending'] >= BLEND_FLASH_FLUSH
+        if flush:
+            save_blend_flashes(refrigerant)
+    if len(outputs) == 1:
+        return values[BLEND_FLASH_OUTPUTS.index(outputs[0])]
+    return tuple(values[BLEND_FLASH_OUTPUTS.index(output)] for output in outputs)
+
+def blend_saturation(refrigerant, temperature, quality):
+    """Burbuja (quality=0) o rocío (1) a la temperatura dada (K): (P, h, s, densidad) en SI."""
+    envelope = blend_envelope(refrigerant)
+    temps = envelope['temperature']
+    if not temps[0] <= temperature <= temps[-1]:
+        raise ValueError(f"Temperatura fuera de rango para {refrigerant}: [{temps[0]-273.15:.1f}°C, {temps[-1]-273.15:.1f}°C]")
+    i = min(bisect.bisect_right(temps, temperature) - 1, temps.size - 2)
+    if not envelope['accurate'][i]:
+        _count_blend('exact')
+        return blend_flash(refrigerant, CP.QT_INPUTS, quality, temperature, CP.iP, CP.iHmass, CP.iSmass, CP.iDmass)
+    _count_blend('interpolated')
+    t0, t1 = temps[i], temps[i + 1]
+    w = (temperature - t0) / (t1 - t0)
+    w_log = (1 / temperature - 1 / t0) / (1 / t1 - 1 / t0)
+    pressure_key, *keys = BLEND_SIDES[quality]
+    log_p = envelope['log_' + pressure_key]
+    return (math.exp(log_p[i] + w_log * (log_p[i + 1] - log_p[i])),
+            *(envelope[key][i] + w * (envelope[key][i + 1] - envelope[key][i]) for key in keys))
+
+def blend_saturation_temperature(refrigerant, pressure, quality):
+    """Temperatura de burbuja (quality=0) o rocío (1) a la presión dada (Pa)."""
+    envelope = blend_envelope(refrigerant)
+    pressure_key = BLEND_SIDES[quality][0]
+    log_p = envelope['log_' + pressure_key]
+    target = math.log(pressure)
+    if not log_p[0] <= target <= log_p[-1]:
+        raise ValueError(f"Presión fuera de rango para {refrigerant}: {pressure:.0f} Pa")
+    i = min(bisect.bisect_right(log_p, target) - 1, log_p.size - 2)
+    if not envelope['accurate'][i]:
+        _count_blend('exact')
+        return blend_flash(refrigerant, CP.PQ_INPUTS, pressure, quality, CP.iT)
+    _count_blend('interpolated')
+    temps = envelope['temperature']
+    w = (target - log_p[i]) / (log_p[i + 1] - log_p[i])
+    return 1 / (1 / temps[i] + w * (1 / temps[i + 1] - 1 / temps[i]))
+
+def blend_glide(refrigerant, p_evap, p_cond):
+    """Deslizamiento de temperatura (K, rocío menos burbuja a presión constante) en evaporador y condensador."""
+    glide = {}
+    for name, pressure in (('evaporator', p_evap), ('condenser', p_cond)):
+        try:
+            glide[name] = (blend_saturation_temperature(refrigerant, pressure, 1)
+                           - blend_saturation_temperature(refrigerant, pressure, 0))
+        except ValueError:
+            glide[name] = None
+    return glide
+
+def blend_isentropic_state(refrigerant, pressure, entropy, temperature, t_floor):
+    """Vapor a `pressure` con entropía `entropy`: Newton sobre T con ds/dT = cp/T; devuelve (T, h, densidad)."""
+    for _ in range(BLEND_NEWTON_MAX_ITER):
+        s, cp, h, rho = blend_flash(refrigerant, CP.PT_INPUTS, pressure, temperature, CP.iSmass, CP.iCpmass,
+                                    CP.iHmass, CP.iDmass, phase=CP.iphase_gas)
+        step = (s - entropy) * temperature / cp
+        if abs(step) < 1e-6:
+            return temperature, h, rho
+        temperature = max(temperature - step, t_floor)
+    raise ValueError(f"La compresión isentrópica de {refrigerant} no convergió")
+
+def calculate_cycle_blend(refrigerant, evap_temp, cond_temp, superheat, subcooling, cache=None):
+    """Ciclo de una mezcla zeotrópica con su ecuación de estado.
+
+    Como con la tabla del CSV, evap_temp es la temperatura de rocío del evaporador y cond_temp la de burbuja del
+    condensador; la entrada al evaporador queda por debajo de evap_temp según el deslizamiento.
+    """
+    logger.debug("Procesando mezcla HEOS: %s", refrigerant)
+    backend = BLEND_BACKEND
+    evap = _memo(cache, node_key('psat_evap', refrigerant=refrigerant, backend=backend, evap_temp=evap_temp),
+                 lambda: blend_saturation(refrigerant, evap_temp, 1))
+    cond = _memo(cache, node_key('psat_cond', refrigerant=refrigerant, backend=backend, cond_temp=cond_temp),
+                 lambda: blend_saturation(refrigerant, cond_temp, 0))
+    p_evap, h_dew, s_dew, rho_dew = evap
+    p_cond = cond[0]
+
+    def point4():
+        if subcooling == 0:
+            return p_cond, cond[1], cond_temp, cond[3]
+        p4_temp = cond_temp - subcooling
+        p4_enthalpy, p4_density = blend_flash(refrigerant, CP.PT_INPUTS, p_cond, p4_temp, CP.iHmass, CP.iDmass,
+                                              phase=CP.iphase_liquid)
+        return p_cond, p4_enthalpy, p4_temp, p4_density
+    p4_pressure, p4_enthalpy, p4_temp, p4_density = _memo(
+        cache, node_key('p4', refrigerant=refrigerant, backend=backend, cond_temp=cond_temp, subcooling=subcooling), point4)
+
+    def point1():
+        # Entrada bifásica: título por entalpía entre burbuja y rocío de la isobara; la temperatura se interpola
+        # con ese título y la densidad es la homogénea
+        t_bubble = blend_saturation_temperature(refrigerant, p_evap, 0)
+        _, h_bubble, _, rho_bubble = blend_saturation(refrigerant, t_bubble, 0)
+        quality = min(max((p4_enthalpy - h_bubble) / (h_dew - h_bubble), 0.0), 1.0)
+        p1_temp = t_bubble + quality * (evap_temp - t_bubble)
+        return p_evap, p1_temp, 1 / (quality / rho_dew + (1 - quality) / rho_bubble)
+    # A diferencia de un fluido puro, el punto 1 depende de la entalpía de p4
+    p1_pressure, p1_temp, p1_density = _memo(cache, node_key('p1_blend', refrigerant=refrigerant, backend=backend, evap_temp=evap_temp,
+                                                             cond_temp=cond_temp, subcooling=subcooling), point1)
+    p1_enthalpy = p4_enthalpy
+
+    def point2():
+        if superheat == 0:
+            return p_evap, h_dew, evap_temp, rho_dew, s_dew
+        p2_temp = evap_temp + superheat
+        p2_enthalpy, p2_density, s2 = blend_flash(refrigerant, CP.PT_INPUTS, p_evap, p2_temp, CP.iHmass, CP.iDmass,
+                                                  CP.iSmass, phase=CP.iphase_gas)
+        return p_evap, p2_enthalpy, p2_temp, p2_density, s2
+    p2_pressure, p2_enthalpy, p2_temp, p2_density, s2 = _memo(
+        cache, node_key('p2', refrigerant=refrigerant, backend=backend, evap_temp=evap_temp, superheat=superheat), point2)
+
+    def point3():
+        try:
+            t_dew = blend_saturation_temperature(refrigerant, p_cond, 1)
+            p3_temp, p3_enthalpy, p3_density = blend_isentropic_state(
+                refrigerant, p_cond, s2, t_dew + (p2_temp - evap_temp) + 20, t_dew)
+        except ValueError as e:
+            logger.warning("Cálculo isentrópico fallido: %s. Usando aproximación.", str(e))
+            cop_real = evap_temp / (cond_temp - evap_temp) * 0.75
+            p3_enthalpy = p2_enthalpy + (p2_enthalpy - p4_enthalpy) / cop_real
+            p3_temp = cond_temp + 10
+            p3_density = blend_flash(refrigerant, CP.PT_INPUTS, p_cond, p3_temp, CP.iDmass, phase=CP.iphase_gas)
+        return p_cond, p3_enthalpy, p3_temp, p3_density
+    p3_pressure, p3_enthalpy, p3_temp, p3_density = _memo(
+        cache, node_key('p3', refrigerant=refrigerant, backend=backend, evap_temp=evap_temp, cond_temp=cond_temp,
+                        superheat=superheat, subcooling=subcooling), point3)
+
+    return {
+        '1': {'pressure': p1_pressure, 'enthalpy': p1_enthalpy, 'temperature': p1_temp, 'density': p1_density},
+        '2': {'pressure': p2_pressure, 'enthalpy': p2_enthalpy, 'temperature': p2_temp, 'density': p2_density},
+        '3': {'pressure': p3_pressure, 'enthalpy': p3_enthalpy, 'temperature': p3_temp, 'density': p3_density},
+        '4': {'pressure': p4_pressure, 'enthalpy': p4_enthalpy, 'temperature': p4_temp, 'density': p4_density}
+    }
+
+def calculate_cycle(refrigerant, evap_temp, cond_temp, superheat, subcooling, backend='HEOS', cache=None):
+    """Puntos 1-4 del ciclo y COP. `cache` (dict) reutiliza estados repetidos entre llamadas, p. ej. en un barrido."""
+    source = property_backend(refrigerant, backend, evap_temp, cond_temp)
+    if source == BLEND_BACKEND and is_mixture_blend(refrigerant):
+        points = calculate_cycle_blend(refrigerant, evap_temp, cond_temp, superheat, subcooling, cache)
+    elif source == 'CSV':
+        points = calculate_cycle_custom(refrigerant, evap_temp, cond_temp, superheat, subcooling, cache)
+    else:
+        points = calculate_cycle_coolprop(refrigerant, evap_temp, cond_temp, superheat, subcooling, backend, cache)
+    q_evap = points['2']['enthalpy'] - points['1']['enthalpy']
+    w_comp = points['3']['enthalpy'] - points['2']['enthalpy']
+    cop = q_evap / w_comp if w_comp != 0 else 0
+    logger.debug("COP calculado: %s, q_evap=%s, w_comp=%s", cop, q_evap, w_comp)
+    return points, cop
+
+# Domo de saturación: se calcula una vez por refrigerante y cada petición lo remuestrea en su ventana
+SATURATION_DOME_POINTS = int(os.environ.get('THERMO_DOME_POINTS', 1000))
+SATURATION_DOME_CACHE_SIZE = int(os.environ.get('THERMO_DOME_CACHE_SIZE', 32))
+SATURATION_DOME_KEYS = ['pressure_bubble', 'pressure_dew', 'h_liquid', 'h_vapor',
+                        's_liquid', 's_vapor', 'density_liquid', 'density_vapor']
+
+@functools.lru_cache(maxsize=SATURATION_DOME_CACHE_SIZE)
+def _build_saturation_dome(refrigerant, backend, version=None):
+    # version (la de los datos, solo para los refrigerantes de los CSV) separa los domos de cada carga de datos
+    if backend == 'CSV':
+        entry = current_data().index.get(refrigerant)
+        if entry is None:
+            raise ValueError(f"Refrigerante {refrigerant} no encontrado en refrigerants.csv")
+        scales = {key: scale for key, _, scale, _ in CSV_PROPERTY_COLUMNS}
+        dome = {'temperature': entry['temperature'] + 273.15}
+        dome.update({key: entry[key] * scales[key] for key in SATURATION_DOME_KEYS})
+    else:
+        logger.info("Calculando domo de saturación de %s (%s, %s puntos)", refrigerant, backend, SATURATION_DOME_POINTS)
+        t_min, t_max = get_temperature_limits(refrigerant, backend)
+        temps = np.linspace(t_min, t_max, SATURATION_DOME_POINTS)
+        outputs = [CP.iP, CP.iHmass, CP.iSmass, CP.iDmass]
+        p_l, h_l, s_l, d_l = state_props_batch(refrigerant, CP.QT_INPUTS, 0, temps, outputs, backend=backend, ignore_errors=True)
+        p_v, h_v, s_v, d_v = state_props_batch(refrigerant, CP.QT_INPUTS, 1, temps, outputs, backend=backend, ignore_errors=True)
+        dome = {'temperature': temps, 'pressure_bubble': p_l, 'pressure_dew': p_v, 'h_liquid': h_l, 'h_vapor': h_v,
+                's_liquid': s_l, 's_vapor': s_v, 'density_liquid': d_l, 'density_vapor': d_v}
+        valid = np.all([~np.isnan(values) for values in dome.values()], axis=0)
+        if not valid.any():
+            raise ValueError(f"No se pudo calcular la saturación de {refrigerant}")
+        dome = {key: values[valid] for key, values in dome.items()}
+    for values in dome.values():
+        values.flags.writeable = False
+    return dome
+
+def get_saturation_dome(refrigerant, backend='HEOS'):
+    """Domo de saturación denso (T en K, propiedades en SI) como arreglos de solo lectura, en caché LRU.
+
+    backend='CSV' fuerza la tabla de refrigerants.csv para una mezcla que también tiene envolvente.
+    """
+    if backend != 'CSV' and is_mixture_blend(refrigerant):
+        return blend_envelope(refrigerant)
+    store = current_data()
+    if refrigerant in store.custom:
+        return _build_saturation_dome(refrigerant, 'CSV', store.version)
+    return _build_saturation_dome(refrigerant, backend)
+
+def sample_saturation_dome(dome, temps):
+    """Interpola linealmente el domo en las temperaturas dadas (K)."""
+    return {key: np.interp(temps, dome['temperature'], dome[key]) for key in SATURATION_DOME_KEYS}
+
+def calculate_saturation_curve(refrigerant, evap_temp, cond_temp, backend='HEOS', num_points=50):
+    """Curva de saturación (líquido y vapor) en una ventana alrededor de las temperaturas del ciclo."""
+    dome = get_saturation_dome(refrigerant, backend)
+    temp_range = (cond_temp - evap_temp) * 1.5
+    temp_min = evap_temp - temp_range * 0.25
+    temp_max = cond_temp + temp_range * 0.25
+    temp_step = (temp_max - temp_min) / (num_points - 1)
+    temps = temp_min + np.arange(num_points) * temp_step
+    temps = temps[(temps >= dome['temperature'][0]) & (temps <= dome['temperature'][-1])]
+    props = sample_saturation_dome(dome, temps)
+    saturation_data = {'liquid': [], 'vapor': []}
+    for temp, p_liquid, h_liquid, p_vapor, h_vapor in zip(
+            (temps - 273.15).tolist(), props['pressure_bubble'].tolist(), props['h_liquid'].tolist(),
+            props['pressure_dew'].tolist(), props['h_vapor'].tolist()):
+        saturation_data['liquid'].append({'temperature': temp, 'pressure': p_liquid, 'enthalpy': h_liquid})
+        saturation_data['vapor'].append({'temperature': temp, 'pressure': p_vapor, 'enthalpy': h_vapor})
+    return saturation_data
+
+# Grafo de dependencias de /thermo. Cada nodo se memoiza con la clave (nodo, *entradas) y solo depende de las
+# entradas listadas (directamente o a través de los nodos anteriores), así que al editar un campo solo se
+# recalculan los nodos aguas abajo: cambiar cooling_power reutiliza todos los estados y recalcula solo el capilar.
+# Las claves se construyen con node_key a partir de este grafo, así que no pueden divergir de él. Los nodos que leen
+# refrigerants.csv llevan data_version (la versión de los CSV): una petición que aún calcula con los datos anteriores
+# a una recarga no deja en la caché valores que luego lea otra con los nuevos.
+CYCLE_GRAPH = {
+    'limits': ('refrigerant', 'backend'),
+    'psat_evap': ('refrigerant', 'backend', 'evap_temp'),
+    'psat_cond': ('refrigerant', 'backend', 'cond_temp'),
+    'csv': ('refrigerant', 'data_version', 'temperature'),
+    'p4': ('refrigerant', 'backend', 'cond_temp', 'subcooling'),
+    'p1': ('refrigerant', 'backend', 'evap_temp'),
+    # En una mezcla la temperatura de entrada al evaporador depende de la entalpía de p4
+    'p1_blend': ('refrigerant', 'backend', 'evap_temp', 'cond_temp', 'subcooling'),
+    'p2': ('refrigerant', 'backend', 'evap_temp', 'superheat'),
+    'p3': ('refrigerant', 'backend', 'evap_temp', 'cond_temp', 'superheat', 'subcooling'),
+    # Estado de p4 (temperatura, presión y si es líquido saturado); data_version solo para los refrigerantes del CSV
+    'rho4': ('refrigerant', 'backend', 'data_version', 'p4_temperature', 'p4_pressure', 'saturated'),
+    'capillary': ('refrigerant', 'backend', 'data_version', 'evap_temp', 'cond_temp', 'superheat', 'subcooling',
+                  'cooling_power', 'diameters', 'target_length'),
+    'saturation': ('refrigerant', 'backend', 'data_version', 'evap_temp', 'cond_temp')
+}
+NODE_CACHE_SIZE = int(os.environ.get('THERMO_NODE_CACHE_SIZE', 4096))
+
+def node_key(node, **inputs):
+    """Clave de memo (nodo, *entradas en el orden de CYCLE_GRAPH); falla si falta o sobra alguna entrada."""
+    names = CYCLE_GRAPH[node]
+    if inputs.keys() != set(names):
+        raise KeyError(f"Entradas del nodo {node}: {sorted(inputs)} en lugar de {list(names)}")
+    return (node, *(inputs[name] for name in names))
+
+class CycleEvaluation:
+    """Memo de nodos de una evaluación, respaldado por la caché compartida de nodos (node_cache).
+
+    Se pasa como `cache` a calculate_cycle y calculate_capillary_lengths; registra qué nodos se reutilizaron
+    de evaluaciones anteriores y cuáles se calcularon.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.values = {}
+        self.reused = []
+        self.computed = []
+
+    def __contains__(self, key):
+        if key in self.values:
+            return True
+        value = self.store.get(key) if self.store is not None else None
+        if value is None:
+            return False
+        self.values[key] = value
+        self.reused.append(key[0])
+        return True
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __setitem__(self, key, value):
+        self.values[key] = value
+        if self.store is not None:
+            self.store.put(key, value)
+        self.computed.append(key[0])
+
+    def report(self):
+        """Nombres de nodo reutilizados y calculados, sin repetir y en orden del grafo."""
+        return {kind: [node for node in CYCLE_GRAPH if node in names]
+                for kind, names in (('reused', set(self.reused)), ('computed', set(self.computed)))}
+
+def compute_thermo(data, evaluation=None):
+    """Calcula el ciclo y el capilar para un payload de /thermo; devuelve (cuerpo, código HTTP).
+
+    `evaluation` (CycleEvaluation) permite consultar después qué nodos del grafo se reutilizaron. 'blend_model'
+    ('mixture' o 'csv') elige para esta petición el modelo de las mezclas en vez de THERMO_BLEND_MODEL.
+    """
+    try:
+        blend_model = parse_blend_model(data.get('blend_model'))
+    except (TypeError, ValueError) as e:
+        logger.error("Datos de entrada inválidos: %s", str(e))
+        return {'status': 'error', 'message': str(e)}, 400
+    with use_blend_model(blend_model):
+        return _compute_thermo(data, evaluation)
+
+def _compute_thermo(data, evaluation):
+    try:
+        refrigerant = data.get('refrigerant', 'R134a')
+        evap_temp = finite_float(data.get('evap_temp', 243.15))
+        cond_temp = finite_float(data.get('cond_temp', 313.15))
+        superheat = finite_float(data.get('superheat', 0))
+        subcooling = finite_float(data.get('subcooling', 0))
+        cooling_power = parse_cooling_power(data.get('cooling_power', {'value': 1000, 'unit': 'W'}))
+        backend = resolve_backend(data.get('backend'))
+        include_saturation = bool(data.get('include_saturation', True))
+        diameters = parse_diameter_catalog(data['diameters_mm']) if 'diameters_mm' in data else DEFAULT_DIAMETERS
+        target_length = finite_float(data.get('target_length_m', CAPILLARY_TARGET_LENGTH))
+        if target_length <= 0:
+            raise ValueError("target_length_m debe ser positivo")
+        logger.debug("Parámetros: refrigerant=%s, evap_temp=%s, cond_temp=%s, superheat=%s, subcooling=%s, cooling_power=%s",
+                     refrigerant, evap_temp, cond_temp, superheat, subcooling, cooling_power)
+    except (TypeError, ValueError) as e:
+        logger.error("Datos de entrada inválidos: %s", str(e), exc_info=True)
+        return {'status': 'error', 'message': 'Datos de entrada inválidos'}, 400
+
+    error = validate_operating_point(evap_temp, cond_temp, superheat, subcooling, cooling_power['value'])
+    if error:
+        return {'status': 'error', 'message': error}, 400
+
+    store = current_data()
+    evap_temp_c = evap_temp - 273.15
+    cache = evaluation if evaluation is not None else CycleEvaluation(node_cache)
+
+    set_metrics_refrigerant(refrigerant)
+    try:
+        with stage('cycle'):
+            source = property_backend(refrigerant, backend, evap_temp, cond_temp)
+            points, cop = calculate_cycle(refrigerant, evap_temp, cond_temp, superheat, subcooling, backend, cache)
+
+        logger.debug("Calculando longitudes de capilar")
+        with stage('capillary'):
+            capillary_key = node_key('capillary', refrigerant=refrigerant, backend=source, data_version=store.version,
+                                     evap_temp=evap_temp, cond_temp=cond_temp, superheat=superheat, subcooling=subcooling,
+                                     cooling_power=(cooling_power['value'], cooling_power['unit']),
+                                     diameters=tuple(np.asarray(diameters).tolist()), target_length=target_length)
+            capillary_result, mass_flow = _memo(cache, capillary_key, lambda: calculate_capillary_lengths(
+                refrigerant, cooling_power, points['1'], points['4'], points['1']['enthalpy'], points['2']['enthalpy'],
+                subcooling, evap_temp_c, source, cache, diameters=diameters, target_length=target_length
+            ))
+
+        response = {
+            'status': 'success',
+            'refrigerant': refrigerant,
+            'evap_temp': evap_temp,
+            'cond_temp': cond_temp,
+            'superheat': superheat,
             'subcooling': subcooling,
+            'backend': source,
             'cop': cop,
             'mass_flow': mass_flow,
-            'points': {
-                '1': p1,
-                '2': p2,
-                '3': p3,
-                '4': p4
-            },
-            'saturation': saturation_data,
+            'points': points,
             'capillary': capillary_result
         }
-        logger.debug("Respuesta enviada al frontend: %s", response)
-        return jsonify(response)
+        if source == BLEND_BACKEND and is_mixture_blend(refrigerant):
+            response['glide'] = blend_glide(refrigerant, points['1']['pressure'], points['4']['pressure'])
+        if include_saturation:
+            with stage('saturation'):
+                saturation_key = node_key('saturation', refrigerant=refrigerant, backend=source, data_version=store.version,
+                                          evap_temp=evap_temp, cond_temp=cond_temp)
+                response['saturation'] = _memo(cache, saturation_key,
+                                               lambda: calculate_saturation_curve(refrigerant, evap_temp, cond_temp, source))
+        return response, 200
 
+    except CalculationTimeout:
+        raise
     except Exception as e:
         logger.error("Error en cálculo termo: %s", str(e), exc_info=True)
+        return {'status': 'error', 'message': str(e)}, 500
+
+# Caché de resultados de /thermo: entradas cuantizadas, LRU con TTL, ETag derivado de la clave. /thermo y /live
+# calculan con las entradas cuantizadas (temperaturas, sobrecalentamiento y subenfriamiento redondeados a
+# THERMO_CACHE_QUANTUM K) para que cada entrada de la caché corresponda exactamente a su clave: la respuesta trae
+# los valores evaluados en evap_temp, cond_temp, superheat y subcooling, y el paso en 'input_quantum'.
+RESULT_CACHE_SIZE = int(os.environ.get('THERMO_CACHE_SIZE', 1024))
+RESULT_CACHE_TTL = float(os.environ.get('THERMO_CACHE_TTL', 300))
+RESULT_CACHE_QUANTUM = float(os.environ.get('THERMO_CACHE_QUANTUM', 0.1))
+
+class ResultCache:
+    """LRU con expiración por TTL y contadores de aciertos, fallos y desalojos; seguro entre hilos."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'ttl': self.ttl, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions, 'expirations': self.expirations}
+
+thermo_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+node_cache = ResultCache(NODE_CACHE_SIZE, RESULT_CACHE_TTL)
+def data_version():
+    """Versión (huella del contenido de los CSV) de los datos fijados por la petición; entra en las claves de caché."""
+    return current_data().version
+
+def quantize(value):
+    return round(round(value / RESULT_CACHE_QUANTUM) * RESULT_CACHE_QUANTUM, 9)
+
+def normalize_thermo_request(data):
+    """Cuantiza las entradas de /thermo y devuelve (payload normalizado, clave de caché)."""
+    normalized = dict(data)
+    normalized['refrigerant'] = data.get('refrigerant', 'R134a')
+    normalized['evap_temp'] = quantize(finite_float(data.get('evap_temp', 243.15)) - 273.15) + 273.15
+    normalized['cond_temp'] = quantize(finite_float(data.get('cond_temp', 313.15)) - 273.15) + 273.15
+    normalized['superheat'] = quantize(finite_float(data.get('superheat', 0)))
+    normalized['subcooling'] = quantize(finite_float(data.get('subcooling', 0)))
+    cooling_power = parse_cooling_power(data.get('cooling_power', {'value': 1000, 'unit': 'W'}))
+    normalized['cooling_power'] = {'value': round(cooling_power['value'], 6), 'unit': cooling_power['unit']}
+    key = (
+        normalized['refrigerant'], resolve_backend(data.get('backend')),
+        normalized['evap_temp'], normalized['cond_temp'], normalized['superheat'], normalized['subcooling'],
+        normalized['cooling_power']['value'], normalized['cooling_power']['unit'],
+        bool(data.get('include_saturation', True)),
+        tuple(float(d) for d in data['diameters_mm']) if 'diameters_mm' in data else None,
+        finite_float(data.get('target_length_m', CAPILLARY_TARGET_LENGTH)),
+        parse_blend_model(data.get('blend_model')) or BLEND_MODEL,
+        data_version()
+    )
+    return normalized, key
+
+def thermo_etag(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+# Formatos de respuesta de /thermo, negociados con ?format= o con Accept:
+#   json          forma clásica (listas de objetos)
+#   columnar      saturación y capilar como arreglos por columna
+#   columnar-f32  columnas en float32 little-endian codificadas en base64 (directo a Float32Array)
+#   msgpack       columnas float32 como binario MessagePack
+# Los escalares y los puntos del ciclo siguen en float64 y los diámetros del catálogo se envían exactos.
+# orjson, msgpack y brotli son opcionales: sin ellos se usa json, no se ofrece msgpack y se comprime con gzip.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+THERMO_FORMATS = {
+    'json': 'application/json',
+    'columnar': 'application/vnd.thermo.columnar+json',
+    'columnar-f32': 'application/vnd.thermo.columnar-f32+json',
+    'msgpack': 'application/msgpack'
+}
+COMPRESS_MIN_BYTES = int(os.environ.get('THERMO_COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.environ.get('THERMO_GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('THERMO_BROTLI_QUALITY', 5))
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON con orjson cuando está instalado; mismas claves ordenadas que el proveedor por defecto."""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+
+app.json = FastJSONProvider(app)
+
+def encode_column(values, encoding):
+    """Columna numérica: lista JSON (NaN -> null), float32 en base64 ('base64') o float32 en bytes ('binary')."""
+    if encoding == 'list':
+        return [None if isinstance(value, float) and math.isnan(value) else value for value in values]
+    data = np.asarray(values, dtype='<f4').tobytes()
+    return {'dtype': 'float32', 'data': base64.b64encode(data).decode('ascii') if encoding == 'base64' else data}
+
+def to_columnar(response, encoding='list'):
+    """Reescribe la saturación y la tabla de capilares de una respuesta de compute_thermo como columnas."""
+    body = {key: value for key, value in response.items() if key not in ('saturation', 'capillary')}
+    capillary = response['capillary']
+    rows = capillary['capillary_lengths']
+    body['capillary'] = {
+        'winner': capillary['winner'],
+        'target_length_m': capillary['target_length_m'],
+        'required_diameter_mm': capillary['required_diameter_mm'],
+        'diameter_mm': [row['diameter_mm'] for row in rows],
+        'length_m': encode_column([row['length_m'] if isinstance(row['length_m'], float) else math.nan for row in rows], encoding)
+    }
+    if 'saturation' in response:
+        liquid, vapor = response['saturation']['liquid'], response['saturation']['vapor']
+        body['saturation'] = {
+            'temperature': encode_column([point['temperature'] for point in liquid], encoding),
+            'liquid': {key: encode_column([point[key] for point in liquid], encoding) for key in ('pressure', 'enthalpy')},
+            'vapor': {key: encode_column([point[key] for point in vapor], encoding) for key in ('pressure', 'enthalpy')}
+        }
+    return body
+
+def encode_thermo_body(response, fmt):
+    """Serializa una respuesta exitosa de /thermo en el formato pedido; devuelve bytes."""
+    if fmt == 'json':
+        return app.json.dumps(response).encode('utf-8')
+    if fmt == 'msgpack':
+        return msgpack.packb(dict(to_columnar(response, 'binary'), format=fmt), use_bin_type=True)
+    columnar = to_columnar(response, 'base64' if fmt == 'columnar-f32' else 'list')
+    return app.json.dumps(dict(columnar, format=fmt)).encode('utf-8')
+
+def negotiate_thermo_format():
+    """Formato de /thermo pedido con ?format= o, si falta, con Accept; ValueError si no está disponible."""
+    available = [fmt for fmt in THERMO_FORMATS if fmt != 'msgpack' or msgpack is not None]
+    fmt = request.args.get('format')
+    if fmt is None:
+        best = request.accept_mimetypes.best_match([THERMO_FORMATS[fmt] for fmt in available], default='application/json')
+        return next(fmt for fmt in available if THERMO_FORMATS[fmt] == best)
+    if fmt not in available:
+        raise ValueError(f"Formato no disponible: {fmt}. Opciones: {', '.join(available)}")
+    return fmt
+
+def negotiate_content_encoding():
+    if brotli is not None and request.accept_encodings['br']:
+        return 'br'
+    if request.accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+def compress_body(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
+
+@app.after_request
+def compress_response(response):
+    """Comprime las respuestas JSON grandes (p. ej. /saturation) si el cliente acepta gzip o brotli."""
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype != 'application/json' or response.content_length is None
+            or response.content_length < COMPRESS_MIN_BYTES):
+        return response
+    encoding = negotiate_content_encoding()
+    if encoding is not None:
+        response.set_data(compress_body(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+    return response
+
+@app.route('/thermo', methods=['POST'])
+def get_thermo_properties():
+    data = request.get_json()
+    logger.info("Request received for /thermo")
+    log_payload("Datos de /thermo: %s", data)
+    started = time.perf_counter()
+    try:
+        data, key = normalize_thermo_request(data)
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        logger.error("Datos de entrada inválidos: %s", str(e))
+        return jsonify({'status': 'error', 'message': 'Datos de entrada inválidos'}), 400
+
+    try:
+        fmt = negotiate_thermo_format()
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 406
+    encoding = negotiate_content_encoding()
+    # Cada representación (formato + compresión) tiene su propio ETag y su propia entrada de caché
+    representation = (key, fmt, encoding)
+    etag = '-'.join(filter(None, [thermo_etag(key), fmt, encoding]))
+    headers = {'ETag': f'"{etag}"', 'Vary': 'Accept, Accept-Encoding'}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+
+    body = thermo_cache.get(representation)
+    cache_status = 'HIT'
+    if body is None:
+        cache_status = 'MISS'
+        evaluation = CycleEvaluation(node_cache)
+        response, status_code = run_bounded(compute_thermo, data, evaluation)
+        log_payload("Respuesta enviada al frontend: %s", response, time.perf_counter() - started)
+        if status_code != 200:
+            return jsonify(response), status_code
+        response['input_quantum'] = RESULT_CACHE_QUANTUM
+        nodes = evaluation.report()
+        headers['X-Nodes-Reused'] = ','.join(nodes['reused'])
+        headers['X-Nodes-Computed'] = ','.join(nodes['computed'])
+        with stage('serialize'):
+            body = encode_thermo_body(response, fmt)
+        if encoding is not None:
+            with stage('compress'):
+                body = compress_body(body, encoding)
+        thermo_cache.put(representation, body)
+    headers['X-Cache'] = cache_status
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return Response(body, mimetype=THERMO_FORMATS[fmt], headers=headers)
+
+# Canal en vivo (Server-Sent Events) para interfaces con deslizadores: el cliente mantiene abierto GET /live,
+# recibe su sesión y publica cada edición en POST /live/<sesión> con una secuencia creciente. Las ediciones que
+# llegan mientras se calcula se fusionan: solo se calcula el último estado pendiente y los intermedios se
+# descartan sin tocar el motor de propiedades. Cada resultado sale como evento 'result' con id = secuencia.
+# Las sesiones viven en el proceso que atiende el stream: con varios workers sin afinidad el POST puede caer en
+# otro proceso y responde 404, y el cliente vuelve a POST /thermo.
+LIVE_MAX_SESSIONS = int(os.environ.get('THERMO_LIVE_MAX_SESSIONS', 64))
+LIVE_HEARTBEAT = float(os.environ.get('THERMO_LIVE_HEARTBEAT', 15))
+LIVE_IDLE_TIMEOUT = float(os.environ.get('THERMO_LIVE_IDLE_TIMEOUT', 600))
+LIVE_COALESCE_MS = float(os.environ.get('THERMO_LIVE_COALESCE_MS', 10))
+
+class LiveSession:
+    """Último estado pendiente de un cliente del canal en vivo."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.condition = threading.Condition()
+        self.pending = None
+        self.last_seq = None
+
+    def submit(self, seq, params):
+        """Registra una edición; devuelve False si llega tarde (secuencia no mayor que la última aceptada)."""
+        with self.condition:
+            if self.last_seq is not None and seq <= self.last_seq:
+                return False
+            if self.pending is not None:
+                with _live_lock:
+                    live_stats['superseded'] += 1
+            self.last_seq = seq
+            self.pending = (seq, params)
+            self.condition.notify()
+            return True
+
+    def take(self, timeout):
+        """Espera una edición y devuelve (secuencia, parámetros) del estado más reciente, o None tras `timeout`."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.pending is not None, timeout):
+                return None
+        # Breve ventana para absorber el resto de la ráfaga antes de calcular
+        if LIVE_COALESCE_MS > 0:
+            time.sleep(LIVE_COALESCE_MS / 1000)
+        with self.condition:
+            update, self.pending = self.pending, None
+            return update
+
+live_sessions = {}
+live_stats = {'opened': 0, 'computed': 0, 'superseded': 0}
+_live_lock = threading.Lock()
+
+def sse_event(event, data, event_id=None):
+    lines = [f'event: {event}'] + ([f'id: {event_id}'] if event_id is not None else [])
+    lines += [f'data: {line}' for line in data.splitlines()]
+    return '\n'.join(lines) + '\n\n'
+
+def compute_live_body(params):
+    """Cuerpo columnar de /thermo para un estado del canal en vivo; comparte la caché de resultados con /thermo."""
+    try:
+        data, key = normalize_thermo_request(params)
+    except (TypeError, ValueError, KeyError, AttributeError):
+        return app.json.dumps({'status': 'error', 'message': 'Datos de entrada inválidos'})
+    representation = (key, 'columnar', None)
+    body = thermo_cache.get(representation)
+    if body is None:
+        try:
+            response, status_code = run_bounded(compute_thermo, data)
+        except ServerBusy:
+            return app.json.dumps({'status': 'error', 'message': 'Servidor saturado, reintente en unos segundos'})
+        except CalculationTimeout as e:
+            with _heavy_executor_lock:
+                executor_stats['timeouts'] += 1
+            return app.json.dumps({'status': 'error', 'message': str(e)})
+        with _live_lock:
+            live_stats['computed'] += 1
+        if status_code != 200:
+            return app.json.dumps(response)
+        response['input_quantum'] = RESULT_CACHE_QUANTUM
+        body = encode_thermo_body(response, 'columnar')
+        thermo_cache.put(representation, body)
+    return body.decode('utf-8')
+
+def iter_live_events(session):
+    try:
+        yield sse_event('session', json.dumps({'session': session.id, 'heartbeat_s': LIVE_HEARTBEAT}))
+        idle_since = time.monotonic()
+        while True:
+            update = session.take(LIVE_HEARTBEAT)
+            if update is None:
+                if time.monotonic() - idle_since > LIVE_IDLE_TIMEOUT:
+                    yield sse_event('close', json.dumps({'reason': 'idle'}))
+                    return
+                # Comentario SSE: mantiene viva la conexión y detecta clientes desconectados
+                yield ': ping\n\n'
+                continue
+            idle_since = time.monotonic()
+            seq, params = update
+            # El canal dura lo que la sesión: cada actualización se calcula con los datos vigentes en ese momento
+            refresh_data_store()
+            _pinned_data.store = data_store
+            yield sse_event('result', compute_live_body(params), seq)
+    finally:
+        with _live_lock:
+            live_sessions.pop(session.id, None)
+        logger.info("Canal en vivo cerrado: %s", session.id)
+
+@app.route('/live', methods=['GET'])
+def open_live_channel():
+    with _live_lock:
+        if len(live_sessions) >= LIVE_MAX_SESSIONS:
+            raise ServerBusy()
+        session = LiveSession()
+        live_sessions[session.id] = session
+        live_stats['opened'] += 1
+    logger.info("Canal en vivo abierto: %s", session.id)
+    return Response(stream_with_context(iter_live_events(session)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/live/<session_id>', methods=['POST'])
+def post_live_update(session_id):
+    session = live_sessions.get(session_id)
+    if session is None:
+        return jsonify({'status': 'error', 'message': 'Sesión en vivo desconocida en este proceso'}), 404
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('params'), dict):
+        return jsonify({'status': 'error', 'message': 'Se espera {"seq": n, "params": {...}}'}), 400
+    try:
+        seq = int(data['seq'])
+    except (TypeError, ValueError, KeyError):
+        return jsonify({'status': 'error', 'message': 'seq debe ser un entero'}), 400
+    if not session.submit(seq, data['params']):
+        return jsonify({'status': 'error', 'message': 'Secuencia obsoleta', 'seq': seq, 'last_seq': session.last_seq}), 409
+    return jsonify({'status': 'success', 'seq': seq}), 202
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    lines = []
+    for histogram in (endpoint_latency, refrigerant_latency, stage_latency):
+        lines.extend(histogram.render())
+    lines += ['# HELP thermo_property_calls_total Llamadas al motor de propiedades', '# TYPE thermo_property_calls_total counter']
+    with _property_calls_lock:
+        lines += [f'thermo_property_calls_total{{endpoint="{endpoint}"}} {count}' for endpoint, count in sorted(property_calls_total.items())]
+
+    cache = thermo_cache.stats()
+    nodes = node_cache.stats()
+    dome = _build_saturation_dome.cache_info()
+    gauges = [
+        ('thermo_result_cache_entries', 'gauge', cache['size']),
+        ('thermo_result_cache_hits_total', 'counter', cache['hits']),
+        ('thermo_result_cache_misses_total', 'counter', cache['misses']),
+        ('thermo_result_cache_evictions_total', 'counter', cache['evictions']),
+        ('thermo_result_cache_expirations_total', 'counter', cache['expirations']),
+        ('thermo_node_cache_entries', 'gauge', nodes['size']),
+        ('thermo_node_cache_hits_total', 'counter', nodes['hits']),
+        ('thermo_node_cache_misses_total', 'counter', nodes['misses']),
+        ('thermo_saturation_dome_entries', 'gauge', dome.currsize),
+        ('thermo_saturation_dome_hits_total', 'counter', dome.hits),
+        ('thermo_saturation_dome_misses_total', 'counter', dome.misses),
+        ('thermo_chart_cache_entries', 'gauge', chart_cache.stats()['size']),
+        ('thermo_live_sessions', 'gauge', len(live_sessions)),
+        ('thermo_live_sessions_opened_total', 'counter', live_stats['opened']),
+        ('thermo_live_computed_total', 'counter', live_stats['computed']),
+        ('thermo_live_superseded_total', 'counter', live_stats['superseded']),
+        ('thermo_batch_pool_workers', 'gauge', BATCH_WORKERS if _batch_pool is not None else 0),
+        ('thermo_executor_pending', 'gauge', executor_stats['pending']),
+        ('thermo_executor_capacity', 'gauge', MAX_CONCURRENCY + MAX_QUEUE),
+        ('thermo_executor_rejected_total', 'counter', executor_stats['rejected']),
+        ('thermo_executor_timeouts_total', 'counter', executor_stats['timeouts']),
+        ('thermo_metrics_enabled', 'gauge', int(METRICS_ENABLED)),
+        ('thermo_startup_data_seconds', 'gauge', STARTUP_TIMINGS['data']),
+        ('thermo_data_loaded_timestamp_seconds', 'gauge', data_store.loaded_at),
+        ('thermo_blend_interpolated_total', 'counter', blend_stats['interpolated']),
+        ('thermo_blend_exact_total', 'counter', blend_stats['exact']),
+        ('thermo_blend_flash_hits_total', 'counter', blend_stats['flash_hits']),
+        ('thermo_blend_flash_misses_total', 'counter', blend_stats['flash_misses']),
+        ('thermo_startup_prewarm_seconds', 'gauge', STARTUP_TIMINGS.get('prewarm', 0))
+    ]
+    for name, kind, value in gauges:
+        lines += [f'# TYPE {name} {kind}', f'{name} {value}']
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    with _blend_stats_lock:
+        blends = dict(blend_stats, model=BLEND_MODEL, envelopes=dict(blend_info))
+    return jsonify({'status': 'success', 'thermo': thermo_cache.stats(), 'nodes': node_cache.stats(),
+                    'saturation_dome': _build_saturation_dome.cache_info()._asdict(), 'blends': blends})
+
+# Barridos paramétricos: la malla completa se evalúa en orden y se transmite como NDJSON
+SWEEP_MAX_POINTS = int(os.environ.get('THERMO_SWEEP_MAX_POINTS', 100000))
+
+def sweep_axis_length(spec):
+    """Cantidad de valores de un eje (ver parse_sweep_axis), validada sin generar los valores."""
+    if isinstance(spec, bool):
+        raise ValueError("Valor de eje inválido")
+    if isinstance(spec, (int, float)):
+        finite_float(spec)
+        return 1
+    if isinstance(spec, list):
+        if not spec:
+            raise ValueError("Lista de valores vacía")
+        return len(spec)
+    if isinstance(spec, dict):
+        start = finite_float(spec['start'])
+        stop = finite_float(spec['stop'])
+        if 'num' in spec:
+            num = finite_float(spec['num'])
+            if num < 1 or not num.is_integer():
+                raise ValueError("num debe ser un entero positivo")
+            return int(num)
+        step = finite_float(spec['step'])
+        if step <= 0 or stop < start:
+            raise ValueError("El rango requiere step > 0 y stop >= start")
+        count = (stop - start) / step
+        if not math.isfinite(count):
+            raise ValueError("Rango con demasiados valores")
+        return int(math.floor(count + 1e-9)) + 1
+    raise ValueError("Valor de eje inválido")
+
+def parse_sweep_axis(spec):
+    """Número, lista de números o rango {'start', 'stop', 'step' | 'num'} (extremos incluidos) → lista de floats.
+
+    Genera todos los valores: el tamaño de la malla se valida antes con sweep_axis_length.
+    """
+    sweep_axis_length(spec)
+    if isinstance(spec, (int, float)):
+        return [float(spec)]
+    if isinstance(spec, list):
+        return [finite_float(value) for value in spec]
+    start = float(spec['start'])
+    stop = float(spec['stop'])
+    if 'num' in spec:
+        values = np.linspace(start, stop, int(float(spec['num'])))
+    else:
+        step = float(spec['step'])
+        values = start + np.arange(int(math.floor((stop - start) / step + 1e-9)) + 1) * step
+    return np.round(values, 9).tolist()
+
+def iter_sweep(refrigerant, axes, power_unit, backend, include_saturation, full_capillary):
+    """Genera las líneas NDJSON del barrido: cabecera, una fila por punto de la malla y resumen."""
+    started = time.perf_counter()
+    total = math.prod(len(values) for values in axes.values())
+    header = {'type': 'header', 'refrigerant': refrigerant, 'total': total,
+              'backend': property_backend(refrigerant, backend),
+              'axes': dict(axes, cooling_power={'value': axes['cooling_power'], 'unit': power_unit})}
+    if include_saturation:
+        evap_min = min(axes['evap_temp'])
+        cond_max = max(axes['cond_temp'])
+        try:
+            if cond_max > evap_min:
+                header['saturation'] = calculate_saturation_curve(refrigerant, evap_min, cond_max, backend)
+        except Exception as e:
+            logger.error("Error en curva de saturación del barrido: %s", str(e), exc_info=True)
+            header['saturation_error'] = str(e)
+    yield json.dumps(header, separators=(',', ':')) + '\n'
+
+    cache = {}
+    index = 0
+    succeeded = 0
+    for evap_temp, cond_temp, superheat, subcooling in itertools.product(
+            axes['evap_temp'], axes['cond_temp'], axes['superheat'], axes['subcooling']):
+        check_deadline()
+        cycle_error = None
+        try:
+            points, cop = calculate_cycle(refrigerant, evap_temp, cond_temp, superheat, subcooling, backend, cache)
+        except Exception as e:
+            cycle_error = str(e)
+        for power_value in axes['cooling_power']:
+            row = {'type': 'row', 'index': index, 'evap_temp': evap_temp, 'cond_temp': cond_temp,
+                   'superheat': superheat, 'subcooling': subcooling,
+                   'cooling_power': {'value': power_value, 'unit': power_unit}}
+            index += 1
+            error = validate_operating_point(evap_temp, cond_temp, superheat, subcooling, power_value) or cycle_error
+            if error is None:
+                try:
+                    capillary_result, mass_flow = calculate_capillary_lengths(
+                        refrigerant, row['cooling_power'], points['1'], points['4'], points['1']['enthalpy'],
+                        points['2']['enthalpy'], subcooling, evap_temp - 273.15, backend, cache)
+                    row.update({'status': 'success', 'cop': cop, 'mass_flow': mass_flow, 'points': points,
+                                'capillary': capillary_result if full_capillary else {'winner': capillary_result['winner']}})
+                    succeeded += 1
+                except Exception as e:
+                    error = str(e)
+            if error is not None:
+                row.update({'status': 'error', 'message': error})
+            yield json.dumps(row, separators=(',', ':')) + '\n'
+
+    summary = {'type': 'summary', 'count': index, 'succeeded': succeeded, 'failed': index - succeeded,
+               'elapsed_s': time.perf_counter() - started}
+    logger.info("Barrido de %s completado: %s puntos en %.2f s", refrigerant, index, summary['elapsed_s'])
+    yield json.dumps(summary, separators=(',', ':')) + '\n'
+
+@app.route('/thermo/sweep', methods=['POST'])
+def get_thermo_sweep():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': 'Datos de entrada inválidos'}), 400
+    logger.info("Request received for /thermo/sweep")
+    log_payload("Datos de /thermo/sweep: %s", data)
+    try:
+        refrigerant = data.get('refrigerant', 'R134a')
+        backend = resolve_backend(data.get('backend'))
+        cooling_power = data.get('cooling_power', {'value': 1000, 'unit': 'W'})
+        specs = {
+            'evap_temp': data.get('evap_temp', 243.15),
+            'cond_temp': data.get('cond_temp', 313.15),
+            'superheat': data.get('superheat', 0),
+            'subcooling': data.get('subcooling', 0),
+            'cooling_power': cooling_power['value']
+        }
+        power_unit = cooling_power.get('unit', 'W')
+        # El tamaño de la malla se valida antes de generar los ejes: un rango enorme no llega a reservar memoria
+        total = math.prod(sweep_axis_length(spec) for spec in specs.values())
+        if total > SWEEP_MAX_POINTS:
+            return jsonify({'status': 'error', 'message': f'La malla tiene {total} puntos; el máximo es {SWEEP_MAX_POINTS}'}), 400
+        axes = {name: parse_sweep_axis(spec) for name, spec in specs.items()}
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        logger.error("Datos de barrido inválidos: %s", str(e), exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Datos de entrada inválidos: {e}'}), 400
+
+    generator = iter_sweep(refrigerant, axes, power_unit, backend,
+                           bool(data.get('include_saturation', True)), bool(data.get('full_capillary', False)))
+    return Response(stream_with_context(BoundedStream(generator)), mimetype='application/x-ndjson')
+
+# Lotes de /thermo: el cálculo es CPU intensivo y retiene el GIL, así que se reparte en procesos
+BATCH_MAX_ITEMS = int(os.environ.get('THERMO_BATCH_MAX_ITEMS', 1000))
+BATCH_WORKERS = int(os.environ.get('THERMO_BATCH_WORKERS', os.cpu_count() or 1))
+PREWARM_REFRIGERANTS = [r.strip() for r in os.environ.get('THERMO_PREWARM', 'R134a,R32,R410A,R404A,R290,R600a').split(',') if r.strip()]
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+def warm_property_engine(refrigerants, saturation=False, backend=None):
+    """Inicializa los AbstractState de cada refrigerante para no pagar ese costo en la primera petición.
+
+    Con saturation=True también construye el domo de saturación; `backend` es el de la API (por defecto, THERMO_BACKEND).
+    """
+    backend = resolve_backend(backend)
+    for refrigerant in refrigerants:
+        try:
+            if is_mixture_blend(refrigerant):
+                blend_envelope(refrigerant)
+            elif refrigerant not in current_data().custom:
+                t_min, t_max = get_temperature_limits(refrigerant, backend)
+                state_props(refrigerant, CP.QT_INPUTS, 0, (t_min + t_max) / 2, CP.iP, backend=backend)
+            if saturation:
+                get_saturation_dome(refrigerant, backend)
+        except ValueError as e:
+            logger.warning("No se pudo precalentar %s: %s", refrigerant, str(e))
+
+def _init_batch_worker(refrigerants):
+    warm_property_engine(refrigerants)
+
+def _batch_item(data):
+    if not isinstance(data, dict):
+        return {'status': 'error', 'message': 'Cada elemento del lote debe ser un objeto JSON'}, 400
+    refresh_data_store()
+    try:
+        return compute_thermo(data)
+    except CalculationTimeout as e:
+        return {'status': 'error', 'message': str(e)}, 504
+    except (TypeError, ValueError, KeyError) as e:
+        logger.error("Elemento del lote inválido: %s", str(e), exc_info=True)
+        return {'status': 'error', 'message': 'Datos de entrada inválidos'}, 400
+    except Exception as e:
+        # Fallas del servidor (CoolProp, datos, pool): no son culpa del cliente
+        logger.error("Error en elemento del lote: %s", str(e), exc_info=True)
+        return {'status': 'error', 'message': f'Error interno: {e}'}, 500
+
+def get_batch_pool():
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            logger.info("Creando pool de %s procesos para /thermo/batch", BATCH_WORKERS)
+            _batch_pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS, initializer=_init_batch_worker,
+                                              initargs=(PREWARM_REFRIGERANTS,))
+        return _batch_pool
+
+def _run_with_deadline(fn, item, expires_at):
+    # El reloj monótono no se comparte entre procesos: el plazo viaja como hora de pared y se convierte aquí
+    if expires_at is not None:
+        _deadline.value = time.monotonic() + (expires_at - time.time())
+    try:
+        return fn(item)
+    finally:
+        _deadline.value = None
+
+def map_on_pool(fn, items, chunksize=1):
+    """list(pool.map(fn, items)) con el plazo del cálculo en curso.
+
+    Cada elemento corre en el proceso hijo con el mismo plazo (check_deadline funciona allí) y la espera del hilo
+    llamador también está acotada: al vencer se cancelan los elementos pendientes y se lanza CalculationTimeout.
+    """
+    remaining = time_remaining()
+    expires_at = None if remaining is None else time.time() + remaining
+    results = get_batch_pool().map(_run_with_deadline, itertools.repeat(fn), items, itertools.repeat(expires_at),
+                                   chunksize=chunksize, timeout=remaining)
+    try:
+        return list(results)
+    except FuturesTimeoutError:
+        raise CalculationTimeout("El cálculo superó el tiempo máximo permitido") from None
+
+def reset_batch_pool():
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is not None:
+            _batch_pool.shutdown(wait=False, cancel_futures=True)
+            _batch_pool = None
+
+def _forget_batch_pool_after_fork():
+    # El pool del proceso padre no sirve en el hijo: cada worker crea el suyo al primer lote
+    global _batch_pool, _batch_pool_lock
+    _batch_pool = None
+    _batch_pool_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_batch_pool_after_fork)
+
+@app.route('/thermo/batch', methods=['POST'])
+def get_thermo_batch():
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({'status': 'error', 'message': 'Se espera una lista no vacía de payloads de /thermo'}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({'status': 'error', 'message': f'El lote excede el máximo de {BATCH_MAX_ITEMS} elementos'}), 400
+    logger.info("Request received for /thermo/batch with %s items", len(items))
+
+    chunksize = max(1, len(items) // (BATCH_WORKERS * 4))
+    try:
+        outcomes = run_bounded(map_on_pool, _batch_item, items, chunksize=chunksize)
+    except BrokenProcessPool as e:
+        logger.error("Pool de procesos caído: %s", str(e), exc_info=True)
+        reset_batch_pool()
+        return jsonify({'status': 'error', 'message': 'Pool de cálculo no disponible, reintente'}), 503
+
+    results = [{'index': i, 'http_status': status_code, **body} for i, (body, status_code) in enumerate(outcomes)]
+    succeeded = sum(1 for item in results if item['status'] == 'success')
+    return jsonify({
+        'status': 'success',
+        'count': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results
+    })
+
+# Comparación de refrigerantes: un punto de operación evaluado sobre muchos fluidos. El índice de metadatos
+# (límites de temperatura y presión, fluido puro o mezcla, clase ASHRAE 34, curva de saturación gruesa) se
+# construye una vez por proceso (la parte de los CSV, una vez por versión de los datos) y descarta los fluidos
+# inviables antes de evaluar propiedades.
+FLUID_INDEX_POINTS = 16
+COMPARE_PRESSURE_MARGIN = 0.05
+COMPARE_PARALLEL_MIN = int(os.environ.get('THERMO_COMPARE_PARALLEL_MIN', 48))
+COMPARE_RANKINGS = {
+    'cop': lambda item: -item['cop'],
+    'mass_flow': lambda item: item['mass_flow'],
+    'capillary': lambda item: item['capillary']['deviation_m']
+}
+
+@functools.lru_cache(maxsize=1)
+def _coolprop_metadata_index():
+    index = {}
+    for refrigerant in CP.FluidsList():
+        try:
+            state = CP.AbstractState('HEOS', refrigerant)
+            t_min, t_crit = state.Tmin(), state.T_critical()
+            temps = np.linspace(t_min, t_crit, FLUID_INDEX_POINTS)[:-1]
+            p_sat = state_props_batch(refrigerant, CP.QT_INPUTS, 1, temps, [CP.iP], ignore_errors=True)[0]
+            valid = np.isfinite(p_sat) & (p_sat > 0)
+            safety_class = CP.get_fluid_param_string(refrigerant, 'ASHRAE34')
+            index[refrigerant] = {
+                'source': 'CoolProp',
+                'kind': 'pure' if CP.get_fluid_param_string(refrigerant, 'pure') == 'true' else 'blend',
+                'ashrae34': safety_class if safety_class not in ('', '?', 'UNKNOWN') else None,
+                't_min': t_min,
+                't_max': state.Tmax(),
+                't_crit': t_crit,
+                'p_crit': state.p_critical(),
+                'p_max': state.pmax(),
+                'saturation': (temps[valid], np.log(p_sat[valid]))
+            }
+        except ValueError as e:
+            logger.warning("Sin metadatos para %s: %s", refrigerant, str(e))
+    return index
+
+@functools.lru_cache(maxsize=2)
+def _fluid_metadata_index(version):
+    index = dict(_coolprop_metadata_index())
+    store = current_data()
+    for refrigerant in store.custom:
+        entry = store.index.get(refrigerant)
+        if entry is None:
+            continue
+        temps = entry['temperature'] + 273.15
+        p_dew = entry['pressure_dew'] * 100000
+        valid = p_dew > 0
+        # Las mezclas del CSV solo se conocen dentro del rango tabulado
+        index[refrigerant] = {
+            'source': 'CSV',
+            'kind': 'blend',
+            'ashrae34': None,
+            't_min': float(temps[0]),
+            't_max': float(temps[-1]),
+            't_crit': None,
+            'p_crit': None,
+            'p_max': None,
+            'saturation': (temps[valid], np.log(p_dew[valid]))
+        }
+    return index
+
+def fluid_metadata_index():
+    """{refrigerante: metadatos} para los fluidos de CoolProp y de refrigerants.csv.
+
+    La curva de saturación ('saturation': temperaturas K, log de la presión de rocío) solo se usa para estimar
+    presiones al podar; el cálculo real siempre pasa por calculate_cycle.
+    """
+    return _fluid_metadata_index(current_data().version)
+
+def resolve_fluid_metadata(refrigerant):
+    """Metadatos de un refrigerante por nombre o alias de CoolProp (R290 -> n-Propane); None si no existe."""
+    index = fluid_metadata_index()
+    if refrigerant in index:
+        return index[refrigerant]
+    try:
+        return index.get(CP.get_fluid_param_string(refrigerant, 'name'))
+    except (RuntimeError, ValueError):
+        return None
+
+def estimate_saturation_pressure(meta, temperature):
+    temps, log_p = meta['saturation']
+    if temps.size < 2 or not temps[0] <= temperature <= temps[-1]:
+        return None
+    return float(np.exp(np.interp(temperature, temps, log_p)))
+
+def compare_prune_reason(meta, condition):
+    """Motivo por el que el fluido no puede operar en `condition`, o None si vale la pena evaluarlo."""
+    evap_temp, cond_temp = condition['evap_temp'], condition['cond_temp']
+    if evap_temp < meta['t_min']:
+        return f"Tevap por debajo de Tmin ({meta['t_min'] - 273.15:.1f}°C)"
+    if meta['t_crit'] is not None and cond_temp >= meta['t_crit']:
+        return f"Tcond por encima de la temperatura crítica ({meta['t_crit'] - 273.15:.1f}°C)"
+    if cond_temp > meta['t_max'] or evap_temp + condition['superheat'] > meta['t_max']:
+        return f"Fuera del rango de temperatura del fluido (máx. {meta['t_max'] - 273.15:.1f}°C)"
+    max_cond_pressure = condition.get('max_cond_pressure')
+    if max_cond_pressure is not None:
+        p_cond = estimate_saturation_pressure(meta, cond_temp)
+        if p_cond is not None and p_cond > max_cond_pressure * (1 + COMPARE_PRESSURE_MARGIN):
+            return f"Presión de condensación estimada {p_cond / 1e5:.1f} bar > {max_cond_pressure / 1e5:.1f} bar"
+    min_evap_pressure = condition.get('min_evap_pressure')
+    if min_evap_pressure is not None:
+        p_evap = estimate_saturation_pressure(meta, evap_temp)
+        if p_evap is not None and p_evap < min_evap_pressure * (1 - COMPARE_PRESSURE_MARGIN):
+            return f"Presión de evaporación estimada {p_evap / 1e5:.2f} bar < {min_evap_pressure / 1e5:.2f} bar"
+    return None
+
+def _compare_item(refrigerant, condition):
+    """Ciclo y capilar de un refrigerante reducidos a las cifras que se comparan."""
+    try:
+        points, cop = calculate_cycle(refrigerant, condition['evap_temp'], condition['cond_temp'],
+                                      condition['superheat'], condition['subcooling'], condition['backend'])
+        capillary, mass_flow = calculate_capillary_lengths(
+            refrigerant, condition['cooling_power'], points['1'], points['4'], points['1']['enthalpy'],
+            points['2']['enthalpy'], condition['subcooling'], condition['evap_temp'] - 273.15, condition['backend'],
+            target_length=condition['target_length']
+        )
+    except CalculationTimeout:
+        raise
+    except Exception as e:
+        logger.debug("Comparación descartó %s: %s", refrigerant, str(e))
+        return {'refrigerant': refrigerant, 'status': 'error', 'message': str(e)}
+    return {
+        'refrigerant': refrigerant,
+        'status': 'success',
+        'cop': cop,
+        'mass_flow': mass_flow,
+        'evap_pressure': points['1']['pressure'],
+        'cond_pressure': points['4']['pressure'],
+        'pressure_ratio': points['4']['pressure'] / points['1']['pressure'],
+        'discharge_temperature': points['3']['temperature'],
+        'capillary': dict(capillary['winner'], deviation_m=round(abs(capillary['winner']['length_m'] - condition['target_length']), 3))
+    }
+
+def _compare_chunk(args):
+    refrigerants, condition = args
+    refresh_data_store()
+    return [_compare_item(refrigerant, condition) for refrigerant in refrigerants]
+
+def evaluate_candidates(candidates, condition):
+    """Evalúa los candidatos en el pool de /thermo/batch si son muchos y hay más de un proceso; si no, en serie."""
+    if BATCH_WORKERS > 1 and len(candidates) >= COMPARE_PARALLEL_MIN:
+        size = -(-len(candidates) // (BATCH_WORKERS * 2))
+        chunks = [(candidates[i:i + size], condition) for i in range(0, len(candidates), size)]
+        try:
+            return [item for chunk in map_on_pool(_compare_chunk, chunks) for item in chunk]
+        except BrokenProcessPool as e:
+            logger.error("Pool de procesos caído, comparación en serie: %s", str(e), exc_info=True)
+            reset_batch_pool()
+    return _compare_chunk((candidates, condition))
+
+@app.route('/compare', methods=['POST'])
+def compare_refrigerants():
+    """Evalúa un punto de operación sobre todos los refrigerantes (o un subconjunto) y los ordena."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': 'Se espera un objeto JSON'}), 400
+    try:
+        condition = {
+            'evap_temp': finite_float(data.get('evap_temp', 243.15)),
+            'cond_temp': finite_float(data.get('cond_temp', 313.15)),
+            'superheat': finite_float(data.get('superheat', 0)),
+            'subcooling': finite_float(data.get('subcooling', 0)),
+            'cooling_power': parse_cooling_power(data.get('cooling_power', {'value': 1000, 'unit': 'W'})),
+            'backend': resolve_backend(data.get('backend')),
+            'target_length': finite_float(data.get('target_length_m', CAPILLARY_TARGET_LENGTH)),
+            'max_cond_pressure': finite_float(data['max_cond_pressure']) if data.get('max_cond_pressure') is not None else None,
+            'min_evap_pressure': finite_float(data['min_evap_pressure']) if data.get('min_evap_pressure') is not None else None
+        }
+        rank_by = data.get('rank_by', 'cop')
+        if rank_by not in COMPARE_RANKINGS:
+            raise ValueError(f"rank_by debe ser uno de {sorted(COMPARE_RANKINGS)}")
+        kind = data.get('kind', 'all')
+        if kind not in ('all', 'pure', 'blend'):
+            raise ValueError("kind debe ser 'all', 'pure' o 'blend'")
+        safety = data.get('safety')
+        if safety is not None and (not isinstance(safety, list) or not all(isinstance(s, str) for s in safety)):
+            raise ValueError("safety debe ser una lista de clases ASHRAE 34, p. ej. ['A1', 'A2L']")
+        limit = int(data['limit']) if data.get('limit') is not None else None
+        requested = data.get('refrigerants')
+        if requested is not None and (not isinstance(requested, list) or not requested
+                                      or not all(isinstance(r, str) for r in requested)):
+            raise ValueError("refrigerants debe ser una lista no vacía de nombres")
+        if condition['target_length'] <= 0:
+            raise ValueError("target_length_m debe ser positivo")
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        logger.error("Datos de comparación inválidos: %s", str(e), exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Datos de entrada inválidos: {e}'}), 400
+    error = validate_operating_point(condition['evap_temp'], condition['cond_temp'], condition['superheat'],
+                                     condition['subcooling'], condition['cooling_power']['value'])
+    if error:
+        return jsonify({'status': 'error', 'message': error}), 400
+
+    started = time.perf_counter()
+    names = requested if requested is not None else list(fluid_metadata_index())
+    logger.info("Request received for /compare with %s refrigerants, rank_by=%s", len(names), rank_by)
+    candidates, metadata, pruned, failed = [], {}, [], []
+    with stage('prune'):
+        for refrigerant in dict.fromkeys(names):
+            meta = resolve_fluid_metadata(refrigerant)
+            if meta is None:
+                failed.append({'refrigerant': refrigerant, 'message': 'Refrigerante desconocido'})
+                continue
+            if kind != 'all' and meta['kind'] != kind:
+                continue
+            if safety is not None and meta['ashrae34'] not in safety:
+                continue
+            reason = compare_prune_reason(meta, condition)
+            if reason:
+                pruned.append({'refrigerant': refrigerant, 'reason': reason})
+                continue
+            candidates.append(refrigerant)
+            metadata[refrigerant] = meta
+
+    with stage('evaluate'):
+        outcomes = run_bounded(evaluate_candidates, candidates, condition) if candidates else []
+
+    results = []
+    for item in outcomes:
+        if item['status'] != 'success':
+            failed.append({'refrigerant': item['refrigerant'], 'message': item['message']})
+            continue
+        # La estimación gruesa solo poda lo evidente; el filtro de presión se confirma con el valor calculado
+        if condition['max_cond_pressure'] is not None and item['cond_pressure'] > condition['max_cond_pressure']:
+            pruned.append({'refrigerant': item['refrigerant'],
+                           'reason': f"Presión de condensación {item['cond_pressure'] / 1e5:.1f} bar > {condition['max_cond_pressure'] / 1e5:.1f} bar"})
+            continue
+        if condition['min_evap_pressure'] is not None and item['evap_pressure'] < condition['min_evap_pressure']:
+            pruned.append({'refrigerant': item['refrigerant'],
+                           'reason': f"Presión de evaporación {item['evap_pressure'] / 1e5:.2f} bar < {condition['min_evap_pressure'] / 1e5:.2f} bar"})
+            continue
+        meta = metadata[item['refrigerant']]
+        item.update(kind=meta['kind'], ashrae34=meta['ashrae34'],
+                    backend=property_backend(item['refrigerant'], condition['backend'], condition['evap_temp'], condition['cond_temp']))
+        results.append(item)
+    results.sort(key=COMPARE_RANKINGS[rank_by])
+    for rank, item in enumerate(results, 1):
+        item['rank'] = rank
+
+    return jsonify({
+        'status': 'success',
+        'rank_by': rank_by,
+        'requested': len(names),
+        'evaluated': len(candidates),
+        'pruned': len(pruned),
+        'failed': len(failed),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'results': results[:limit] if limit is not None else results,
+        'pruned_fluids': pruned,
+        'failures': failed
+    })
+
+@app.route('/capillary', methods=['POST'])
+def get_capillary_sizing():
+    """Dimensiona muchos casos (ΔP, ρ, ṁ) de una vez sobre un catálogo de diámetros."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('cases'), list) or not data['cases']:
+        return jsonify({'status': 'error', 'message': 'Se espera una lista no vacía de casos en "cases"'}), 400
+    logger.info("Request received for /capillary with %s cases", len(data['cases']))
+    try:
+        refrigerant = data.get('refrigerant', 'R134a')
+        diameters = parse_diameter_catalog(data['diameters_mm']) if 'diameters_mm' in data else DEFAULT_DIAMETERS
+        target_length = finite_float(data.get('target_length_m', CAPILLARY_TARGET_LENGTH))
+        if target_length <= 0:
+            raise ValueError("target_length_m debe ser positivo")
+        delta_p, rho, m_dot, C, fc = [], [], [], [], []
+        for case in data['cases']:
+            delta_p.append(finite_float(case['delta_p']))
+            rho.append(finite_float(case['density']))
+            m_dot.append(finite_float(case['mass_flow']))
+            if 'capillary_constant' in case:
+                C.append(finite_float(case['capillary_constant']))
+            else:
+                cooling_power = parse_cooling_power(case.get('cooling_power', data.get('cooling_power', {'value': 1000, 'unit': 'W'})))
+                C.append(get_capillary_constant(case.get('refrigerant', refrigerant), convert_cooling_power(cooling_power)[0]))
+            fc.append(capillary_correction_factor(finite_float(case.get('evap_temp', 253.15)) - 273.15))
+        if min(delta_p) <= 0 or min(m_dot) <= 0 or min(rho) <= 0:
+            raise ValueError("delta_p, density y mass_flow deben ser positivos")
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        logger.error("Datos de capilar inválidos: %s", str(e), exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Datos de entrada inválidos: {e}'}), 400
+
+    sizing = run_bounded(size_capillaries, delta_p, rho, m_dot, C, fc, diameters, target_length)
+    nan_to_none = lambda values: [None if math.isnan(value) else value for value in values.tolist()]
+    cases = []
+    for i in range(len(delta_p)):
+        has_winner = sizing['winner_index'][i] >= 0
+        cases.append({
+            'status': 'success' if has_winner else 'error',
+            'capillary_constant': C[i],
+            'winner': {
+                'diameter_mm': float(sizing['winner_diameter'][i]) * 1000,
+                'length_m': round(float(sizing['winner_length'][i]), 3)
+            } if has_winner else None,
+            'required_diameter_mm': float(sizing['required_diameter'][i]) * 1000,
+            'lengths_m': nan_to_none(np.round(sizing['scaled_lengths'][i], 3))
+        })
+    return jsonify({
+        'status': 'success',
+        'target_length_m': target_length,
+        'diameters_mm': (diameters * 1000).tolist(),
+        'cases': cases
+    })
+
+@app.route('/saturation/<refrigerant>', methods=['GET'])
+def get_saturation(refrigerant):
+    logger.info("Request received for /saturation/%s", refrigerant)
+    try:
+        backend = resolve_backend(request.args.get('backend'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    # Los domos de CoolProp solo cambian con la versión de CoolProp; los del CSV cambian con cada recarga de datos,
+    # así que el navegador debe revalidarlos con el ETag en cada uso
+    source = property_backend(refrigerant, backend)
+    etag = thermo_etag((refrigerant, source, SATURATION_DOME_POINTS, BLEND_STEP if source == BLEND_BACKEND else None,
+                        CP.get_global_param_string('version'), data_version() if source == 'CSV' else None))
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache' if source == 'CSV' else 'public, max-age=86400'}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    try:
+        dome = run_bounded(get_saturation_dome, refrigerant, backend)
+    except ValueError as e:
+        logger.error("Error en /saturation: %s", str(e))
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    response = jsonify({
+        'status': 'success',
+        'refrigerant': refrigerant,
+        'backend': source,
+        'temperature': (dome['temperature'] - 273.15).tolist(),
+        **{key: dome[key].tolist() for key in SATURATION_DOME_KEYS}
+    })
+    response.headers.update(headers)
+    return response
+
+@app.route('/accuracy/<refrigerant>', methods=['GET'])
+def get_backend_accuracy(refrigerant):
+    logger.info("Request received for /accuracy/%s", refrigerant)
+    if is_mixture_blend(refrigerant):
+        return jsonify({'status': 'error', 'message': f'{refrigerant} se calcula como mezcla HEOS; los backends tabulados no admiten mezclas'}), 400
+    if refrigerant in current_data().custom:
+        return jsonify({'status': 'error', 'message': f'{refrigerant} usa datos tabulados del CSV, no un backend CoolProp'}), 400
+    try:
+        backend = resolve_backend(request.args.get('backend', 'BICUBIC'))
+        num_points = int(request.args.get('points', 50))
+        if not 2 <= num_points <= 500:
+            raise ValueError("points debe estar entre 2 y 500")
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    try:
+        report = run_bounded(compare_backend_accuracy, refrigerant, backend, num_points)
+        return jsonify({'status': 'success', **report})
+    except (ServerBusy, CalculationTimeout):
+        raise
+    except Exception as e:
+        logger.error("Error en /accuracy: %s", str(e), exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+# Diagramas P-h y T-s: familias de líneas (saturación, calidad, isotermas, isentrópicas e isobaras) calculadas una
+# vez por (refrigerante, backend, resolución) con el motor vectorizado. Cada línea trae T, P, h y s, así sirve para
+# ambos diagramas. El JSON comprimido con gzip se guarda en una LRU en memoria y en disco (THERMO_CHART_DIR, con
+# tope de tamaño), y se sirve con Cache-Control de larga duración y ETag.
+CHART_POINTS = int(os.environ.get('THERMO_CHART_POINTS', 60))
+CHART_LINES = int(os.environ.get('THERMO_CHART_LINES', 12))
+CHART_MAX_POINTS = 400
+CHART_MAX_LINES = 40
+CHART_CACHE_SIZE = int(os.environ.get('THERMO_CHART_CACHE_SIZE', 32))
+CHART_DIR = os.environ.get('THERMO_CHART_DIR', 'chart_cache')
+CHART_DIR_MAX_BYTES = int(float(os.environ.get('THERMO_CHART_DIR_MB', 64)) * 1024 * 1024)
+CHART_MAX_AGE = int(os.environ.get('THERMO_CHART_MAX_AGE', 30 * 86400))
+CHART_FORMAT = 1
+CHART_QUALITIES = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+CHART_ROUNDING = {'T': 3, 'P': 1, 'h': 1, 's': 3}
+
+chart_cache = ResultCache(CHART_CACHE_SIZE, float('inf'))
+
+def chart_line(value, T, P, h, s):
+    """Una línea de una familia como columnas redondeadas, sin los puntos que CoolProp no pudo resolver."""
+    columns = dict(zip('TPhs', np.broadcast_arrays(*(np.asarray(values, dtype=np.float64) for values in (T, P, h, s)))))
+    valid = np.all([np.isfinite(values) for values in columns.values()], axis=0)
+    line = {'value': round(float(value), 6)}
+    line.update({key: np.round(values[valid], CHART_ROUNDING[key]).tolist() for key, values in columns.items()})
+    return line
+
+def _chart_isotherm(refrigerant, backend, T, pressures, p_bubble, p_dew):
+    """Isoterma: líquido por encima de la presión de burbuja, tramo bifásico y vapor por debajo de la de rocío."""
+    outputs = [CP.iHmass, CP.iSmass]
+    if np.isnan(p_bubble):
+        P = pressures[::-1]
+        h, s = state_props_batch(refrigerant, CP.PT_INPUTS, P, T, outputs, backend=backend, ignore_errors=True)
+        return chart_line(T, T, P, h, s)
+    # Se evita evaluar PT justo sobre la saturación, donde la fase es ambigua
+    liquid = pressures[pressures > p_bubble * 1.001][::-1]
+    vapor = pressures[pressures < p_dew * 0.999][::-1]
+    h_l, s_l = state_props_batch(refrigerant, CP.PT_INPUTS, liquid, T, outputs, backend=backend, ignore_errors=True)
+    h_v, s_v = state_props_batch(refrigerant, CP.PT_INPUTS, vapor, T, outputs, backend=backend, ignore_errors=True)
+    h_sat, s_sat = state_props_batch(refrigerant, CP.QT_INPUTS, np.array([0.0, 1.0]), T, outputs, backend=backend, ignore_errors=True)
+    return chart_line(T, T, np.concatenate([liquid, [p_bubble, p_dew], vapor]),
+                      np.concatenate([h_l, h_sat, h_v]), np.concatenate([s_l, s_sat, s_v]))
+
+def build_chart(refrigerant, backend, num_points, num_lines):
+    """Calcula las familias de líneas del diagrama de un refrigerante CoolProp."""
+    state = get_state(refrigerant, backend)
+    t_min, t_crit = state.Tmin(), state.T_critical()
+    p_crit = state.p_critical()
+    t_low = t_min + 0.1 * (t_crit - t_min)
+    t_high = min(state.Tmax(), t_crit + 0.25 * (t_crit - t_low))
+    temps_sat = np.linspace(t_low, t_crit - 1e-3 * (t_crit - t_low), num_points)
+    sat_outputs = [CP.iP, CP.iHmass, CP.iSmass]
+
+    saturation = {}
+    for label, quality in (('liquid', 0.0), ('vapor', 1.0)):
+        P, h, s = state_props_batch(refrigerant, CP.QT_INPUTS, quality, temps_sat, sat_outputs, backend=backend, ignore_errors=True)
+        saturation[label] = chart_line(quality, temps_sat, P, h, s)
+    p_low = state_props(refrigerant, CP.QT_INPUTS, 1, t_low, CP.iP, backend=backend)
+    p_high = min(state.pmax(), 2 * p_crit)
+    pressures = np.geomspace(p_low, p_high, num_points)
+
+    quality_lines = []
+    for quality in CHART_QUALITIES:
+        P, h, s = state_props_batch(refrigerant, CP.QT_INPUTS, quality, temps_sat, sat_outputs, backend=backend, ignore_errors=True)
+        quality_lines.append(chart_line(quality, temps_sat, P, h, s))
+
+    isotherms = []
+    for T in np.linspace(t_low, t_high, num_lines).tolist():
+        if T < t_crit:
+            p_bubble, p_dew = state_props_batch(refrigerant, CP.QT_INPUTS, np.array([0.0, 1.0]), T, [CP.iP], backend=backend,
+                                                ignore_errors=True)[0].tolist()
+        else:
+            p_bubble = p_dew = math.nan
+        isotherms.append(_chart_isotherm(refrigerant, backend, T, pressures, p_bubble, p_dew))
+
+    s_low = saturation['liquid']['s'][0]
+    s_high = state_props(refrigerant, CP.PT_INPUTS, p_low, t_high, CP.iSmass, backend=backend)
+    isentropes = []
+    for s in np.linspace(s_low, s_high, num_lines).tolist():
+        T, h = state_props_batch(refrigerant, CP.PSmass_INPUTS, pressures, s, [CP.iT, CP.iHmass], backend=backend, ignore_errors=True)
+        isentropes.append(chart_line(s, T, pressures, h, s))
+
+    h_low = saturation['liquid']['h'][0]
+    h_high = state_props(refrigerant, CP.PT_INPUTS, p_low, t_high, CP.iHmass, backend=backend)
+    enthalpies = np.linspace(h_low, h_high, num_points)
+    isobars = []
+    for P in np.geomspace(p_low, p_high, num_lines).tolist():
+        T, s = state_props_batch(refrigerant, CP.HmassP_INPUTS, enthalpies, P, [CP.iT, CP.iSmass], backend=backend, ignore_errors=True)
+        isobars.append(chart_line(P, T, P, enthalpies, s))
+
+    state.update(CP.DmassT_INPUTS, state.rhomass_critical(), t_crit)
+    return {
+        'critical': {'T': t_crit, 'P': p_crit, 'h': state.hmass(), 's': state.smass()},
+        'saturation': saturation,
+        'quality': quality_lines,
+        'isotherms': isotherms,
+        'isentropes': isentropes,
+        'isobars': isobars
+    }
+
+def build_csv_chart(refrigerant, num_points):
+    """Refrigerantes del CSV y mezclas: domo y líneas de calidad a partir de la tabla de saturación, sin isotermas."""
+    dome = get_saturation_dome(refrigerant)
+    temps = np.linspace(dome['temperature'][0], dome['temperature'][-1], num_points)
+    props = sample_saturation_dome(dome, temps)
+    saturation = {
+        'liquid': chart_line(0.0, temps, props['pressure_bubble'], props['h_liquid'], props['s_liquid']),
+        'vapor': chart_line(1.0, temps, props['pressure_dew'], props['h_vapor'], props['s_vapor'])
+    }
+    # Mezcla lineal entre burbuja y rocío: aproximación de la presión de las mezclas zeotrópicas
+    quality_lines = [
+        chart_line(q, temps, props['pressure_bubble'] + q * (props['pressure_dew'] - props['pressure_bubble']),
+                   props['h_liquid'] + q * (props['h_vapor'] - props['h_liquid']),
+                   props['s_liquid'] + q * (props['s_vapor'] - props['s_liquid']))
+        for q in CHART_QUALITIES
+    ]
+    return {'critical': None, 'saturation': saturation, 'quality': quality_lines,
+            'isotherms': [], 'isentropes': [], 'isobars': []}
+
+def _chart_path(etag):
+    return os.path.join(CHART_DIR, f'{etag}.json.gz')
+
+def _prune_chart_dir():
+    """Borra los diagramas más antiguos del disco mientras el directorio supere THERMO_CHART_DIR_MB."""
+    entries = []
+    for name in os.listdir(CHART_DIR):
+        if name.endswith('.json.gz'):
+            stat = os.stat(os.path.join(CHART_DIR, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= CHART_DIR_MAX_BYTES:
+            break
+        with contextlib.suppress(OSError):
+            os.remove(os.path.join(CHART_DIR, name))
+        total -= size
+
+class UnknownRefrigerant(ValueError):
+    """El refrigerante no está en los CSV ni lo reconoce CoolProp."""
+
+def chart_key(refrigerant, backend, num_points, num_lines):
+    """Clave del diagrama (y de su ETag) sin calcular nada: sirve para responder 304 antes de construirlo."""
+    source = property_backend(refrigerant, backend)
+    blend_step = BLEND_STEP if source == BLEND_BACKEND and is_mixture_blend(refrigerant) else None
+    return (refrigerant, source, num_points, num_lines, CHART_FORMAT, CP.get_global_param_string('version'),
+            data_version() if source == 'CSV' else None, blend_step)
+
+def get_chart(refrigerant, backend, num_points, num_lines):
+    """Devuelve (JSON del diagrama comprimido con gzip, ETag, origen: memory, disk o built).
+
+    Crear el AbstractState puede generar las tablas BICUBIC/TTSE (segundos), así que corre dentro de run_bounded.
+    """
+    is_table = refrigerant in current_data().custom or is_mixture_blend(refrigerant)
+    if not is_table:
+        try:
+            get_state(refrigerant, backend)
+        except ValueError:
+            raise UnknownRefrigerant(f'Refrigerante desconocido: {refrigerant}') from None
+    key = chart_key(refrigerant, backend, num_points, num_lines)
+    etag = thermo_etag(key)
+    body = chart_cache.get(key)
+    if body is not None:
+        return body, etag, 'memory'
+    if CHART_DIR:
+        with contextlib.suppress(OSError):
+            with open(_chart_path(etag), 'rb') as f:
+                body = f.read()
+            chart_cache.put(key, body)
+            return body, etag, 'disk'
+
+    logger.info("Calculando diagrama de %s (%s, %s puntos, %s líneas)", refrigerant, key[1], num_points, num_lines)
+    chart = build_csv_chart(refrigerant, num_points) if is_table else build_chart(refrigerant, backend, num_points, num_lines)
+    chart.update(status='success', refrigerant=refrigerant, backend=key[1],
+                 resolution={'points': num_points, 'lines': num_lines},
+                 units={'T': 'K', 'P': 'Pa', 'h': 'J/kg', 's': 'J/kg/K'})
+    body = compress_body(app.json.dumps(chart).encode('utf-8'), 'gzip')
+    chart_cache.put(key, body)
+    if CHART_DIR:
+        try:
+            os.makedirs(CHART_DIR, exist_ok=True)
+            tmp_path = f'{_chart_path(etag)}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, _chart_path(etag))
+            _prune_chart_dir()
+        except OSError as e:
+            logger.warning("No se pudo guardar el diagrama en disco: %s", str(e))
+    return body, etag, 'built'
+
+@app.route('/chart/<refrigerant>', methods=['GET'])
+def get_chart_lines(refrigerant):
+    logger.info("Request received for /chart/%s", refrigerant)
+    try:
+        backend = resolve_backend(request.args.get('backend'))
+        num_points = int(request.args.get('points', CHART_POINTS))
+        num_lines = int(request.args.get('lines', CHART_LINES))
+        if not 10 <= num_points <= CHART_MAX_POINTS or not 2 <= num_lines <= CHART_MAX_LINES:
+            raise ValueError(f"points debe estar entre 10 y {CHART_MAX_POINTS} y lines entre 2 y {CHART_MAX_LINES}")
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    headers = {'Cache-Control': f'public, max-age={CHART_MAX_AGE}', 'Vary': 'Accept-Encoding'}
+    etag = thermo_etag(chart_key(refrigerant, backend, num_points, num_lines))
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=dict(headers, ETag=f'"{etag}"'))
+
+    try:
+        body, etag, source = run_bounded(get_chart, refrigerant, backend, num_points, num_lines)
+    except UnknownRefrigerant as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 404
+    except ValueError as e:
+        logger.error("Error en /chart: %s", str(e), exc_info=True)
         return jsonify({'status': 'error', 'message': str(e)}), 500
+    headers.update({'ETag': f'"{etag}"', 'X-Cache': source})
+    if request.accept_encodings['gzip']:
+        headers['Content-Encoding'] = 'gzip'
+    else:
+        body = gzip.decompress(body)
+    return Response(body, mimetype='application/json', headers=headers)
+
+# Simulación anual: un perfil horario (temperatura ambiente y carga) se evalúa agrupando las horas en bins de
+# temperatura de condensación. Cada bin se calcula una vez con calculate_cycle sobre la caché de nodos (los
+# estados del evaporador se comparten entre bins y entre simulaciones) y las series horarias salen de
+# operaciones vectoriales sobre los resultados por bin; no se calcula curva de saturación ni capilar.
+SIM_MAX_HOURS = int(os.environ.get('THERMO_SIM_MAX_HOURS', 8784))
+SIM_MAX_BYTES = int(os.environ.get('THERMO_SIM_MAX_BYTES', 4 * 1024 * 1024))
+SIM_BIN = float(os.environ.get('THERMO_SIM_BIN', 0.1))
+SIM_APPROACH = 10.0
+SIM_MIN_LIFT = 10.0
+SIM_CSV_CHUNK = 500
+SIM_AMBIENT_COLUMNS = ('ambient', 'ambiente', 'temp')
+SIM_LOAD_COLUMNS = ('load', 'carga')
+SIM_SERIES = ['ambient_temp_c', 'load_w', 'cond_temp_c', 'cop', 'compressor_w', 'mass_flow_kg_s', 'discharge_temp_c']
+BTU_PER_WH = 3.412142
+
+def parse_hourly_profile(text):
+    """Temperatura ambiente (°C) y carga por hora desde un CSV.
+
+    Con encabezado se buscan las columnas por nombre (ambient/temp y load/carga); sin encabezado se toman
+    ambiente y carga de las dos primeras columnas, o de la segunda y tercera si hay una columna de hora.
+    """
+    rows = [row for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+    if not rows:
+        raise ValueError("El perfil está vacío")
+    try:
+        [float(cell) for cell in rows[0]]
+        ambient, load = (0, 1) if len(rows[0]) == 2 else (1, 2)
+    except ValueError:
+        names = [cell.strip().lower() for cell in rows.pop(0)]
+        ambient = next((i for i, name in enumerate(names) if any(k in name for k in SIM_AMBIENT_COLUMNS)), None)
+        load = next((i for i, name in enumerate(names) if any(k in name for k in SIM_LOAD_COLUMNS)), None)
+        if ambient is None or load is None:
+            raise ValueError("El CSV debe tener una columna de temperatura ambiente y una de carga")
+    if not rows:
+        raise ValueError("El perfil no tiene filas de datos")
+    if len(rows) > SIM_MAX_HOURS:
+        raise ValueError(f"El perfil tiene {len(rows)} horas; el máximo es {SIM_MAX_HOURS}")
+    try:
+        values = np.array([(float(row[ambient]), float(row[load])) for row in rows], dtype=np.float64)
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"Fila inválida en el perfil: {e}") from None
+    if not np.isfinite(values).all():
+        raise ValueError("El perfil contiene valores no numéricos")
+    if (values[:, 1] < 0).any():
+        raise ValueError("La carga no puede ser negativa")
+    return values[:, 0], values[:, 1]
+
+def simulate_annual(refrigerant, ambient_c, load_w, evap_temp, approach, min_cond_temp, superheat, subcooling,
+                    backend='HEOS', bin_width=SIM_BIN):
+    """Series horarias (SIM_SERIES) y resumen estacional; las horas cuyo bin no se puede calcular quedan en NaN."""
+    cond_temp = np.maximum(ambient_c + 273.15 + approach, min_cond_temp)
+    # Bins en °C, como quantize: un perfil en grados enteros cae justo en sus temperaturas y no medio bin abajo
+    cond_temp_c = np.round(np.round((cond_temp - 273.15) / bin_width) * bin_width, 9)
+    bins, inverse = np.unique(cond_temp_c + 273.15, return_inverse=True)
+    evaluation = CycleEvaluation(node_cache)
+    per_bin = np.full((bins.size, 4), np.nan)
+    failures = {}
+    with stage('cycle'):
+        for i, t_cond in enumerate(bins.tolist()):
+            check_deadline()
+            try:
+                points, cop = calculate_cycle(refrigerant, evap_temp, t_cond, superheat, subcooling, backend, evaluation)
+            except CalculationTimeout:
+                raise
+            except Exception as e:
+                failures.setdefault(str(e), []).append(i)
+                continue
+            per_bin[i] = (points['2']['enthalpy'] - points['1']['enthalpy'],
+                          points['3']['enthalpy'] - points['2']['enthalpy'], points['3']['temperature'], cop)
+
+    q_evap, w_specific, discharge_temp, cop = per_bin[inverse].T
+    valid = np.isfinite(q_evap) & (q_evap > 0)
+    mass_flow = np.full(load_w.shape, np.nan)
+    np.divide(load_w, q_evap, out=mass_flow, where=valid)
+    compressor_w = mass_flow * w_specific
+    series = {
+        'ambient_temp_c': ambient_c,
+        'load_w': load_w,
+        'cond_temp_c': np.round(bins[inverse] - 273.15, 6),
+        'cop': np.where(valid, cop, np.nan),
+        'compressor_w': compressor_w,
+        'mass_flow_kg_s': mass_flow,
+        'discharge_temp_c': np.where(valid, discharge_temp - 273.15, np.nan)
+    }
+
+    served = valid & (load_w > 0)
+    cooling_kwh = float(load_w[served].sum()) / 1000
+    compressor_kwh = float(compressor_w[served].sum()) / 1000
+    seasonal_cop = cooling_kwh / compressor_kwh if compressor_kwh > 0 else None
+    peak = lambda values: (int(np.nanargmax(values)) if served.any() else None)
+    peak_flow_hour, peak_power_hour = peak(np.where(served, mass_flow, np.nan)), peak(np.where(served, compressor_w, np.nan))
+    nodes = evaluation.report()
+    summary = {
+        'hours': int(load_w.size),
+        'active_hours': int((load_w > 0).sum()),
+        'unserved_hours': int(((~valid) & (load_w > 0)).sum()),
+        'cooling_kwh': cooling_kwh,
+        'unserved_cooling_kwh': float(load_w[(~valid) & (load_w > 0)].sum()) / 1000,
+        'compressor_kwh': compressor_kwh,
+        'seasonal_cop': seasonal_cop,
+        'seer_btu_per_wh': seasonal_cop * BTU_PER_WH if seasonal_cop is not None else None,
+        'peak_mass_flow_kg_s': float(mass_flow[peak_flow_hour]) if peak_flow_hour is not None else None,
+        'peak_mass_flow_hour': peak_flow_hour,
+        'peak_compressor_w': float(compressor_w[peak_power_hour]) if peak_power_hour is not None else None,
+        'peak_compressor_hour': peak_power_hour,
+        'temperature_bins': int(bins.size),
+        'nodes_reused': nodes['reused'],
+        'nodes_computed': nodes['computed']
+    }
+    failures = [{'message': message, 'cond_temp_c': [round(bins[i] - 273.15, 3) for i in indices],
+                 'hours': int(np.isin(inverse, indices).sum())} for message, indices in failures.items()]
+    return series, summary, failures
+
+def iter_simulation_csv(series):
+    """Serie horaria como CSV, en bloques de SIM_CSV_CHUNK filas."""
+    yield ','.join(['hour'] + SIM_SERIES) + '\n'
+    columns = [series[name].tolist() for name in SIM_SERIES]
+    hours = len(columns[0])
+    for start in range(0, hours, SIM_CSV_CHUNK):
+        yield ''.join(
+            ','.join([str(hour)] + ['' if math.isnan(column[hour]) else f'{column[hour]:.6g}' for column in columns]) + '\n'
+            for hour in range(start, min(start + SIM_CSV_CHUNK, hours)))
+
+@app.route('/simulate/annual', methods=['POST'])
+def simulate_annual_energy():
+    """Perfil horario subido como archivo 'profile' (multipart), como cuerpo text/csv o en el campo 'profile' de un JSON."""
+    if request.content_length is not None and request.content_length > SIM_MAX_BYTES:
+        return jsonify({'status': 'error', 'message': f'El perfil excede {SIM_MAX_BYTES} bytes'}), 413
+    if 'profile' in request.files:
+        params = {**request.args.to_dict(), **request.form.to_dict()}
+        raw = request.files['profile'].read(SIM_MAX_BYTES + 1)
+    elif request.mimetype == 'text/csv':
+        params = request.args.to_dict()
+        raw = request.get_data()
+    else:
+        params = request.get_json(silent=True)
+        if not isinstance(params, dict) or not isinstance(params.get('profile'), str):
+            return jsonify({'status': 'error', 'message': 'Se espera un CSV horario en "profile"'}), 400
+        raw = params['profile']
+    if len(raw) > SIM_MAX_BYTES:
+        return jsonify({'status': 'error', 'message': f'El perfil excede {SIM_MAX_BYTES} bytes'}), 413
+    logger.info("Request received for /simulate/annual")
+
+    try:
+        ambient_c, load_w = parse_hourly_profile(raw.decode('utf-8-sig') if isinstance(raw, bytes) else raw)
+        refrigerant = params.get('refrigerant', 'R134a')
+        backend = resolve_backend(params.get('backend'))
+        evap_temp = finite_float(params.get('evap_temp', 243.15))
+        approach = finite_float(params.get('approach', SIM_APPROACH))
+        min_cond_temp = finite_float(params.get('min_cond_temp', evap_temp + SIM_MIN_LIFT))
+        superheat = finite_float(params.get('superheat', 0))
+        subcooling = finite_float(params.get('subcooling', 0))
+        bin_width = finite_float(params.get('bin', SIM_BIN))
+        load_w = load_w * convert_cooling_power(parse_cooling_power({'value': 1, 'unit': params.get('load_unit', 'W')}))[1]
+        if min_cond_temp <= evap_temp:
+            raise ValueError("min_cond_temp debe ser mayor que evap_temp")
+        if superheat < 0 or subcooling < 0:
+            raise ValueError("El sobrecalentamiento y subenfriamiento no pueden ser negativos")
+        if bin_width <= 0:
+            raise ValueError("bin debe ser positivo")
+    except UnicodeDecodeError:
+        return jsonify({'status': 'error', 'message': 'El perfil debe ser un CSV en UTF-8'}), 400
+    except (TypeError, ValueError, KeyError, AttributeError) as e:
+        logger.error("Datos de simulación inválidos: %s", str(e), exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Datos de entrada inválidos: {e}'}), 400
+    set_metrics_refrigerant(refrigerant)
+
+    series, summary, failures = run_bounded(simulate_annual, refrigerant, ambient_c, load_w, evap_temp, approach,
+                                            min_cond_temp, superheat, subcooling, backend, bin_width)
+    # NaN e infinitos no son JSON válido (ni en el cuerpo ni en X-Simulation-Summary): se envían como null
+    summary = {key: None if isinstance(value, float) and not math.isfinite(value) else value for key, value in summary.items()}
+    if summary['unserved_hours'] == summary['active_hours'] and summary['active_hours'] > 0:
+        return jsonify({'status': 'error', 'message': 'Ninguna hora del perfil se pudo calcular', 'failures': failures}), 422
+
+    wants_csv = request.args.get('format') == 'csv' or (
+        request.args.get('format') is None and request.accept_mimetypes.best_match(['application/json', 'text/csv']) == 'text/csv')
+    if wants_csv:
+        return Response(stream_with_context(iter_simulation_csv(series)), mimetype='text/csv', headers={
+            'Content-Disposition': 'attachment; filename=annual_simulation.csv',
+            'X-Simulation-Summary': json.dumps(summary, allow_nan=False)
+        })
+    nan_to_none = lambda values: [None if math.isnan(value) else value for value in values.tolist()]
+    return jsonify({
+        'status': 'success',
+        'refrigerant': refrigerant,
+        'backend': property_backend(refrigerant, backend),
+        'evap_temp': evap_temp,
+        'approach': approach,
+        'min_cond_temp': min_cond_temp,
+        'superheat': superheat,
+        'subcooling': subcooling,
+        'summary': summary,
+        'failures': failures,
+        'series': {name: nan_to_none(series[name]) for name in SIM_SERIES}
+    })
+
+# Punto de equilibrio con un capilar fijo (problema inverso de /thermo): dadas las temperaturas de la cámara y del
+# ambiente, la conductancia UA (W/K) del evaporador y del condensador y el capilar (diámetro y longitud), busca las
+# temperaturas de evaporación y condensación en las que coinciden tres caudales: el que deja pasar el capilar (la
+# relación de calculate_capillary_lengths despejada para ṁ), el que evapora el evaporador, UA_e·(T_cámara - T_evap) /
+# (h2 - h1), y el que condensa el condensador, UA_c·(T_cond - T_amb) / (h3 - h4). Las iteraciones evalúan el ciclo
+# de calculate_cycle_coolprop sobre tablas (balance_cycle_table, decenas de µs; las mezclas y los CSV usan
+# calculate_cycle, que ya es tabulado) y la solución se verifica con calculate_cycle y el backend pedido,
+# corrigiéndola con Broyden si el residuo exacto supera la tolerancia. Newton amortiguado en (T_evap, T_cond); si no
+# converge, Brent anidado (T_cond que balancea el condensador para cada T_evap, dentro de un Brent sobre T_evap).
+SOLVE_BACKEND = os.environ.get('THERMO_SOLVE_BACKEND', 'BICUBIC')
+SOLVE_TOLERANCE = float(os.environ.get('THERMO_SOLVE_TOLERANCE', 1e-6))
+SOLVE_MAX_ITER = int(os.environ.get('THERMO_SOLVE_MAX_ITER', 30))
+SOLVE_MAX_DESIGNS = int(os.environ.get('THERMO_SOLVE_MAX_DESIGNS', 1000))
+SOLVE_SPAN = 60.0
+# Separación mínima (K) de la cámara y del ambiente: en el extremo inferior de T_cond el condensador debe rechazar
+# menos calor del que trae el evaporador en el extremo superior de T_evap (vale mientras UA_c < ~100·UA_e)
+SOLVE_EVAP_MARGIN = 1.0
+SOLVE_COND_MARGIN = 0.01
+SOLVE_STEP = 1e-3
+SOLVE_MAX_STEP = 10.0
+SOLVE_POLISH_MAX_ITER = 4
+SOLVE_BRENT_XTOL = 1e-7
+SOLVE_BRACKET_XTOL = 0.05
+# fc(T) se anula a 20 °C de evaporación: por encima el capilar no tiene caudal en la relación de la tabla
+SOLVE_MAX_EVAP_TEMP = 293.15
+
+def parse_balance_design(data):
+    """Valida un diseño de /solve/balance y devuelve sus entradas (temperaturas en K, diámetro en m); lanza ValueError."""
+    if not isinstance(data, dict):
+        raise ValueError("Cada diseño debe ser un objeto JSON")
+    capillary = data.get('capillary')
+    if not isinstance(capillary, dict):
+        raise ValueError("Falta 'capillary' con diameter_mm y length_m")
+    try:
+        design = {
+            'refrigerant': data.get('refrigerant', 'R134a'),
+            'backend': resolve_backend(data.get('backend')),
+            'box_temp': float(data['box_temp']),
+            'ambient_temp': float(data['ambient_temp']),
+            'evaporator_ua': float(data['evaporator_ua']),
+            'condenser_ua': float(data['condenser_ua']),
+            'diameter': float(capillary['diameter_mm']) / 1000,
+            'length': float(capillary['length_m']),
+            'superheat': float(data.get('superheat', 0)),
+            'subcooling': float(data.get('subcooling', 0))
+        }
+        guess = data.get('initial_guess')
+        if guess is not None:
+            design['initial_guess'] = (float(guess['evap_temp']), float(guess['cond_temp']))
+    except KeyError as e:
+        raise ValueError(f"Falta el campo {e.args[0]}") from None
+    numbers = [value for value in design.values() if isinstance(value, float)] + list(design.get('initial_guess', ()))
+    if not all(math.isfinite(value) for value in numbers):
+        raise ValueError("Los valores numéricos deben ser finitos")
+    if design['ambient_temp'] <= design['box_temp']:
+        raise ValueError("La temperatura ambiente debe ser mayor que la de la cámara")
+    if min(design['evaporator_ua'], design['condenser_ua'], design['diameter'], design['length']) <= 0:
+        raise ValueError("evaporator_ua, condenser_ua, diameter_mm y length_m deben ser positivos")
+    if design['superheat'] < 0 or design['subcooling'] < 0:
+        raise ValueError("El sobrecalentamiento y subenfriamiento no pueden ser negativos")
+    if normalize_refrigerant_name(design['refrigerant']) not in current_data().table:
+        raise ValueError(f"No hay constantes capilares para {design['refrigerant']}")
+    return design
+
+def balance_bounds(design):
+    """Intervalos de búsqueda ((T_evap mín, máx), (T_cond mín, máx)) en K, dentro del domo del refrigerante."""
+    dome = get_saturation_dome(design['refrigerant'], design['backend'])
+    # Con deslizamiento el evaporador llega a la burbuja a su presión de rocío y el condensador al rocío a su presión
+    # de burbuja: los extremos se acotan para que ambos lados queden dentro del domo
+    evap_low = float(np.interp(dome['pressure_bubble'][0], dome['pressure_dew'], dome['temperature'])) + 1
+    cond_high = float(np.interp(dome['pressure_dew'][-1], dome['pressure_bubble'], dome['temperature'])) - 1
+    evap = (max(evap_low, design['box_temp'] - SOLVE_SPAN), min(design['box_temp'], SOLVE_MAX_EVAP_TEMP) - SOLVE_EVAP_MARGIN)
+    cond = (design['ambient_temp'] + SOLVE_COND_MARGIN, min(cond_high, design['ambient_temp'] + SOLVE_SPAN))
+    if evap[0] >= evap[1] or cond[0] >= cond[1]:
+        raise ValueError(f"Temperaturas de cámara o ambiente fuera de rango para {design['refrigerant']}")
+    return evap, cond
+
+def balance_cycle_table(refrigerant, evap_temp, cond_temp, superheat, subcooling, backend, table_backend, cache=None):
+    """Estados 1-4 y COP de calculate_cycle_coolprop sobre tablas, para iterar el balance.
+
+    La saturación y el líquido subenfriado se interpolan en el domo (el líquido a T_cond - subenfriamiento, sin la
+    corrección por presión); el vapor sobrecalentado se evalúa con la fase impuesta y la descarga isentrópica con el
+    backend tabulado. P-S es exacto en las tablas de CoolProp, pero P-T cerca de la saturación puede caer en la fase
+    equivocada (y con la fase impuesta, fallar), por eso el líquido sale del domo y no de las tablas.
+    """
+    dome = get_saturation_dome(refrigerant, backend)
+    temps = dome['temperature']
+    def evaporator():
+        p1 = float(np.interp(evap_temp, temps, dome['pressure_dew']))
+        if superheat == 0:
+            return p1, float(np.interp(evap_temp, temps, dome['h_vapor'])), float(np.interp(evap_temp, temps, dome['s_vapor']))
+        h2, s2 = state_props(refrigerant, CP.PT_INPUTS, p1, evap_temp + superheat, CP.iHmass, CP.iSmass,
+                             backend=backend, phase=CP.iphase_gas)
+        return p1, h2, s2
+    p1, h2, s2 = _memo(cache, ('balance_evap', refrigerant, backend, evap_temp, superheat), evaporator)
+    def condenser():
+        liquid_temp = cond_temp - subcooling
+        return (float(np.interp(cond_temp, temps, dome['pressure_bubble'])), float(np.interp(liquid_temp, temps, dome['h_liquid'])),
+                float(np.interp(liquid_temp, temps, dome['density_liquid'])))
+    p4, h4, rho4 = _memo(cache, ('balance_cond', refrigerant, backend, cond_temp, subcooling), condenser)
+    h3 = _memo(cache, ('balance_h3', refrigerant, table_backend, p4, s2),
+               lambda: state_props(refrigerant, CP.PSmass_INPUTS, p4, s2, CP.iHmass, backend=table_backend))
+    points = {
+        '1': {'pressure': p1, 'enthalpy': h4, 'temperature': evap_temp},
+        '2': {'pressure': p1, 'enthalpy': h2, 'temperature': evap_temp + superheat},
+        '3': {'pressure': p4, 'enthalpy': h3},
+        '4': {'pressure': p4, 'enthalpy': h4, 'temperature': cond_temp - subcooling, 'density': rho4}
+    }
+    return points, (h2 - h4) / (h3 - h2)
+
+def balance_residuals(design, evap_temp, cond_temp, cycle):
+    """Desbalance de caudales en (T_evap, T_cond): (ln ṁ_capilar/ṁ_evap, ln ṁ_cond/ṁ_evap) y el estado del ciclo.
+
+    `cycle(T_evap, T_cond)` devuelve (puntos, COP) como calculate_cycle.
+    """
+    refrigerant = design['refrigerant']
+    points, cop = cycle(evap_temp, cond_temp)
+    cooling = design['evaporator_ua'] * (design['box_temp'] - evap_temp)
+    rejection = design['condenser_ua'] * (cond_temp - design['ambient_temp'])
+    q_evap = points['2']['enthalpy'] - points['1']['enthalpy']
+    q_cond = points['3']['enthalpy'] - points['4']['enthalpy']
+    # C interpolada entre columnas: con la columna escalonada el residuo sería discontinuo en la potencia
+    C = get_capillary_constant(refrigerant, convert_cooling_power({'value': cooling, 'unit': 'W'})[0], interpolate=True)
+    fc = capillary_correction_factor(evap_temp - 273.15)
+    capillary_flow = capillary_flow_capacity(points['4']['pressure'] - points['1']['pressure'], points['4']['density'],
+                                             C, design['diameter']) * fc / design['length']
+    if min(cooling, rejection, q_evap, q_cond, capillary_flow) <= 0:
+        raise ValueError(f"Punto fuera del dominio del balance (T_evap={evap_temp:.2f} K, T_cond={cond_temp:.2f} K)")
+    mass_flow = cooling / q_evap
+    residuals = np.array([math.log(capillary_flow / mass_flow), math.log(rejection / q_cond / mass_flow)])
+    return residuals, {'points': points, 'cop': cop, 'mass_flow': mass_flow, 'cooling': cooling, 'rejection': rejection,
+                       'capillary_constant': C, 'correction_factor': fc}
+
+def brent_root(f, a, b, xtol=SOLVE_BRENT_XTOL, ftol=0.0, max_iter=100, fa=None, fb=None):
+    """Raíz de f en [a, b] por el método de Brent (f(a) y f(b) de signo opuesto); devuelve (x, iteraciones).
+
+    `fa` y `fb` evitan volver a evaluar los extremos si ya se conocen.
+    """
+    fa = f(a) if fa is None else fa
+    fb = f(b) if fb is None else fb
+    if fa * fb > 0:
+        raise ValueError("El intervalo no encierra una raíz")
+    if abs(fa) < abs(fb):
+        a, b, fa, fb = b, a, fb, fa
+    c, fc, d, bisected = a, fa, a, True
+    for iteration in range(max_iter):
+        if fb == 0 or abs(fb) <= ftol or abs(b - a) < xtol:
+            return b, iteration
+        if fa != fc and fb != fc:
+            s = (a * fb * fc / ((fa - fb) * (fa - fc)) + b * fa * fc / ((fb - fa) * (fb - fc))
+                 + c * fa * fb / ((fc - fa) * (fc - fb)))
+        else:
+            s = b - fb * (b - a) / (fb - fa)
+        low, high = sorted(((3 * a + b) / 4, b))
+        if (not low < s < high or (bisected and abs(s - b) >= abs(b - c) / 2)
+                or (not bisected and abs(s - b) >= abs(c - d) / 2)
+                or (bisected and abs(b - c) < xtol) or (not bisected and abs(c - d) < xtol)):
+            s, bisected = (a + b) / 2, True
+        else:
+            bisected = False
+        fs = f(s)
+        d, c, fc = c, b, fb
+        if fa * fs < 0:
+            b, fb = s, fs
+        else:
+            a, fa = s, fs
+        if abs(fa) < abs(fb):
+            a, b, fa, fb = b, a, fb, fa
+    raise ValueError("Brent no convergió")
+
+def balance_jacobian(residuals, x, r, bounds):
+    """Jacobiano del desbalance por diferencias finitas hacia adelante (hacia atrás en el borde superior)."""
+    J = np.empty((2, 2))
+    for j in range(2):
+        step = SOLVE_STEP if x[j] + SOLVE_STEP <= bounds[j][1] else -SOLVE_STEP
+        shifted = x.copy()
+        shifted[j] += step
+        J[:, j] = (residuals(shifted)[0] - r) / step
+    return J
+
+def solve_balance_newton(residuals, x0, bounds):
+    """Newton amortiguado (paso acotado a SOLVE_MAX_STEP y partido a la mitad hasta reducir el residuo).
+
+    Devuelve (x, iteraciones) o None si no converge o sale del dominio.
+    """
+    low, high = np.array([bound[0] for bound in bounds]), np.array([bound[1] for bound in bounds])
+    x = np.clip(np.asarray(x0, dtype=np.float64), low, high)
+    try:
+        r = residuals(x)[0]
+        for iteration in range(SOLVE_MAX_ITER + 1):
+            if np.max(np.abs(r)) <= SOLVE_TOLERANCE:
+                return x, iteration
+            step = -np.linalg.solve(balance_jacobian(residuals, x, r, bounds), r)
+            step *= min(1.0, SOLVE_MAX_STEP / np.max(np.abs(step)))
+            for _ in range(12):
+                candidate = np.clip(x + step, low, high)
+                try:
+                    r_candidate = residuals(candidate)[0]
+                    if np.max(np.abs(r_candidate)) < np.max(np.abs(r)):
+                        break
+                except ValueError:
+                    pass
+                step /= 2
+            else:
+                return None
+            x, r = candidate, r_candidate
+    except (ValueError, np.linalg.LinAlgError) as e:
+        logger.debug("Newton del balance abandonado: %s", str(e))
+    return None
+
+def solve_balance_brent(residuals, bounds):
+    """Brent anidado: T_cond que balancea el condensador para cada T_evap, y T_evap que balancea el capilar."""
+    inner_iterations = []
+    def balanced_cond_temp(evap_temp):
+        condenser = lambda t: residuals(np.array([evap_temp, t]))[0][1]
+        low, high = bounds[1]
+        f_low, f_high = condenser(low), condenser(high)
+        if f_low * f_high > 0:
+            raise ValueError(f"el condensador no se balancea entre {low - 273.15:.1f} y {high - 273.15:.1f} °C")
+        cond_temp, iterations = brent_root(condenser, low, high, ftol=SOLVE_TOLERANCE / 10, fa=f_low, fb=f_high)
+        inner_iterations.append(iterations)
+        return cond_temp
+    capillary = lambda t: residuals(np.array([t, balanced_cond_temp(t)]))[0][0]
+    def feasible(evap_temp):
+        try:
+            return capillary(evap_temp)
+        except ValueError:
+            return None
+    low, high = bounds[0]
+    f_high = capillary(high)
+    # Con la evaporación más fría el condensador puede no balancearse en su rango: se sube el extremo inferior hasta
+    # un punto factible y, si ahí no hay cambio de signo, se acerca al límite por si la raíz queda entre ambos
+    f_low, infeasible = feasible(low), None
+    while f_low is None and high - low > SOLVE_STEP:
+        infeasible, low = low, (low + high) / 2
+        f_low = feasible(low)
+    if f_low is None:
+        raise ValueError("el condensador no se balancea en el rango de búsqueda")
+    while infeasible is not None and f_low * f_high > 0 and low - infeasible > SOLVE_BRACKET_XTOL:
+        middle = (infeasible + low) / 2
+        f_middle = feasible(middle)
+        if f_middle is None:
+            infeasible = middle
+        else:
+            low, f_low = middle, f_middle
+    if f_low * f_high > 0:
+        raise ValueError(
+            f"el capilar deja pasar {'más' if f_low > 0 else 'menos'} caudal del que evapora el evaporador con la "
+            f"evaporación entre {low - 273.15:.1f} y {high - 273.15:.1f} °C; pruebe un capilar "
+            f"{'más largo o más fino' if f_low > 0 else 'más corto o más grueso'}")
+    evap_temp, iterations = brent_root(capillary, low, high, ftol=SOLVE_TOLERANCE / 2, fa=f_low, fb=f_high)
+    return np.array([evap_temp, balanced_cond_temp(evap_temp)]), iterations + sum(inner_iterations)
+
+def polish_balance(evaluate, x, bounds):
+    """Lleva la solución de las tablas al residuo exacto (calculate_cycle con el backend pedido).
+
+    Broyden desde el jacobiano de las tablas, una evaluación exacta por paso; si no converge en SOLVE_POLISH_MAX_ITER
+    pasos, Newton con evaluaciones exactas. Devuelve (x, residuo, detalles, pasos).
+    """
+    low, high = np.array([bound[0] for bound in bounds]), np.array([bound[1] for bound in bounds])
+    exact = lambda x: evaluate(x, 'exact')
+    r, details = exact(x)
+    J = None
+    steps = 0
+    try:
+        while np.max(np.abs(r)) > SOLVE_TOLERANCE and steps < SOLVE_POLISH_MAX_ITER:
+            J = balance_jacobian(evaluate, x, evaluate(x)[0], bounds) if J is None else J
+            step = np.clip(x - np.linalg.solve(J, r), low, high) - x
+            if not step.any():
+                break
+            r_new, details_new = exact(x + step)
+            J += np.outer(r_new - r - J @ step, step) / (step @ step)
+            x, r, details = x + step, r_new, details_new
+            steps += 1
+    except (ValueError, np.linalg.LinAlgError) as e:
+        logger.debug("Corrección de Broyden abandonada: %s", str(e))
+    if np.max(np.abs(r)) > SOLVE_TOLERANCE:
+        solution = solve_balance_newton(exact, x, bounds)
+        if solution is not None:
+            x, newton_steps = solution
+            r, details = exact(x)
+            steps += newton_steps
+    return x, r, details, steps
+
+def solve_balance_design(data, warm_start=None):
+    """Resuelve un diseño de /solve/balance; devuelve (cuerpo, código HTTP).
+
+    `warm_start` ((T_evap, T_cond) de un diseño anterior del mismo refrigerante) es el punto de partida de Newton
+    si el diseño no trae initial_guess.
+    """
+    started = time.perf_counter()
+    try:
+        design = parse_balance_design(data)
+        bounds = balance_bounds(design)
+    except (TypeError, ValueError) as e:
+        logger.error("Diseño de balance inválido: %s", str(e))
+        return {'status': 'error', 'message': f'Datos de entrada inválidos: {e}'}, 400
+
+    refrigerant, backend = design['refrigerant'], design['backend']
+    superheat, subcooling = design['superheat'], design['subcooling']
+    cache = {}
+    exact_cycle = lambda evap_temp, cond_temp: calculate_cycle(refrigerant, evap_temp, cond_temp, superheat, subcooling,
+                                                               backend, cache)
+    # Las mezclas y los refrigerantes de los CSV ya se calculan sobre tablas: se itera directamente con calculate_cycle
+    table_backend = None
+    if not is_mixture_blend(refrigerant) and refrigerant not in current_data().custom:
+        try:
+            table_backend = resolve_backend(SOLVE_BACKEND)
+            get_state(refrigerant, table_backend)
+        except ValueError as e:
+            logger.warning("Sin tablas %s para %s, se usa %s: %s", SOLVE_BACKEND, refrigerant, backend, str(e))
+            table_backend = backend
+    cycles = {'exact': exact_cycle, 'table': exact_cycle if table_backend is None else (
+        lambda evap_temp, cond_temp: balance_cycle_table(refrigerant, evap_temp, cond_temp, superheat, subcooling,
+                                                         backend, table_backend, cache))}
+    evaluations = {'table': 0, 'exact': 0}
+    def evaluate(x, kind='table'):
+        evaluations[kind] += 1
+        return balance_residuals(design, float(x[0]), float(x[1]), cycles[kind])
+
+    x0 = design.get('initial_guess') or warm_start or (design['box_temp'] - 10, design['ambient_temp'] + 10)
+    method = 'newton'
+    try:
+        with stage('solve'):
+            solution = solve_balance_newton(evaluate, x0, bounds)
+            if solution is None:
+                method = 'brent'
+                solution = solve_balance_brent(evaluate, bounds)
+            x, iterations = solution
+
+            if table_backend is None:
+                r, details = evaluate(x)
+                polish = 0
+            else:
+                x, r, details, polish = polish_balance(evaluate, x, bounds)
+    except CalculationTimeout:
+        raise
+    except (ValueError, np.linalg.LinAlgError) as e:
+        logger.warning("Sin punto de equilibrio para %s: %s", refrigerant, str(e))
+        return {'status': 'error', 'message': f'No se encontró el punto de equilibrio en el rango de búsqueda: {e}',
+                'convergence': {'converged': False, 'method': method, 'evaluations': sum(evaluations.values()),
+                                'elapsed_ms': (time.perf_counter() - started) * 1000}}, 422
+
+    residual = float(np.max(np.abs(r)))
+    convergence = {
+        'converged': residual <= SOLVE_TOLERANCE,
+        'method': method,
+        'iterations': iterations,
+        'polish_iterations': polish,
+        'evaluations': evaluations['table'],
+        'exact_evaluations': evaluations['exact'],
+        'table_backend': table_backend,
+        'residual': residual,
+        'tolerance': SOLVE_TOLERANCE,
+        'elapsed_ms': (time.perf_counter() - started) * 1000
+    }
+    if not convergence['converged']:
+        # Cerca del punto crítico las tablas pueden dar un equilibrio que el backend exacto no confirma
+        message = 'El balance no convergió a la tolerancia pedida' + (' con el backend exacto' if table_backend else '')
+        return {'status': 'error', 'message': message, 'convergence': convergence}, 422
+
+    points = details['points']
+    mass_flow = details['mass_flow']
+    response = {
+        'status': 'success',
+        'refrigerant': refrigerant,
+        'backend': property_backend(refrigerant, backend, float(x[0]), float(x[1])),
+        'box_temp': design['box_temp'],
+        'ambient_temp': design['ambient_temp'],
+        'superheat': design['superheat'],
+        'subcooling': design['subcooling'],
+        'evap_temp': float(x[0]),
+        'cond_temp': float(x[1]),
+        'mass_flow': mass_flow,
+        'cooling_capacity_w': details['cooling'],
+        'heat_rejection_w': details['rejection'],
+        'compressor_w': mass_flow * (points['3']['enthalpy'] - points['2']['enthalpy']),
+        'cop': details['cop'],
+        'points': points,
+        'capillary': {
+            'diameter_mm': design['diameter'] * 1000,
+            'length_m': design['length'],
+            'constant': details['capillary_constant'],
+            'correction_factor': details['correction_factor']
+        },
+        'convergence': convergence
+    }
+    if response['backend'] == BLEND_BACKEND and is_mixture_blend(refrigerant):
+        response['glide'] = blend_glide(refrigerant, points['1']['pressure'], points['4']['pressure'])
+    return response, 200
+
+def solve_balance_batch(items):
+    """Resuelve los diseños en orden; cada uno arranca desde la solución del anterior con el mismo refrigerante."""
+    outcomes = []
+    warm_starts = {}
+    for item in items:
+        check_deadline()
+        refrigerant = item.get('refrigerant', 'R134a') if isinstance(item, dict) else None
+        body, status_code = solve_balance_design(item, warm_starts.get(refrigerant))
+        if status_code == 200:
+            warm_starts[body['refrigerant']] = (body['evap_temp'], body['cond_temp'])
+        outcomes.append((body, status_code))
+    return outcomes
+
+@app.route('/solve/balance', methods=['POST'])
+def solve_balance_point():
+    """Un diseño como objeto JSON, o {'designs': [...]} con los campos comunes a todos los diseños al nivel superior."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': 'Se espera un diseño o una lista "designs" en JSON'}), 400
+    if 'designs' not in data:
+        logger.info("Request received for /solve/balance")
+        set_metrics_refrigerant(data.get('refrigerant', 'R134a'))
+        body, status_code = run_bounded(solve_balance_design, data)
+        return jsonify(body), status_code
+
+    designs = data['designs']
+    if not isinstance(designs, list) or not designs:
+        return jsonify({'status': 'error', 'message': 'designs debe ser una lista no vacía'}), 400
+    if len(designs) > SOLVE_MAX_DESIGNS:
+        return jsonify({'status': 'error', 'message': f'El lote excede el máximo de {SOLVE_MAX_DESIGNS} diseños'}), 400
+    logger.info("Request received for /solve/balance with %s designs", len(designs))
+    shared = {key: value for key, value in data.items() if key != 'designs'}
+    items = [{**shared, **design} if isinstance(design, dict) else design for design in designs]
+
+    started = time.perf_counter()
+    outcomes = run_bounded(solve_balance_batch, items)
+    elapsed = time.perf_counter() - started
+    results = [{'index': i, 'http_status': status_code, **body} for i, (body, status_code) in enumerate(outcomes)]
+    solved = [item['convergence'] for item in results if item['status'] == 'success']
+    iterations = [stats['iterations'] for stats in solved]
+    return jsonify({
+        'status': 'success',
+        'count': len(results),
+        'succeeded': len(solved),
+        'failed': len(results) - len(solved),
+        'convergence': {
+            'newton': sum(1 for stats in solved if stats['method'] == 'newton'),
+            'brent': sum(1 for stats in solved if stats['method'] == 'brent'),
+            'mean_iterations': sum(iterations) / len(iterations) if iterations else None,
+            'max_iterations': max(iterations, default=None),
+            'evaluations': sum(stats['evaluations'] + stats['exact_evaluations'] for stats in solved),
+            'elapsed_ms': elapsed * 1000,
+            'ms_per_design': elapsed * 1000 / len(results)
+        },
+        'results': results
+    })
+
+# Carga de datos por API: mezclas propias (filas con el formato de refrigerants.csv) y constantes capilares (filas
+# con el formato de capillary_constants.csv). Se validan compilándolas igual que al arrancar, se fusionan en los
+# CSV (una fila nueva reemplaza a las del mismo refrigerante) y se publica el store recompilado. Los demás workers
+# ven el cambio de los archivos en su próxima revisión. Sin THERMO_DATA_TOKEN la carga está deshabilitada.
+DATA_TOKEN = os.environ.get('THERMO_DATA_TOKEN', '')
+DATA_UPLOAD_MAX_BYTES = int(os.environ.get('THERMO_DATA_MAX_BYTES', 1024 * 1024))
+DATA_NAME_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9().+\-]{0,31}')
+
+def read_uploaded_csv(raw, filename):
+    """(cabecera, filas) de un CSV subido; las filas vacías se descartan."""
+    try:
+        rows = [row for row in csv.reader(io.StringIO(raw.decode('utf-8-sig'))) if any(cell.strip() for cell in row)]
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ValueError(f"{filename}: CSV ilegible ({e})") from None
+    if len(rows) < 2:
+        raise ValueError(f"{filename}: se espera una cabecera y al menos una fila")
+    header = [cell.strip() for cell in rows[0]]
+    if any(len(row) > len(header) for row in rows[1:]):
+        raise ValueError(f"{filename}: hay filas con más columnas que la cabecera")
+    return header, rows[1:]
+
+def validate_refrigerant_entry(name, entry):
+    """Mensaje de error si las propiedades compiladas de un refrigerante no son físicamente coherentes."""
+    if entry['temperature'].size < 2:
+        return f"{name}: se necesitan al menos dos temperaturas"
+    if not all(np.isfinite(values).all() for values in entry.values()):
+        return f"{name}: hay valores no numéricos"
+    for key in ('pressure_bubble', 'pressure_dew'):
+        if not (entry[key] > 0).all() or not (np.diff(entry[key]) > 0).all():
+            return f"{name}: {key} debe ser positiva y creciente con la temperatura"
+    if not (entry['h_vapor'] > entry['h_liquid']).all():
+        return f"{name}: la entalpía del vapor debe superar a la del líquido"
+    if not ((entry['density_liquid'] > entry['density_vapor']) & (entry['density_vapor'] > 0)).all():
+        return f"{name}: se espera densidad del líquido > densidad del vapor > 0"
+    return None
+
+def is_coolprop_fluid(name):
+    if name in _known_fluids():
+        return True
+    try:
+        CP.get_fluid_param_string(name, 'name')
+        return True
+    except (RuntimeError, ValueError):
+        return False
+
+def prepare_data_upload(uploads):
+    """Valida los CSV subidos; devuelve {archivo: (cabecera, filas, nombres normalizados)} listo para fusionar."""
+    import pandas as pd
+
+    changes = {}
+    if 'properties' in uploads:
+        header, rows = read_uploaded_csv(uploads['properties'], 'properties')
+        required = ['Refrigerante', 'Temperatura (°C)'] + [column for _, column, _, _ in CSV_PROPERTY_COLUMNS]
+        missing = [column for column in required if column not in header]
+        if missing:
+            raise ValueError(f"properties: faltan columnas {missing}")
+        names = {row[header.index('Refrigerante')].strip() for row in rows}
+        for name in sorted(names):
+            if not DATA_NAME_PATTERN.fullmatch(name):
+                raise ValueError(f"properties: nombre de refrigerante inválido: {name!r}")
+            if is_coolprop_fluid(name):
+                raise ValueError(f"properties: {name} es un fluido de CoolProp; solo se cargan mezclas propias")
+        index = build_refrigerant_index(pd.read_csv(io.BytesIO(uploads['properties']), encoding='utf-8-sig'))
+        for name in sorted(names):
+            error = validate_refrigerant_entry(name, index[name]) if name in index else f"{name}: sin temperaturas válidas"
+            if error:
+                raise ValueError(f"properties: {error}")
+        changes['refrigerants.csv'] = (header, rows, {name: name for name in names})
+    if 'capillary' in uploads:
+        header, rows = read_uploaded_csv(uploads['capillary'], 'capillary')
+        if 'Refrigerant' not in header:
+            raise ValueError("capillary: falta la columna Refrigerant")
+        names = {normalize_refrigerant_name(row[header.index('Refrigerant')]): row[header.index('Refrigerant')].strip()
+                 for row in rows}
+        for name in sorted(names.values()):
+            if not DATA_NAME_PATTERN.fullmatch(name):
+                raise ValueError(f"capillary: nombre de refrigerante inválido: {name!r}")
+        table = build_capillary_table(pd.read_csv(io.BytesIO(uploads['capillary']), encoding='utf-8-sig'))
+        for key, name in sorted(names.items()):
+            if key not in table:
+                raise ValueError(f"capillary: {name} sin constantes válidas")
+            if not (table[key][1] > 0).all():
+                raise ValueError(f"capillary: {name}: las constantes deben ser positivas")
+        changes['capillary_constants.csv'] = (header, rows, names)
+    return changes
+
+def merge_data_file(path, header, rows, names):
+    """Reemplaza en `path` las filas de los refrigerantes `names` por `rows` (columnas por nombre; reemplazo atómico)."""
+    key, name_column = (normalize_refrigerant_name, 'Refrigerant') if path == 'capillary_constants.csv' else (str.strip, 'Refrigerante')
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        text = f.read()
+    existing = list(csv.reader(io.StringIO(text)))
+    file_header = [cell.strip() for cell in existing[0]]
+    unknown = [column for column in header if column and column not in file_header]
+    if unknown:
+        raise ValueError(f"{path}: columnas desconocidas {unknown}")
+    position = file_header.index(name_column)
+    kept = [row for row in existing[1:] if not row or key(row[position]) not in names]
+    added = [[dict(zip(header, row)).get(column, '').strip() for column in file_header] for row in rows]
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        # Se conserva el fin de línea del archivo (refrigerants.csv usa CRLF)
+        csv.writer(f, lineterminator='\r\n' if '\r\n' in text else '\n').writerows([existing[0]] + kept + added)
+    os.replace(tmp_path, path)
+
+@app.route('/data/refrigerants', methods=['POST'])
+def upload_refrigerant_data():
+    if not DATA_TOKEN:
+        return jsonify({'status': 'error', 'message': 'Carga de datos deshabilitada (THERMO_DATA_TOKEN)'}), 403
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {DATA_TOKEN}'.encode()):
+        return jsonify({'status': 'error', 'message': 'No autorizado'}), 401
+    if request.content_length is not None and request.content_length > 2 * DATA_UPLOAD_MAX_BYTES:
+        return jsonify({'status': 'error', 'message': f'Cada archivo puede tener hasta {DATA_UPLOAD_MAX_BYTES} bytes'}), 413
+    uploads = {field: request.files[field].read(DATA_UPLOAD_MAX_BYTES + 1)
+               for field in ('properties', 'capillary') if field in request.files}
+    if not uploads:
+        return jsonify({'status': 'error', 'message': "Se espera multipart con 'properties' y/o 'capillary'"}), 400
+    if any(len(raw) > DATA_UPLOAD_MAX_BYTES for raw in uploads.values()):
+        return jsonify({'status': 'error', 'message': f'Cada archivo puede tener hasta {DATA_UPLOAD_MAX_BYTES} bytes'}), 413
+
+    try:
+        changes = prepare_data_upload(uploads)
+        with data_store_lock():
+            for path, (header, rows, names) in changes.items():
+                merge_data_file(path, header, rows, names)
+            store = load_data_store()
+    except ValueError as e:
+        logger.warning("Carga de datos rechazada: %s", str(e))
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except OSError as e:
+        logger.error("Error escribiendo los datos: %s", str(e), exc_info=True)
+        return jsonify({'status': 'error', 'message': 'No se pudieron guardar los datos'}), 500
+    install_data_store(store)
+    return jsonify({
+        'status': 'success',
+        'version': store.version,
+        'refrigerants': sorted(changes.get('refrigerants.csv', (None, None, {}))[2].values()),
+        'capillary': sorted(changes.get('capillary_constants.csv', (None, None, {}))[2].values()),
+        'custom_refrigerants': list(store.custom)
+    })
+
+@app.route('/data', methods=['GET'])
+def get_data_info():
+    store = current_data()
+    return jsonify({
+        'status': 'success',
+        'version': store.version,
+        'origin': store.origin,
+        'loaded_at': store.loaded_at,
+        'custom_refrigerants': list(store.custom),
+        'capillary_refrigerants': len(store.table),
+        'snapshot': DATA_SNAPSHOT or None,
+        'watch': DATA_WATCH,
+        'upload': bool(DATA_TOKEN)
+    })
 
 @app.route('/')
 def serve_index():
     logger.info("Sirviendo index.html")
     return send_from_directory('.', 'index.html')
 
+# Arranque: precalentar antes de aceptar tráfico y congelar el heap (gc.freeze) para que un servidor pre-fork
+# que importe la app en el maestro (gunicorn --preload) comparta datos, AbstractState y domos copy-on-write.
+# prepare_worker() lo llaman gunicorn.conf.py y el servidor de desarrollo; importar el módulo (pruebas,
+# benchmarks, herramientas) no precalienta ni escribe cachés en disco salvo con THERMO_PREWARM_ON_START=1.
+PREWARM_ON_START = os.environ.get('THERMO_PREWARM_ON_START', '0').lower() in ('1', 'true', 'yes')
+PREWARM_SATURATION = os.environ.get('THERMO_PREWARM_SATURATION', '1').lower() in ('1', 'true', 'yes')
+# Envolventes de las mezclas: del disco en milisegundos; la primera vez se calculan (menos de un segundo por mezcla)
+PREWARM_BLENDS = os.environ.get('THERMO_PREWARM_BLENDS', '1').lower() in ('1', 'true', 'yes')
+# Tablas de THERMO_SOLVE_BACKEND para /solve/balance: unos 0.5 s por refrigerante desde el disco, pero generarlas la
+# primera vez puede tardar 15 s cada una; sin precalentar, la primera resolución de cada refrigerante paga la carga
+PREWARM_SOLVER = os.environ.get('THERMO_PREWARM_SOLVER', '0').lower() in ('1', 'true', 'yes')
+
+def prepare_worker(refrigerants=PREWARM_REFRIGERANTS, saturation=PREWARM_SATURATION):
+    started = time.perf_counter()
+    warm_property_engine(refrigerants, saturation)
+    if PREWARM_BLENDS and BLEND_MODEL == 'mixture':
+        warm_property_engine(list(BLEND_COMPOSITIONS))
+    if PREWARM_SOLVER:
+        warm_property_engine([r for r in refrigerants if not is_mixture_blend(r)], backend=SOLVE_BACKEND)
+    fluid_metadata_index()
+    STARTUP_TIMINGS['prewarm'] = time.perf_counter() - started
+    gc.collect()
+    gc.freeze()
+    logger.info("Arranque listo: datos desde %s en %.0f ms, precalentamiento de %s refrigerantes en %.0f ms",
+                DATA_SOURCE, STARTUP_TIMINGS['data'] * 1000, len(refrigerants), STARTUP_TIMINGS['prewarm'] * 1000)
+
+if PREWARM_ON_START:
+    prepare_worker()
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Servidor de desarrollo; en producción: gunicorn -c gunicorn.conf.py app:app
+    if not PREWARM_ON_START:
+        prepare_worker()
+    app.run(debug=os.environ.get('THERMO_DEBUG', '1').lower() in ('1', 'true', 'yes'), host='0.0.0.0', port=5000)
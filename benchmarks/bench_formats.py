@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Tamaño y tiempo de serialización de las respuestas de /thermo en cada formato.
+
+legacy es la serialización anterior (json de la biblioteca estándar vía el proveedor por defecto de Flask);
+los demás usan encode_thermo_body. Se mide sobre una respuesta ya calculada, sin caché.
+Uso: python benchmarks/bench_formats.py [--repeat 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('THERMO_LOG_LEVEL', 'WARNING')
+os.environ.setdefault('THERMO_PREWARM_ON_START', '0')
+
+CASES = [
+    {'refrigerant': 'R134a', 'evap_temp': 263.15, 'cond_temp': 313.15, 'superheat': 5, 'subcooling': 3},
+    {'refrigerant': 'R-454B', 'evap_temp': 263.15, 'cond_temp': 313.15, 'superheat': 5, 'subcooling': 3}
+]
+
+def time_per_call(fn, repeat):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import app as thermo_app
+    from flask.json.provider import DefaultJSONProvider
+    legacy_provider = DefaultJSONProvider(thermo_app.app)
+    formats = [fmt for fmt in thermo_app.THERMO_FORMATS if fmt != 'msgpack' or thermo_app.msgpack is not None]
+    encodings = ['gzip'] + (['br'] if thermo_app.brotli is not None else [])
+
+    print(f"orjson: {'sí' if thermo_app.orjson else 'no'}, msgpack: {'sí' if thermo_app.msgpack else 'no'}, "
+          f"brotli: {'sí' if thermo_app.brotli else 'no'}")
+    for case in CASES:
+        response, status_code = thermo_app.compute_thermo(case)
+        assert status_code == 200, response
+        encoders = {'legacy': lambda: legacy_provider.dumps(response).encode('utf-8')}
+        encoders.update({fmt: (lambda fmt=fmt: thermo_app.encode_thermo_body(response, fmt)) for fmt in formats})
+        legacy_us = time_per_call(encoders['legacy'], args.repeat)
+        legacy_bytes = len(encoders['legacy']())
+        print(f"\n{case['refrigerant']}")
+        print(f"{'formato':<14}{'bytes':>9}" + ''.join(f"{'+' + encoding:>9}" for encoding in encodings)
+              + f"{'µs':>10}{'x tiempo':>10}{'x bytes':>9}")
+        for name, encode in encoders.items():
+            body = encode()
+            elapsed = legacy_us if name == 'legacy' else time_per_call(encode, args.repeat)
+            compressed = [len(thermo_app.compress_body(body, encoding)) for encoding in encodings]
+            print(f"{name:<14}{len(body):>9}" + ''.join(f'{size:>9}' for size in compressed)
+                  + f"{elapsed:>10.1f}{legacy_us / elapsed:>10.1f}{legacy_bytes / min([len(body)] + compressed):>9.1f}")
+
+if __name__ == '__main__':
+    main()
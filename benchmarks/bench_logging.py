@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Compara la latencia de /thermo con el logging anterior (DEBUG síncrono, todos los payloads)
+y con el modo de producción (nivel configurable, QueueListener y muestreo de payloads).
+
+Cada modo corre en un subproceso porque el logging se configura al importar app.py.
+Uso: python benchmarks/bench_logging.py [--requests 300]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'legacy': {'THERMO_LOG_LEVEL': 'DEBUG', 'THERMO_LOG_ASYNC': '0', 'THERMO_LOG_SAMPLE_RATE': '1'},
+    'debug_async_sampled': {'THERMO_LOG_LEVEL': 'DEBUG', 'THERMO_LOG_ASYNC': '1', 'THERMO_LOG_SAMPLE_RATE': '100'},
+    'production': {'THERMO_LOG_LEVEL': 'INFO', 'THERMO_LOG_ASYNC': '1', 'THERMO_LOG_SAMPLE_RATE': '100'}
+}
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def run_worker(num_requests):
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import app as thermo_app
+    client = thermo_app.app.test_client()
+    payloads = [
+        {'refrigerant': refrigerant, 'evap_temp': 253.15 + (i % 40) * 0.5, 'cond_temp': 313.15,
+         'superheat': 5, 'subcooling': 3, 'cooling_power': {'value': 1000, 'unit': 'W'}}
+        for i in range(num_requests) for refrigerant in ['R134a', 'R-454B']
+    ]
+    for payload in payloads[:10]:
+        client.post('/thermo', json=payload)
+    latencies = []
+    for payload in payloads:
+        started = time.perf_counter()
+        client.post('/thermo', json=payload)
+        latencies.append(time.perf_counter() - started)
+    print(json.dumps({
+        'requests': len(latencies),
+        'mean_ms': sum(latencies) / len(latencies) * 1000,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        run_worker(args.requests)
+        return
+
+    results = {}
+    for mode, overrides in MODES.items():
+        env = dict(os.environ, THERMO_CACHE_SIZE='0', THERMO_NODE_CACHE_SIZE='0', THERMO_METRICS='0', **overrides)
+        # La salida de logging va a un archivo real para incluir el costo de E/S
+        with tempfile.TemporaryFile() as log_file:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', '--requests', str(args.requests)],
+                                    env=env, stdout=subprocess.PIPE, stderr=log_file, check=True, text=True).stdout
+            log_file.seek(0, os.SEEK_END)
+            log_bytes = log_file.tell()
+        results[mode] = dict(json.loads(output.strip().splitlines()[-1]), log_bytes=log_bytes)
+
+    print(f"{'modo':<22}{'media ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'log KiB':>12}")
+    for mode, result in results.items():
+        print(f"{mode:<22}{result['mean_ms']:>10.3f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['log_bytes'] / 1024:>12.1f}")
+    speedup = results['legacy']['mean_ms'] / results['production']['mean_ms']
+    print(f"production es {speedup:.1f}x más rápido que legacy en latencia media")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""Informe de arranque: tiempo hasta la primera respuesta y memoria por worker.
+
+Modos:
+  legacy            CSV leídos con pandas, sin precalentar (THERMO_SNAPSHOT='', THERMO_PREWARM_ON_START=0)
+  snapshot          datos mapeados desde data_snapshot.bin, sin pandas, sin precalentar
+  snapshot_prewarm  snapshot + precalentamiento de THERMO_PREWARM antes de aceptar tráfico (como gunicorn.conf.py)
+
+Cada modo arranca un intérprete nuevo (tiempo hasta la primera respuesta, RSS) y además simula un servidor
+pre-fork: el maestro importa la app y bifurca --workers hijos, que reportan su primera respuesta y su
+memoria privada (USS, las páginas no compartidas copy-on-write con el maestro).
+Uso: python benchmarks/bench_startup.py [--workers 4] [--runs 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'legacy': {'THERMO_SNAPSHOT': '', 'THERMO_PREWARM_ON_START': '0'},
+    'snapshot': {'THERMO_PREWARM_ON_START': '0'},
+    'snapshot_prewarm': {'THERMO_PREWARM_ON_START': '1'}
+}
+
+FIRST_REQUESTS = [
+    {'refrigerant': 'R410A', 'evap_temp': 263.15, 'cond_temp': 313.15, 'superheat': 5, 'subcooling': 3,
+     'cooling_power': {'value': 1000, 'unit': 'W'}},
+    {'refrigerant': 'R-454B', 'evap_temp': 263.15, 'cond_temp': 313.15, 'superheat': 5, 'subcooling': 3,
+     'cooling_power': {'value': 1000, 'unit': 'W'}}
+]
+
+def memory_kib():
+    """RSS y USS (Private_Clean + Private_Dirty) del proceso actual en KiB, desde /proc."""
+    memory = {'rss_kib': 0, 'uss_kib': 0}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, value = line.split(':', 1)
+                if name == 'Rss':
+                    memory['rss_kib'] = int(value.split()[0])
+                elif name in ('Private_Clean', 'Private_Dirty'):
+                    memory['uss_kib'] += int(value.split()[0])
+    except OSError:
+        import resource
+        memory['rss_kib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return memory
+
+def first_responses(thermo_app):
+    """Primera petición por refrigerante (ms) y el instante (time.time) en que terminó la primera de todas."""
+    client = thermo_app.app.test_client()
+    timings = {}
+    first_done_at = None
+    for payload in FIRST_REQUESTS:
+        started = time.perf_counter()
+        response = client.post('/thermo', json=payload)
+        timings[payload['refrigerant']] = (time.perf_counter() - started) * 1000
+        first_done_at = first_done_at or time.time()
+        if response.status_code != 200:
+            raise RuntimeError(f"{payload['refrigerant']}: HTTP {response.status_code}")
+    return timings, first_done_at
+
+def run_worker(launched_at):
+    started = time.perf_counter()
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import app as thermo_app
+    imported = time.perf_counter()
+    first_ms, first_done_at = first_responses(thermo_app)
+    print(json.dumps({
+        'import_ms': (imported - started) * 1000,
+        'first_request_ms': first_ms,
+        'time_to_first_response_ms': (first_done_at - launched_at) * 1000,
+        'data_source': thermo_app.DATA_SOURCE,
+        'pandas_loaded': 'pandas' in sys.modules,
+        **memory_kib()
+    }))
+
+def run_prefork(workers):
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import app as thermo_app
+    master = memory_kib()
+    reports = []
+    # Los hijos se miden de a uno para que no compitan por la CPU
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            report = {'first_request_ms': first_responses(thermo_app)[0], **memory_kib()}
+            os.write(write_fd, json.dumps(report).encode())
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            reports.append(json.loads(f.read()))
+        os.waitpid(pid, 0)
+    print(json.dumps({
+        'master_rss_kib': master['rss_kib'],
+        'worker_uss_kib': statistics.mean(report['uss_kib'] for report in reports),
+        'worker_first_request_ms': statistics.mean(report['first_request_ms'][FIRST_REQUESTS[0]['refrigerant']] for report in reports)
+    }))
+
+def launch(mode_env, args):
+    env = dict(os.environ, THERMO_LOG_LEVEL='WARNING', THERMO_CACHE_SIZE='0', **mode_env)
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--launched-at', str(time.time())] + args
+    output = subprocess.run(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='hijos bifurcados en la simulación pre-fork')
+    parser.add_argument('--runs', type=int, default=3, help='arranques en frío por modo (se reporta la mediana)')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--prefork', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--launched-at', type=float, default=0.0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        if args.prefork:
+            run_prefork(args.prefork)
+        else:
+            run_worker(args.launched_at)
+        return
+
+    # El primer arranque compila el snapshot si falta o está desactualizado; no se mide
+    launch(MODES['snapshot'], [])
+    results = {}
+    for mode, mode_env in MODES.items():
+        runs = [launch(mode_env, []) for _ in range(args.runs)]
+        prefork = launch(mode_env, ['--prefork', str(args.workers)])
+        results[mode] = {
+            'time_to_first_response_ms': statistics.median(run['time_to_first_response_ms'] for run in runs),
+            'import_ms': statistics.median(run['import_ms'] for run in runs),
+            'first_request_ms': statistics.median(run['first_request_ms'][FIRST_REQUESTS[0]['refrigerant']] for run in runs),
+            'rss_mib': statistics.median(run['rss_kib'] for run in runs) / 1024,
+            'pandas_loaded': runs[0]['pandas_loaded'],
+            'data_source': runs[0]['data_source'],
+            'worker_uss_mib': prefork['worker_uss_kib'] / 1024,
+            'worker_first_request_ms': prefork['worker_first_request_ms']
+        }
+
+    print(f"{'modo':<18}{'1ª resp ms':>11}{'import ms':>11}{'1ª pet ms':>11}{'RSS MiB':>9}"
+          f"{'USS/worker':>12}{'1ª pet fork':>13}  datos")
+    for mode, r in results.items():
+        print(f"{mode:<18}{r['time_to_first_response_ms']:>11.0f}{r['import_ms']:>11.0f}{r['first_request_ms']:>11.1f}"
+              f"{r['rss_mib']:>9.1f}{r['worker_uss_mib']:>12.1f}{r['worker_first_request_ms']:>13.1f}  "
+              f"{r['data_source']}{' + pandas' if r['pandas_loaded'] else ''}")
+    legacy, best = results['legacy'], results['snapshot_prewarm']
+    print(f"snapshot_prewarm frente a legacy: RSS por proceso {legacy['rss_mib']:.1f} -> {best['rss_mib']:.1f} MiB, "
+          f"USS por worker bifurcado {legacy['worker_uss_mib']:.1f} -> {best['worker_uss_mib']:.1f} MiB, "
+          f"primera petición en el worker {legacy['worker_first_request_ms']:.1f} -> {best['worker_first_request_ms']:.1f} ms")
+
+if __name__ == '__main__':
+    main()
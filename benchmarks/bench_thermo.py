@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks reproducibles del servicio termodinámico.
+
+Suites:
+  micro  funciones internas: get_properties_from_csv, get_capillary_constant,
+         calculate_capillary_lengths y la secuencia de estados CoolProp del ciclo
+  e2e    POST /thermo con el cliente de pruebas de Flask (CoolProp y CSV, con y sin
+         sobrecalentamiento/subenfriamiento)
+  load   generador de carga concurrente: p50/p95/p99 y throughput, en proceso o contra --url
+
+Los resultados se guardan en JSON (por defecto benchmarks/results/latest.json) y se comparan con
+la corrida anterior; si alguna métrica empeora más que --threshold el proceso termina con código 1.
+
+Uso: python benchmarks/bench_thermo.py [--suite micro,e2e,load] [--threshold 0.15] [--url http://host:5000]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# Sin caché de resultados ni logging de depuración: se mide el cálculo, no la caché
+os.environ.setdefault('THERMO_CACHE_SIZE', '0')
+os.environ.setdefault('THERMO_NODE_CACHE_SIZE', '0')
+os.environ.setdefault('THERMO_LOG_LEVEL', 'WARNING')
+os.environ.setdefault('THERMO_METRICS', '0')
+
+E2E_CASES = {
+    'coolprop_saturated': {'refrigerant': 'R134a', 'superheat': 0, 'subcooling': 0},
+    'coolprop_sh_sc': {'refrigerant': 'R134a', 'superheat': 5, 'subcooling': 3},
+    'coolprop_r32_sh_sc': {'refrigerant': 'R32', 'superheat': 5, 'subcooling': 3},
+    'csv_saturated': {'refrigerant': 'R-454B', 'superheat': 0, 'subcooling': 0},
+    'csv_sh_sc': {'refrigerant': 'R-454B', 'superheat': 5, 'subcooling': 3}
+}
+
+def thermo_payload(case, i=0):
+    # Variar la temperatura de evaporación evita medir siempre el mismo estado
+    return dict(case, evap_temp=253.15 + (i % 20) * 0.5, cond_temp=313.15, cooling_power={'value': 1000, 'unit': 'W'})
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def summarize(samples):
+    return {
+        'n': len(samples),
+        'median_us': statistics.median(samples) * 1e6,
+        'p95_us': percentile(samples, 95) * 1e6,
+        'min_us': min(samples) * 1e6
+    }
+
+def time_calls(fn, repeat, inner=1):
+    """Tiempo por llamada de fn() en `repeat` muestras de `inner` llamadas cada una."""
+    for _ in range(min(repeat, 10)):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        samples.append((time.perf_counter() - started) / inner)
+    return summarize(samples)
+
+def load_app():
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import app as thermo_app
+    return thermo_app
+
+def run_micro(thermo_app, repeat):
+    import numpy as np
+    results = {}
+    temps = np.linspace(-40, 60, 50)
+    results['csv_scalar'] = time_calls(lambda: thermo_app.get_properties_from_csv('R-454B', -7.3), repeat, 20)
+    results['csv_vector_50'] = time_calls(lambda: thermo_app.get_properties_from_csv('R-454B', temps), repeat, 20)
+    results['capillary_constant'] = time_calls(lambda: thermo_app.get_capillary_constant('R134a', 3412.14), repeat, 100)
+
+    points, _ = thermo_app.calculate_cycle('R134a', 263.15, 313.15, 5, 3)
+    results['capillary_lengths'] = time_calls(lambda: thermo_app.calculate_capillary_lengths(
+        'R134a', {'value': 1000, 'unit': 'W'}, points['1'], points['4'], points['1']['enthalpy'],
+        points['2']['enthalpy'], 3, -10), repeat, 10)
+    results['coolprop_state_points'] = time_calls(
+        lambda: thermo_app.calculate_cycle_coolprop('R134a', 263.15, 313.15, 5, 3), repeat, 5)
+    results['csv_state_points'] = time_calls(
+        lambda: thermo_app.calculate_cycle_custom('R-454B', 263.15, 313.15, 5, 3), repeat, 5)
+    return results
+
+def run_e2e(thermo_app, repeat):
+    client = thermo_app.app.test_client()
+    results = {}
+    for name, case in E2E_CASES.items():
+        counter = iter(range(10 ** 9))
+        def call():
+            response = client.post('/thermo', json=thermo_payload(case, next(counter)))
+            if response.status_code != 200:
+                raise RuntimeError(f'{name}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}')
+        results[name] = time_calls(call, repeat)
+    return results
+
+def run_load(thermo_app, concurrency, duration, url=None):
+    """Clientes concurrentes enviando /thermo durante `duration` segundos."""
+    if url:
+        def post(payload):
+            request = urllib.request.Request(url.rstrip('/') + '/thermo', data=json.dumps(payload).encode(),
+                                             headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status
+    else:
+        local = threading.local()
+        def post(payload):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = thermo_app.app.test_client()
+            return client.post('/thermo', json=payload).status_code
+
+    cases = list(E2E_CASES.values())
+    deadline = time.perf_counter() + duration
+    def worker(worker_id):
+        latencies, errors, i = [], 0, worker_id
+        while time.perf_counter() < deadline:
+            payload = thermo_payload(cases[i % len(cases)], i)
+            started = time.perf_counter()
+            try:
+                status = post(payload)
+            except Exception:
+                status = None
+            latencies.append(time.perf_counter() - started)
+            errors += status != 200
+            i += concurrency
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies = [value for worker_latencies, _ in outcomes for value in worker_latencies]
+    return {'thermo': {
+        'target': url or 'in-process',
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': sum(errors for _, errors in outcomes),
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000
+    }}
+
+# Métricas comparadas con la corrida anterior: (suite, clave, mayor es mejor)
+COMPARED_METRICS = [('micro', 'median_us', False), ('e2e', 'median_us', False),
+                    ('load', 'p95_ms', False), ('load', 'throughput_rps', True)]
+
+def compare(previous, current, threshold):
+    """Lista de regresiones (texto) entre dos corridas; los benchmarks nuevos o ausentes se ignoran."""
+    regressions = []
+    for suite, key, higher_is_better in COMPARED_METRICS:
+        for name, result in current.get('results', {}).get(suite, {}).items():
+            old = previous.get('results', {}).get(suite, {}).get(name, {}).get(key)
+            new = result.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            marker = 'REGRESIÓN' if worse > threshold else ''
+            print(f'  {suite}/{name} {key}: {old:.3f} -> {new:.3f} ({change:+.1%}) {marker}')
+            if marker:
+                regressions.append(f'{suite}/{name} {key} {change:+.1%}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks del servicio termodinámico')
+    parser.add_argument('--suite', default='micro,e2e,load', help='suites separadas por comas: micro, e2e, load')
+    parser.add_argument('--repeat', type=int, default=200, help='muestras por benchmark micro/e2e')
+    parser.add_argument('--concurrency', type=int, default=8, help='clientes concurrentes en la suite load')
+    parser.add_argument('--duration', type=float, default=10.0, help='segundos de carga en la suite load')
+    parser.add_argument('--url', help='servidor en ejecución para la suite load (por defecto, en proceso)')
+    parser.add_argument('--output', default=os.path.join(RESULTS_DIR, 'latest.json'))
+    parser.add_argument('--baseline', help='JSON con el que comparar (por defecto, la corrida anterior en --output)')
+    parser.add_argument('--threshold', type=float, default=0.15, help='empeoramiento relativo tolerado (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    suites = [suite.strip() for suite in args.suite.split(',') if suite.strip()]
+    thermo_app = load_app()
+    run = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'results': {}
+    }
+    if 'micro' in suites:
+        print('micro...')
+        run['results']['micro'] = run_micro(thermo_app, args.repeat)
+    if 'e2e' in suites:
+        print('e2e...')
+        run['results']['e2e'] = run_e2e(thermo_app, args.repeat)
+    if 'load' in suites:
+        print(f'load ({args.concurrency} clientes, {args.duration:.0f} s)...')
+        run['results']['load'] = run_load(thermo_app, args.concurrency, args.duration, args.url)
+    print(json.dumps(run['results'], indent=2))
+
+    baseline_path = args.baseline or args.output
+    regressions = []
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            previous = json.load(f)
+        print(f'Comparando con {baseline_path} ({previous.get("timestamp")}), umbral {args.threshold:.0%}:')
+        regressions = compare(previous, run, args.threshold)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    if os.path.exists(args.output):
+        shutil.copyfile(args.output, args.output.replace('.json', '.previous.json'))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+    print(f'Resultados guardados en {args.output}')
+
+    if regressions:
+        print('Regresiones detectadas: ' + '; '.join(regressions))
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
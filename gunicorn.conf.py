@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Configuración de producción: gunicorn -c gunicorn.conf.py app:app
+#
+# Cada worker es un proceso con su propio ejecutor acotado (THERMO_MAX_CONCURRENCY cálculos en curso,
+# THERMO_MAX_QUEUE en espera, 503 + Retry-After por encima). Los hilos extra de cada worker atienden las rutas
+# livianas (/refrigerants, estáticos, /metrics) mientras los cálculos esperan en el ejecutor.
+import multiprocessing
+import os
+
+bind = os.environ.get('THERMO_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('THERMO_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('THERMO_THREADS', 8))
+# Cada canal /live (SSE) ocupa un hilo mientras está abierto y sus sesiones son del proceso que lo atiende:
+# THERMO_THREADS debe cubrir los canales simultáneos por worker; si una edición cae en otro worker, el
+# cliente recibe 404 y vuelve a POST /thermo
+
+# La app se importa una vez en el maestro: snapshot de datos, AbstractState y domos precalentados y gc.freeze()
+# quedan compartidos copy-on-write entre los workers
+preload_app = True
+
+# El plazo por cálculo lo aplica la app (THERMO_REQUEST_TIMEOUT, THERMO_STREAM_TIMEOUT); este timeout solo
+# recicla workers colgados y debe ser mayor que ambos
+timeout = int(os.environ.get('THERMO_WORKER_TIMEOUT', 330))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get('THERMO_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('THERMO_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('THERMO_LOG_LEVEL', 'info').lower()
+
+# Sin sobre-suscripción: cada worker usa un solo proceso para /thermo/batch salvo que se indique otra cosa
+raw_env = [f"THERMO_BATCH_WORKERS={os.environ.get('THERMO_BATCH_WORKERS', 1)}"]
+
+def _prepare_app():
+    import app as thermo_app
+    if not thermo_app.PREWARM_ON_START:
+        thermo_app.prepare_worker()
+
+def when_ready(server):
+    # Con preload_app se precalienta una vez en el maestro, antes de bifurcar los workers
+    if server.cfg.preload_app:
+        _prepare_app()
+
+def post_worker_init(worker):
+    # Sin preload_app cada worker importa la app por su cuenta y se precalienta antes de aceptar conexiones
+    if not worker.cfg.preload_app:
+        _prepare_app()
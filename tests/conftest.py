@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Fixtures de las pruebas: la app se importa una vez, con los CSV copiados a un directorio temporal.
+
+app.py lee y escribe sus datos (CSV, snapshot, cachés en disco) relativos al directorio de trabajo, así que las
+pruebas de carga y recarga de datos nunca tocan los archivos del repositorio.
+"""
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_FILES = ('refrigerants.csv', 'capillary_constants.csv')
+TEST_ENV = {
+    'THERMO_PREWARM_ON_START': '0',
+    'THERMO_LOG_ASYNC': '0',
+    'THERMO_LOG_LEVEL': 'WARNING',
+    'THERMO_BATCH_WORKERS': '1',
+    'THERMO_DATA_TOKEN': 'test-token',
+    'THERMO_LIVE_HEARTBEAT': '0.2',
+    'THERMO_LIVE_COALESCE_MS': '0'
+}
+
+@pytest.fixture(scope='session')
+def workdir(tmp_path_factory):
+    path = tmp_path_factory.mktemp('thermo')
+    for name in DATA_FILES:
+        shutil.copy(os.path.join(ROOT, name), path)
+    return path
+
+@pytest.fixture(scope='session')
+def thermo(workdir):
+    """El módulo app, importado con TEST_ENV desde el directorio temporal."""
+    previous_cwd = os.getcwd()
+    with pytest.MonkeyPatch.context() as mp:
+        for key, value in TEST_ENV.items():
+            mp.setenv(key, value)
+        mp.chdir(workdir)
+        mp.syspath_prepend(ROOT)
+        import app
+        yield app
+        app.reset_batch_pool()
+        # Los flashes de mezclas pendientes se guardan aquí y no, al salir, en el directorio original
+        app.save_blend_flashes()
+    os.chdir(previous_cwd)
+
+@pytest.fixture
+def client(thermo):
+    # Cada prueba parte con las cachés de resultados y de nodos vacías
+    thermo.thermo_cache.clear()
+    thermo.node_cache.clear()
+    return thermo.app.test_client()
+
+@pytest.fixture
+def restore_data(thermo, workdir):
+    """Restaura los CSV originales (y el store cargado) al terminar una prueba que los modifica."""
+    yield workdir
+    for name in DATA_FILES:
+        shutil.copy(os.path.join(ROOT, name), workdir / name)
+    thermo.refresh_data_store(min_interval=0)
+
+@pytest.fixture
+def payload():
+    """Fábrica de payloads de /thermo: un punto R134a típico con los campos que se quieran cambiar."""
+    def make(**overrides):
+        return {'refrigerant': 'R134a', 'evap_temp': 263.15, 'cond_temp': 313.15, 'superheat': 5, 'subcooling': 3,
+                'cooling_power': {'value': 1000, 'unit': 'W'}, **overrides}
+    return make
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+@pytest.fixture
+def mixture(thermo, monkeypatch):
+    monkeypatch.setattr(thermo, 'BLEND_MODEL', 'mixture')
+    return thermo
+
+def test_blends_use_the_mixture_model_by_default(client, thermo, payload):
+    assert thermo.BLEND_MODEL == 'mixture' and thermo.is_mixture_blend('R-454B')
+    body = client.post('/thermo', json=payload(refrigerant='R-454B')).get_json()
+    assert body['backend'] == 'HEOS' and 'glide' in body
+
+def test_request_can_choose_the_csv_table(client, thermo, payload):
+    mixture = client.post('/thermo', json=payload(refrigerant='R-454B'))
+    table = client.post('/thermo', json=payload(refrigerant='R-454B', blend_model='CSV'))
+    assert table.status_code == 200 and table.get_json()['backend'] == 'CSV' and 'glide' not in table.get_json()
+    assert table.headers['ETag'] != mixture.headers['ETag']
+    assert table.get_json()['cop'] != pytest.approx(mixture.get_json()['cop'])
+    # El modelo impuesto no queda en el hilo
+    assert thermo.is_mixture_blend('R-454B')
+
+@pytest.mark.parametrize('blend_model', ['heos', 3])
+def test_invalid_blend_model_is_rejected(client, payload, blend_model):
+    response = client.post('/thermo', json=payload(refrigerant='R-454B', blend_model=blend_model))
+    assert response.status_code == 400 and response.get_json()['status'] == 'error'
+
+def test_blend_flashes_are_persisted_with_the_envelope(client, mixture, payload, monkeypatch):
+    body = client.post('/thermo', json=payload(refrigerant='R-454B', evap_temp=258.15)).get_json()
+    mixture.save_blend_flashes()
+    path = mixture._blend_flash_path('R-454B')
+    assert os.path.exists(path)
+    # Un proceso nuevo: sin flashes en memoria ni nodos en caché, todos salen del disco
+    monkeypatch.setattr(mixture, '_blend_flashes', {})
+    mixture.thermo_cache.clear()
+    mixture.node_cache.clear()
+    misses = mixture.blend_stats['flash_misses']
+    hits = mixture.blend_stats['flash_hits']
+    again = client.post('/thermo', json=payload(refrigerant='R-454B', evap_temp=258.15)).get_json()
+    assert again['cop'] == body['cop']
+    assert mixture.blend_stats['flash_misses'] == misses and mixture.blend_stats['flash_hits'] > hits
+
+@pytest.mark.parametrize('refrigerant', ['R-454B', 'R-417A'])
+def test_blend_envelope_matches_exact_flashes(mixture, refrigerant):
+    CP = mixture.CP
+    envelope = mixture.blend_envelope(refrigerant)
+    temps = envelope['temperature']
+    for temperature in (temps[0] + 10.3, (temps[0] + temps[-1]) / 2 + 0.27, temps[-1] - 10.6):
+        for quality in (0, 1):
+            exact = mixture.state_props(refrigerant, CP.QT_INPUTS, quality, temperature, CP.iP, CP.iHmass, CP.iSmass,
+                                        CP.iDmass, backend='HEOS')
+            assert mixture.blend_saturation(refrigerant, temperature, quality) == pytest.approx(exact, rel=2 * mixture.BLEND_TOLERANCE)
+        pressure = exact[0]
+        assert mixture.blend_saturation_temperature(refrigerant, pressure, 1) == pytest.approx(temperature, abs=0.01)
+
+def test_mixture_cycle_reports_glide(client, mixture, payload):
+    body = client.post('/thermo', json=payload(refrigerant='R-454B')).get_json()
+    assert body['status'] == 'success' and body['backend'] == 'HEOS'
+    # R-454B desliza alrededor de 1 K
+    assert 0 < body['glide']['evaporator'] < 3 and 0 < body['glide']['condenser'] < 3
+    assert body['points']['1']['temperature'] < body['points']['2']['temperature'] - 5
+
+def test_cycle_outside_the_envelope_falls_back_to_the_csv_table(client, mixture, payload):
+    envelope = mixture.blend_envelope('R-454B')
+    cond_temp = round(float(envelope['temperature'][-1]), 2) + 1
+    assert not mixture.blend_covers('R-454B', 263.15, cond_temp)
+    assert mixture.property_backend('R-454B', 'HEOS', 263.15, cond_temp) == 'CSV'
+    response = client.post('/thermo', json=payload(refrigerant='R-454B', cond_temp=cond_temp))
+    assert response.status_code == 200 and response.get_json()['backend'] == 'CSV'
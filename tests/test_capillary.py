@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import json
+
+import numpy as np
+import pytest
+
+def test_capillary_constant_takes_next_power_column(thermo):
+    # R134a: c 500 = 5.98, c 600 = 6.8
+    assert thermo.get_capillary_constant('R134a', 500, interpolate=False) == pytest.approx(5.98)
+    assert thermo.get_capillary_constant('R134a', 550, interpolate=False) == pytest.approx(6.8)
+
+def test_capillary_constant_interpolates_between_columns(thermo):
+    assert thermo.get_capillary_constant('R134a', 550, interpolate=True) == pytest.approx((5.98 + 6.8) / 2)
+    assert thermo.get_capillary_constant('R134a', 100, interpolate=True) == pytest.approx(6.55)
+    assert thermo.get_capillary_constant('R134a', 1e6, interpolate=True) == pytest.approx(1.25)
+
+def test_capillary_constant_defaults_for_unknown_refrigerant(thermo):
+    assert thermo.get_capillary_constant('R-999X', 1000) == 0.1
+
+def test_size_capillaries_matches_the_flow_relation(thermo):
+    diameters = np.array([0.6e-3, 0.7e-3, 0.8e-3])
+    delta_p, rho, m_dot, C, fc = 8e5, 1200.0, 2e-3, 6.0, 1.0
+    sizing = thermo.size_capillaries([delta_p], [rho], [m_dot], [C], [fc], diameters, target_length=2.0)
+    expected = delta_p * rho * diameters ** 4 * C / m_dot * fc
+    np.testing.assert_allclose(sizing['lengths'][0], np.where((expected >= 0.001) & (expected <= 15), expected, np.nan))
+    winner = sizing['winner_index'][0]
+    assert winner == np.nanargmin(np.abs(sizing['lengths'][0] - 2.0))
+    # El diámetro requerido da exactamente la longitud objetivo
+    assert delta_p * rho * sizing['required_diameter'][0] ** 4 * C / m_dot * fc == pytest.approx(2.0)
+
+def test_capillary_endpoint_sizes_each_case_on_a_custom_catalog(client):
+    response = client.post('/capillary', json={'diameters_mm': [0.8, 0.6, 0.7], 'target_length_m': 2.0, 'cases': [
+        {'delta_p': 8e5, 'density': 1200, 'mass_flow': 2e-3, 'capillary_constant': 6.0, 'evap_temp': 253.15},
+        {'delta_p': 1.0, 'density': 1.0, 'mass_flow': 1.0, 'capillary_constant': 6.0}]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['diameters_mm'] == pytest.approx([0.6, 0.7, 0.8])
+    first, second = body['cases']
+    # 0.37, 0.69 y 1.18 m: el de 0.8 mm es el más cercano a 2 m
+    assert first['status'] == 'success' and first['winner']['diameter_mm'] == pytest.approx(0.8)
+    assert first['lengths_m'][2] == pytest.approx(first['winner']['length_m'])
+    assert second['status'] == 'error' and second['winner'] is None and second['lengths_m'] == [None] * 3
+
+def test_capillary_endpoint_rejects_invalid_cases(client):
+    assert client.post('/capillary', json={'cases': []}).status_code == 400
+    assert client.post('/capillary', json={'cases': [{'delta_p': -1, 'density': 1200, 'mass_flow': 1e-3}]}).status_code == 400
+    assert client.post('/capillary', json={'cases': [{'density': 1200}]}).status_code == 400
+
+@pytest.mark.parametrize('case', [
+    {'delta_p': float('inf'), 'density': 1200, 'mass_flow': 1e-3},
+    {'delta_p': 8e5, 'density': float('nan'), 'mass_flow': 1e-3},
+    {'delta_p': 8e5, 'density': 1200, 'mass_flow': 1e-3, 'cooling_power': {'value': 1000, 'unit': 'foo'}},
+    {'delta_p': 8e5, 'density': 1200, 'mass_flow': 1e-3, 'cooling_power': 1000}
+])
+def test_capillary_endpoint_rejects_non_finite_and_malformed_cases(client, case):
+    response = client.post('/capillary', data=json.dumps({'cases': [case]}), content_type='application/json')
+    assert response.status_code == 400 and response.get_json()['status'] == 'error'
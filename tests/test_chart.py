@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+
+import pytest
+
+def test_chart_lines_are_consistent(client):
+    response = client.get('/chart/R134a?points=20&lines=3', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200 and response.headers['Content-Encoding'] == 'gzip'
+    chart = json.loads(gzip.decompress(response.data))
+    assert len(chart['quality']) == 9 and len(chart['isotherms']) == len(chart['isentropes']) == 3
+    for line in chart['isotherms']:
+        assert set(line['T']) == {round(line['value'], 3)}
+    for line in chart['isentropes']:
+        assert line['s'] and all(s == pytest.approx(line['value'], abs=1e-3) for s in line['s'])
+    assert chart['critical']['T'] == pytest.approx(374.21, abs=0.01)
+
+def test_chart_is_cached_in_memory_and_on_disk(client, thermo):
+    url = '/chart/R134a?points=12&lines=2'
+    first = client.get(url)
+    assert first.headers['X-Cache'] in ('built', 'disk')
+    assert client.get(url).headers['X-Cache'] == 'memory'
+    thermo.chart_cache.clear()
+    again = client.get(url)
+    assert again.headers['X-Cache'] == 'disk' and again.data == first.data
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+def test_csv_chart_has_only_the_dome(client, thermo, monkeypatch):
+    monkeypatch.setattr(thermo, 'BLEND_MODEL', 'csv')
+    chart = client.get('/chart/R-454B?points=12&lines=2').get_json()
+    assert chart['backend'] == 'CSV' and chart['isotherms'] == [] and len(chart['saturation']['liquid']['T']) == 12
+
+def test_chart_rejects_bad_resolution_and_unknown_fluids(client):
+    assert client.get('/chart/R134a?points=5').status_code == 400
+    assert client.get('/chart/R134a?lines=100').status_code == 400
+    assert client.get('/chart/R-999X').status_code == 404
+
+def test_chart_revalidation_does_not_rebuild(client, thermo, monkeypatch):
+    etag = client.get('/chart/R134a?points=12&lines=2').headers['ETag']
+    monkeypatch.setattr(thermo, 'get_chart', lambda *args: pytest.fail('get_chart no debe llamarse'))
+    assert client.get('/chart/R134a?points=12&lines=2', headers={'If-None-Match': etag}).status_code == 304
+
+def test_chart_state_creation_goes_through_the_bounded_executor(client, thermo, monkeypatch):
+    monkeypatch.setitem(thermo.executor_stats, 'pending', thermo.MAX_CONCURRENCY + thermo.MAX_QUEUE)
+    assert client.get('/chart/R134a?backend=TTSE').status_code == 503
+
+def test_blend_chart_key_follows_the_envelope_step(thermo, monkeypatch):
+    monkeypatch.setattr(thermo, 'BLEND_MODEL', 'mixture')
+    key = thermo.chart_key('R-454B', 'HEOS', 12, 2)
+    monkeypatch.setattr(thermo, 'BLEND_STEP', 0.25)
+    assert thermo.chart_key('R-454B', 'HEOS', 12, 2) != key
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+FLUIDS = ['R134a', 'R32', 'R290', 'R-454B', 'R-999X']
+
+def compare(client, **body):
+    response = client.post('/compare', json={'evap_temp': 263.15, 'cond_temp': 313.15, 'superheat': 5, 'subcooling': 3,
+                                             'refrigerants': FLUIDS, **body})
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_compare_ranks_by_cop_and_matches_single_points(client, payload):
+    body = compare(client)
+    results = body['results']
+    assert {item['refrigerant'] for item in results} == {'R134a', 'R32', 'R290', 'R-454B'}
+    assert [item['cop'] for item in results] == sorted((item['cop'] for item in results), reverse=True)
+    assert [item['rank'] for item in results] == [1, 2, 3, 4]
+    assert body['failures'] == [{'refrigerant': 'R-999X', 'message': 'Refrigerante desconocido'}]
+    r134a = next(item for item in results if item['refrigerant'] == 'R134a')
+    assert r134a['cop'] == pytest.approx(client.post('/thermo', json=payload()).get_json()['cop'])
+
+def test_compare_prunes_by_critical_temperature_and_pressure(client):
+    hot = compare(client, cond_temp=355.15)
+    assert 'R32' in {item['refrigerant'] for item in hot['pruned_fluids']}
+    assert 'R32' not in {item['refrigerant'] for item in hot['results']}
+    limited = compare(client, max_cond_pressure=15e5)
+    pruned = {item['refrigerant'] for item in limited['pruned_fluids']}
+    assert {'R32', 'R-454B'} <= pruned and 'R134a' not in pruned
+    assert all(item['cond_pressure'] <= 15e5 for item in limited['results'])
+
+def test_compare_filters_and_limits(client):
+    body = compare(client, kind='pure', rank_by='mass_flow', limit=2)
+    assert len(body['results']) == 2
+    assert all(item['kind'] == 'pure' for item in body['results'])
+    assert body['results'][0]['mass_flow'] <= body['results'][1]['mass_flow']
+
+def test_compare_rejects_invalid_requests(client):
+    assert client.post('/compare', json={'rank_by': 'precio'}).status_code == 400
+    assert client.post('/compare', json={'refrigerants': []}).status_code == 400
+    assert client.post('/compare', json={'evap_temp': 320, 'cond_temp': 300}).status_code == 400
+
+@pytest.mark.parametrize('body', [
+    {'cooling_power': {'value': '1000', 'unit': 'foo'}},
+    {'cooling_power': 1000},
+    {'evap_temp': float('nan')},
+    {'max_cond_pressure': float('inf')}
+])
+def test_compare_rejects_non_finite_and_malformed_inputs(client, body):
+    response = client.post('/compare', data=json.dumps({'refrigerants': ['R134a'], **body}), content_type='application/json')
+    assert response.status_code == 400 and response.get_json()['status'] == 'error'
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import io
+
+import pytest
+
+AUTH = {'Authorization': 'Bearer test-token'}
+
+def blend_csv(workdir, name, edit=None):
+    """Las filas de R-454B de refrigerants.csv con otro nombre; `edit` puede modificar cada fila."""
+    lines = (workdir / 'refrigerants.csv').read_text(encoding='utf-8-sig').splitlines()
+    rows = [line.replace('R-454B', name, 1) for line in lines[1:] if line.startswith('R-454B,')]
+    if edit is not None:
+        rows = [edit(i, row) for i, row in enumerate(rows)]
+    return '\n'.join([lines[0]] + rows) + '\n'
+
+def upload(client, headers=AUTH, **files):
+    data = {field: (io.BytesIO(text.encode('utf-8')), f'{field}.csv') for field, text in files.items()}
+    return client.post('/data/refrigerants', data=data, headers=headers)
+
+def test_upload_installs_a_new_blend(client, thermo, restore_data, payload):
+    version = client.get('/data').get_json()['version']
+    etag = client.post('/thermo', json=payload(refrigerant='R-454B')).headers['ETag']
+    response = upload(client, properties=blend_csv(restore_data, 'R-TEST1'), capillary='Refrigerant,c 500,c 1000\nR-TEST1,4.0,5.0\n')
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body['refrigerants'] == ['R-TEST1'] and body['capillary'] == ['R-TEST1'] and body['version'] != version
+    assert client.get('/data').get_json()['version'] == body['version']
+    assert 'R-TEST1' in client.get('/refrigerants').get_json()['refrigerants']
+    assert thermo.get_capillary_constant('R-TEST1', 750, interpolate=True) == pytest.approx(4.5)
+    blend = client.post('/thermo', json=payload(refrigerant='R-TEST1')).get_json()
+    assert blend['backend'] == 'CSV'
+    assert blend['cop'] == pytest.approx(client.post('/thermo', json=payload(refrigerant='R-454B', blend_model='csv')).get_json()['cop'])
+    # Las respuestas de los datos anteriores ya no validan
+    assert client.post('/thermo', json=payload(refrigerant='R-454B'), headers={'If-None-Match': etag}).status_code == 200
+
+def test_edited_csv_is_hot_reloaded(client, thermo, restore_data):
+    before = thermo.get_properties_from_csv('R-454B', -55)['h_vapor']
+    path = restore_data / 'refrigerants.csv'
+    path.write_text(path.read_text(encoding='utf-8-sig').replace('R-454B,-55,0.794,0.755,1252.0,2.700,114.77,436.00',
+                                                                 'R-454B,-55,0.794,0.755,1252.0,2.700,114.77,437.00'),
+                    encoding='utf-8')
+    assert thermo.refresh_data_store(min_interval=0)
+    assert thermo.get_properties_from_csv('R-454B', -55)['h_vapor'] == pytest.approx(before + 1e3)
+    assert not thermo.refresh_data_store(min_interval=0)
+
+def test_upload_rejects_invalid_data(client, restore_data):
+    version = client.get('/data').get_json()['version']
+    assert upload(client, properties=blend_csv(restore_data, 'R134a')).status_code == 400
+    # Presión de burbuja que no crece con la temperatura
+    flat = lambda i, row: row.replace(row.split(',')[2], '1.0', 1) if i else row
+    response = upload(client, properties=blend_csv(restore_data, 'R-TEST2', flat))
+    assert response.status_code == 400 and 'R-TEST2' in response.get_json()['message']
+    assert upload(client, capillary='Refrigerant,c 500\nR-TEST2,-1\n').status_code == 400
+    assert upload(client, headers={}, properties=blend_csv(restore_data, 'R-TEST3')).status_code == 401
+    assert client.post('/data/refrigerants', headers=AUTH).status_code == 400
+    assert client.get('/data').get_json()['version'] == version
+
+def test_upload_is_disabled_without_a_token(client, thermo, monkeypatch):
+    monkeypatch.setattr(thermo, 'DATA_TOKEN', '')
+    assert client.post('/data/refrigerants', headers=AUTH).status_code == 403
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import json
+
+def parse_event(chunk):
+    """(evento, id, datos JSON) de un mensaje SSE."""
+    fields = dict(line.split(': ', 1) for line in chunk.decode('utf-8').strip().splitlines())
+    return fields['event'], fields.get('id'), json.loads(fields['data'])
+
+def open_channel(client):
+    response = client.get('/live')
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+    events = iter(response.response)
+    event, _, data = parse_event(next(events))
+    assert event == 'session'
+    return response, events, data['session']
+
+def test_live_channel_coalesces_edits_into_the_latest_state(client, thermo, payload):
+    response, events, session = open_channel(client)
+    superseded = thermo.live_stats['superseded']
+    assert client.post(f'/live/{session}', json={'seq': 1, 'params': payload(superheat=4)}).status_code == 202
+    assert client.post(f'/live/{session}', json={'seq': 2, 'params': payload(superheat=6)}).status_code == 202
+    assert thermo.live_stats['superseded'] == superseded + 1
+    event, event_id, body = parse_event(next(events))
+    assert (event, event_id) == ('result', '2')
+    assert body['format'] == 'columnar'
+    assert body['cop'] == client.post('/thermo', json=payload(superheat=6)).get_json()['cop']
+    # Sin ediciones el canal envía comentarios de keep-alive
+    assert next(events) == b': ping\n\n'
+    response.close()
+    assert session not in thermo.live_sessions
+
+def test_live_rejects_stale_unknown_and_malformed_updates(client, payload):
+    response, events, session = open_channel(client)
+    assert client.post(f'/live/{session}', json={'seq': 5, 'params': payload()}).status_code == 202
+    assert client.post(f'/live/{session}', json={'seq': 5, 'params': payload()}).status_code == 409
+    assert client.post(f'/live/{session}', json={'seq': 'x', 'params': payload()}).status_code == 400
+    assert client.post(f'/live/{session}', json={'seq': 6}).status_code == 400
+    assert client.post('/live/desconocida', json={'seq': 1, 'params': payload()}).status_code == 404
+    response.close()
+
+def test_live_reports_invalid_params_as_events(client, payload):
+    response, events, session = open_channel(client)
+    client.post(f'/live/{session}', json={'seq': 1, 'params': payload(evap_temp='frío')})
+    event, _, body = parse_event(next(events))
+    assert event == 'result' and body['status'] == 'error'
+    response.close()
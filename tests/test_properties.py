@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import numpy as np
+import pytest
+
+# Fila de R-454B a -55 °C en refrigerants.csv
+R454B_MINUS_55 = {'pressure_bubble': 0.794e5, 'pressure_dew': 0.755e5, 'h_liquid': 114.77e3, 'h_vapor': 436.0e3,
+                  'density_liquid': 1252.0, 'density_vapor': 2.7}
+
+def test_csv_properties_at_tabulated_temperature(thermo):
+    props = thermo.get_properties_from_csv('R-454B', -55)
+    for key, expected in R454B_MINUS_55.items():
+        assert props[key] == pytest.approx(expected)
+
+def test_csv_properties_interpolate_linearly_between_rows(thermo):
+    low = thermo.get_properties_from_csv('R-454B', -55)
+    high = thermo.get_properties_from_csv('R-454B', -50)
+    middle = thermo.get_properties_from_csv('R-454B', -52.5)
+    for key in R454B_MINUS_55:
+        assert middle[key] == pytest.approx((low[key] + high[key]) / 2)
+
+def test_csv_properties_accept_arrays(thermo):
+    temps = np.array([-57.3, -10.0, 12.5])
+    vector = thermo.get_properties_from_csv('R-454B', temps)
+    for i, temp in enumerate(temps):
+        scalar = thermo.get_properties_from_csv('R-454B', float(temp))
+        assert vector['h_vapor'][i] == pytest.approx(scalar['h_vapor'])
+
+def test_csv_properties_clamp_to_table_range(thermo):
+    assert thermo.get_properties_from_csv('R-454B', -80)['pressure_dew'] == pytest.approx(0.582e5)
+
+def test_csv_properties_unknown_refrigerant(thermo):
+    with pytest.raises(ValueError, match='no encontrado'):
+        thermo.get_properties_from_csv('R-999X', 0)
+
+def test_refrigerants_lists_coolprop_and_csv_fluids(client):
+    response = client.get('/refrigerants')
+    assert response.status_code == 200
+    refrigerants = response.get_json()['refrigerants']
+    assert 'R134a' in refrigerants and 'R-454B' in refrigerants
+
+def test_state_pool_reuses_abstract_state_per_thread(thermo):
+    state = thermo.get_state('R134a')
+    assert thermo.get_state('R134a') is state
+    assert thermo.get_state('R134a', 'BICUBIC&HEOS') is not state
+    other = []
+    thread = threading.Thread(target=lambda: other.append(thermo.get_state('R134a')))
+    thread.start()
+    thread.join()
+    assert other[0] is not state
+
+def test_state_props_matches_propssi(thermo):
+    CP = thermo.CP
+    h, rho = thermo.state_props('R134a', CP.PT_INPUTS, 2e5, 280.0, CP.iHmass, CP.iDmass)
+    assert h == pytest.approx(CP.PropsSI('H', 'P', 2e5, 'T', 280.0, 'R134a'), rel=1e-12)
+    assert rho == pytest.approx(CP.PropsSI('D', 'P', 2e5, 'T', 280.0, 'R134a'), rel=1e-12)
+
+def test_state_props_batch_marks_failures_as_nan(thermo):
+    CP = thermo.CP
+    pressure, = thermo.state_props_batch('R134a', CP.QT_INPUTS, 0, [250.0, 1000.0], [CP.iP], ignore_errors=True)
+    assert pressure[0] == pytest.approx(CP.PropsSI('P', 'Q', 0, 'T', 250.0, 'R134a'))
+    assert np.isnan(pressure[1])
+
+def test_accuracy_report_covers_the_usable_table_range(client):
+    response = client.get('/accuracy/R134a?backend=BICUBIC&points=20')
+    assert response.status_code == 200
+    report = response.get_json()
+    # El estado sobrecalentado en Tmin cae en el borde inferior de la tabla y no entra en el máximo
+    assert report['out_of_table'] > 0
+    assert report['table_min_pressure'] > 0
+    assert max(report['max_rel_dev_pct'].values()) < 0.1
+
+def test_accuracy_rejects_csv_refrigerants_and_bad_points(client):
+    assert client.get('/accuracy/R-454B').status_code == 400
+    assert client.get('/accuracy/R134a?points=1').status_code == 400
+    assert client.get('/accuracy/R134a?backend=FOO').status_code == 400
+
+def test_saturation_dome_revalidates_with_etag(client):
+    response = client.get('/saturation/R134a')
+    assert response.status_code == 200 and response.headers['Cache-Control'] == 'public, max-age=86400'
+    dome = response.get_json()
+    assert dome['backend'] == 'HEOS' and len(dome['temperature']) == len(dome['pressure_bubble'])
+    assert client.get('/saturation/R134a', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+def test_saturation_dome_of_csv_fluid_is_revalidated_on_every_use(client, thermo, monkeypatch):
+    monkeypatch.setattr(thermo, 'BLEND_MODEL', 'csv')
+    response = client.get('/saturation/R-454B')
+    assert response.status_code == 200 and response.get_json()['backend'] == 'CSV'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert client.get('/saturation/R-454B', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get('/saturation/R-999X').status_code == 404
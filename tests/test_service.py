@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import runpy
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+
+def test_server_timing_reports_stages_and_property_calls(client, payload):
+    timing = client.post('/thermo', json=payload()).headers['Server-Timing']
+    assert 'total;dur=' in timing
+    assert 'property-calls;desc="0"' not in timing
+
+def test_metrics_exposes_latency_histograms_and_cache_counters(client, payload):
+    client.post('/thermo', json=payload())
+    client.post('/thermo', json=payload())
+    response = client.get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert 'thermo_request_duration_seconds_count{endpoint="/thermo"}' in text
+    assert 'thermo_refrigerant_duration_seconds_bucket{refrigerant="R134a",le="+Inf"}' in text
+    assert 'thermo_result_cache_hits_total' in text and 'thermo_executor_capacity' in text
+
+def test_cache_stats_counts_hits_and_misses(client, payload):
+    client.post('/thermo', json=payload())
+    client.post('/thermo', json=payload())
+    stats = client.get('/cache/stats').get_json()['thermo']
+    assert stats['size'] == 1 and stats['hits'] >= 1 and stats['misses'] >= 1
+
+def test_request_id_is_echoed_or_generated(client):
+    assert client.get('/refrigerants', headers={'X-Request-ID': 'abc123'}).headers['X-Request-ID'] == 'abc123'
+    assert len(client.get('/refrigerants').headers['X-Request-ID']) == 16
+
+def test_log_payload_logs_slow_requests_at_info(thermo, caplog, monkeypatch):
+    monkeypatch.setattr(thermo, 'LOG_SLOW_MS', 100)
+    with caplog.at_level(logging.INFO, logger='app'):
+        thermo.log_payload("Datos: %s", {'a': 1}, elapsed=0.01)
+        thermo.log_payload("Datos: %s", {'b': 2}, elapsed=0.2)
+    assert [record.getMessage() for record in caplog.records] == ["Petición lenta (200.0 ms). Datos: {'b': 2}"]
+
+def test_data_snapshot_round_trip(thermo, tmp_path):
+    store = thermo.current_data()
+    path = str(tmp_path / 'snapshot.bin')
+    thermo.save_data_snapshot(path, store.index, store.table, store.digest)
+    index, table = thermo.load_data_snapshot(path, store.digest)
+    assert set(index) == set(store.index) and set(table) == set(store.table)
+    for refrigerant, entry in store.index.items():
+        for key, values in entry.items():
+            np.testing.assert_array_equal(index[refrigerant][key], values)
+    for name, (powers, constants) in store.table.items():
+        np.testing.assert_array_equal(table[name][0], powers)
+        np.testing.assert_array_equal(table[name][1], constants)
+    # Un snapshot de otros CSV no se usa
+    assert thermo.load_data_snapshot(path, 'otra-huella') is None
+
+def test_import_does_not_prewarm_and_gunicorn_hooks_do(thermo, monkeypatch):
+    assert 'prewarm' not in thermo.STARTUP_TIMINGS
+    calls = []
+    monkeypatch.setattr(thermo, 'prepare_worker', lambda: calls.append('prepare'))
+    hooks = runpy.run_path(os.path.join(ROOT, 'gunicorn.conf.py'))
+    preload = SimpleNamespace(cfg=SimpleNamespace(preload_app=True))
+    per_worker = SimpleNamespace(cfg=SimpleNamespace(preload_app=False))
+    hooks['when_ready'](preload)
+    hooks['post_worker_init'](preload)
+    assert calls == ['prepare']
+    hooks['when_ready'](per_worker)
+    hooks['post_worker_init'](per_worker)
+    assert calls == ['prepare', 'prepare']
+
+def test_full_executor_answers_503_with_retry_after(client, thermo, payload, monkeypatch):
+    monkeypatch.setitem(thermo.executor_stats, 'pending', thermo.MAX_CONCURRENCY + thermo.MAX_QUEUE)
+    response = client.post('/thermo', json=payload())
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(thermo.RETRY_AFTER)
+    # Las rutas livianas no pasan por el ejecutor
+    assert client.get('/refrigerants').status_code == 200
+
+def test_run_bounded_aborts_at_the_deadline_and_frees_its_slot(thermo):
+    def spin():
+        while True:
+            thermo.check_deadline()
+            time.sleep(0.001)
+    started = time.monotonic()
+    with pytest.raises(thermo.CalculationTimeout):
+        thermo.run_bounded(spin, timeout=0.05)
+    assert time.monotonic() - started < 1
+    wait_until(lambda: thermo.executor_stats['pending'] == 0)
+
+def test_timeouts_answer_504(client, thermo, payload, monkeypatch):
+    monkeypatch.setattr(thermo, 'REQUEST_TIMEOUT', 1e-4)
+    assert client.post('/thermo', json=payload()).status_code == 504
+    assert client.post('/thermo/batch', json=[payload(), payload(evap_temp=253.15)]).status_code == 504
+    wait_until(lambda: thermo.executor_stats['pending'] == 0)
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+import json
+
+import pytest
+
+PROFILE = 'hour,ambient,load\n0,20,1000\n1,30,2000\n2,30,0\n3,25,1500\n'
+PARAMS = {'refrigerant': 'R134a', 'evap_temp': 263.15, 'approach': 10, 'superheat': 5, 'subcooling': 3}
+
+def test_annual_simulation_matches_single_point_cycles(client, payload):
+    response = client.post('/simulate/annual', json={'profile': PROFILE, **PARAMS})
+    assert response.status_code == 200
+    body = response.get_json()
+    summary, series = body['summary'], body['series']
+    assert (summary['hours'], summary['active_hours'], summary['unserved_hours'], summary['temperature_bins']) == (4, 3, 0, 3)
+    assert series['cond_temp_c'] == pytest.approx([30, 40, 40, 35])
+    cop = client.post('/thermo', json=payload(cond_temp=313.15)).get_json()['cop']
+    assert series['cop'][1] == pytest.approx(cop)
+    assert series['compressor_w'][1] == pytest.approx(2000 / cop)
+    assert summary['cooling_kwh'] == pytest.approx(4.5)
+    assert summary['seasonal_cop'] == pytest.approx(summary['cooling_kwh'] / summary['compressor_kwh'])
+    assert summary['peak_compressor_hour'] == 1
+
+def test_annual_simulation_accepts_uploads_and_streams_csv(client):
+    query = '&'.join(f'{key}={value}' for key, value in PARAMS.items())
+    as_json = client.post('/simulate/annual', json={'profile': PROFILE, **PARAMS}).get_json()
+    response = client.post(f'/simulate/annual?format=csv&{query}', data=PROFILE, content_type='text/csv')
+    assert response.status_code == 200 and response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['hour'] for row in rows] == ['0', '1', '2', '3']
+    assert float(rows[1]['cop']) == pytest.approx(as_json['series']['cop'][1], rel=1e-5)
+    uploaded = client.post('/simulate/annual', data={'profile': (io.BytesIO(PROFILE.encode()), 'perfil.csv'), **PARAMS})
+    summary = uploaded.get_json()['summary']
+    assert summary['compressor_kwh'] == as_json['summary']['compressor_kwh']
+    # Los bins ya calculados se reutilizan desde la caché de nodos
+    assert summary['nodes_computed'] == [] and 'p3' in summary['nodes_reused']
+
+def test_annual_simulation_rejects_bad_profiles(client):
+    assert client.post('/simulate/annual', json={'profile': 'ambient,load\n20,-5\n'}).status_code == 400
+    assert client.post('/simulate/annual', json={'profile': 'x,y\n1,2\n'}).status_code == 400
+    assert client.post('/simulate/annual', json={}).status_code == 400
+    # Condensación por encima de la crítica en todas las horas
+    assert client.post('/simulate/annual', json={'profile': '120,1000\n130,1000\n', **PARAMS}).status_code == 422
+
+@pytest.mark.parametrize('params', [{'load_unit': 'foo'}, {'evap_temp': float('nan')}, {'bin': float('inf')}])
+def test_annual_simulation_rejects_non_finite_and_malformed_params(client, params):
+    body = json.dumps({'profile': PROFILE, **PARAMS, **params})
+    response = client.post('/simulate/annual', data=body, content_type='application/json')
+    assert response.status_code == 400 and response.get_json()['status'] == 'error'
+
+def test_annual_summary_header_is_strict_json(client, thermo, monkeypatch):
+    simulate = thermo.simulate_annual
+    def with_nan(*args):
+        series, summary, failures = simulate(*args)
+        return series, dict(summary, seasonal_cop=float('nan'), peak_compressor_w=float('inf')), failures
+    monkeypatch.setattr(thermo, 'simulate_annual', with_nan)
+    response = client.post('/simulate/annual?format=csv', json={'profile': PROFILE, **PARAMS})
+    summary = json.loads(response.headers['X-Simulation-Summary'], parse_constant=pytest.fail)
+    assert summary['seasonal_cop'] is None and summary['peak_compressor_w'] is None
+    body = client.post('/simulate/annual', json={'profile': PROFILE, **PARAMS}).get_json()
+    assert body['summary']['seasonal_cop'] is None
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+DESIGN = {'refrigerant': 'R134a', 'box_temp': 263.15, 'ambient_temp': 305.15, 'evaporator_ua': 20, 'condenser_ua': 30,
+          'capillary': {'diameter_mm': 0.7, 'length_m': 2}, 'superheat': 5, 'subcooling': 3}
+
+def test_balance_point_closes_the_mass_and_energy_balances(client):
+    response = client.post('/solve/balance', json=DESIGN)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['convergence']['converged'] and body['convergence']['residual'] <= body['convergence']['tolerance']
+    assert body['evap_temp'] == pytest.approx(259.15, abs=1) and body['cond_temp'] == pytest.approx(308.45, abs=1)
+    points = body['points']
+    assert body['cooling_capacity_w'] == pytest.approx(20 * (263.15 - body['evap_temp']))
+    assert body['mass_flow'] * (points['2']['enthalpy'] - points['1']['enthalpy']) == pytest.approx(body['cooling_capacity_w'], rel=1e-3)
+    assert body['mass_flow'] * (points['3']['enthalpy'] - points['4']['enthalpy']) == pytest.approx(body['heat_rejection_w'], rel=1e-3)
+
+def test_balance_point_matches_the_thermo_cycle(client, payload):
+    body = client.post('/solve/balance', json=DESIGN).get_json()
+    cycle = client.post('/thermo', json=payload(evap_temp=body['evap_temp'], cond_temp=body['cond_temp'])).get_json()
+    assert body['cop'] == pytest.approx(cycle['cop'], rel=1e-2)
+
+def test_brent_fallback_finds_the_same_balance_point(client, thermo, monkeypatch):
+    newton = client.post('/solve/balance', json=DESIGN).get_json()
+    assert newton['convergence']['method'] == 'newton'
+    monkeypatch.setattr(thermo, 'solve_balance_newton', lambda residuals, x0, bounds: None)
+    brent = client.post('/solve/balance', json=DESIGN).get_json()
+    assert brent['convergence']['method'] == 'brent' and brent['convergence']['converged']
+    assert (brent['evap_temp'], brent['cond_temp']) == pytest.approx((newton['evap_temp'], newton['cond_temp']), abs=1e-3)
+
+def test_balance_batch_warm_starts_and_reports_item_errors(client):
+    shared = {key: value for key, value in DESIGN.items() if key != 'ambient_temp'}
+    designs = [{'ambient_temp': 300.15}, {'ambient_temp': 305.15}, {'ambient_temp': 'caliente'}, {'ambient_temp': 310.15}]
+    response = client.post('/solve/balance', json={**shared, 'designs': designs})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['count'], body['succeeded'], body['failed']) == (4, 3, 1)
+    assert [item['http_status'] for item in body['results']] == [200, 200, 400, 200]
+    single = client.post('/solve/balance', json=DESIGN).get_json()
+    assert body['results'][1]['cond_temp'] == pytest.approx(single['cond_temp'], abs=1e-3)
+    # Una temperatura ambiente mayor sube la condensación
+    cond_temps = [body['results'][i]['cond_temp'] for i in (0, 1, 3)]
+    assert cond_temps == sorted(cond_temps)
+
+def test_balance_rejects_invalid_designs(client):
+    assert client.post('/solve/balance', json={key: value for key, value in DESIGN.items() if key != 'capillary'}).status_code == 400
+    assert client.post('/solve/balance', json={'designs': []}).status_code == 400
+    assert client.post('/solve/balance', json=[DESIGN]).status_code == 400
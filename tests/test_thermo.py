@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+import base64
+import gzip
+import json
+import time
+
+import numpy as np
+import pytest
+
+def test_thermo_single_point(client, payload):
+    response = client.post('/thermo', json=payload())
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['status'] == 'success' and body['backend'] == 'HEOS'
+    assert 2 < body['cop'] < 6
+    assert set(body['points']) == {'1', '2', '3', '4'}
+    assert body['points']['1']['enthalpy'] == body['points']['4']['enthalpy']
+
+def test_batch_preserves_order_and_reports_item_errors(client, payload):
+    items = [payload(evap_temp=253.15), 'no es un objeto', payload(cond_temp=250.0), payload(refrigerant='R-454B')]
+    response = client.post('/thermo/batch', json={'items': items})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['count'], body['succeeded'], body['failed']) == (4, 2, 2)
+    assert [item['http_status'] for item in body['results']] == [200, 400, 400, 200]
+    single = client.post('/thermo', json=payload(evap_temp=253.15)).get_json()
+    assert body['results'][0]['cop'] == pytest.approx(single['cop'])
+
+def test_batch_rejects_empty_and_oversized_lists(client, thermo, payload, monkeypatch):
+    assert client.post('/thermo/batch', json=[]).status_code == 400
+    monkeypatch.setattr(thermo, 'BATCH_MAX_ITEMS', 2)
+    assert client.post('/thermo/batch', json=[payload()] * 3).status_code == 400
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_sweep_streams_header_rows_and_summary(client):
+    response = client.post('/thermo/sweep', json={
+        'refrigerant': 'R134a', 'evap_temp': {'start': 253.15, 'stop': 263.15, 'step': 5}, 'cond_temp': [303.15, 313.15],
+        'superheat': 5, 'cooling_power': {'value': [500, 1000], 'unit': 'W'}})
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+    lines = read_ndjson(response)
+    header, rows, summary = lines[0], lines[1:-1], lines[-1]
+    assert header['type'] == 'header' and header['total'] == 12 and 'saturation' in header
+    assert [row['index'] for row in rows] == list(range(12))
+    assert summary == dict(summary, type='summary', count=12, succeeded=12, failed=0)
+    # Duplicar la potencia duplica el caudal y no cambia el ciclo
+    assert rows[1]['mass_flow'] == pytest.approx(2 * rows[0]['mass_flow'])
+    assert rows[1]['cop'] == rows[0]['cop']
+
+def test_sweep_reports_invalid_points_inline(client):
+    lines = read_ndjson(client.post('/thermo/sweep', json={'evap_temp': [263.15, 320.0], 'cond_temp': 313.15,
+                                                            'include_saturation': False}))
+    assert [row['status'] for row in lines[1:-1]] == ['success', 'error']
+    assert lines[-1]['failed'] == 1
+
+def test_sweep_rejects_bad_axes_and_oversized_grids(client, thermo, monkeypatch):
+    assert client.post('/thermo/sweep', json={'evap_temp': {'start': 260, 'stop': 250, 'step': 1}}).status_code == 400
+    monkeypatch.setattr(thermo, 'SWEEP_MAX_POINTS', 10)
+    assert client.post('/thermo/sweep', json={'evap_temp': {'start': 250, 'stop': 260, 'num': 11}}).status_code == 400
+
+def test_thermo_cache_hits_on_quantized_inputs(client, payload):
+    first = client.post('/thermo', json=payload())
+    again = client.post('/thermo', json=payload(evap_temp=263.16))
+    assert (first.headers['X-Cache'], again.headers['X-Cache']) == ('MISS', 'HIT')
+    assert again.headers['ETag'] == first.headers['ETag'] and again.data == first.data
+
+def test_thermo_reports_the_quantized_inputs_it_evaluated(client, thermo, payload):
+    body = client.post('/thermo', json=payload(evap_temp=263.22, superheat=5.04)).get_json()
+    assert body['input_quantum'] == thermo.RESULT_CACHE_QUANTUM
+    assert (body['evap_temp'], body['superheat']) == (pytest.approx(263.25), pytest.approx(5.0))
+    exact, _ = thermo.compute_thermo(payload(evap_temp=263.25, superheat=5.0))
+    assert body['cop'] == pytest.approx(exact['cop'], rel=1e-12)
+
+def test_thermo_etag_answers_304(client, payload):
+    etag = client.post('/thermo', json=payload()).headers['ETag']
+    assert client.post('/thermo', json=payload(), headers={'If-None-Match': etag}).status_code == 304
+    assert client.post('/thermo', json=payload(superheat=6), headers={'If-None-Match': etag}).status_code == 200
+
+def test_thermo_cache_key_follows_the_data_version(client, thermo, payload, monkeypatch):
+    etag = client.post('/thermo', json=payload()).headers['ETag']
+    monkeypatch.setattr(thermo, 'data_version', lambda: 'otra-version')
+    response = client.post('/thermo', json=payload(), headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['X-Cache'] == 'MISS'
+    assert response.headers['ETag'] != etag
+
+@pytest.mark.parametrize('overrides', [
+    {'evap_temp': float('inf')},
+    {'superheat': float('nan')},
+    {'cooling_power': 1000},
+    {'cooling_power': {'value': 'mucho', 'unit': 'W'}},
+    {'cooling_power': {'value': float('inf'), 'unit': 'W'}}
+])
+def test_thermo_rejects_non_finite_and_malformed_inputs(client, payload, overrides):
+    response = client.post('/thermo', data=json.dumps(payload(**overrides)), content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['status'] == 'error'
+
+def decode_f32(column):
+    assert column['dtype'] == 'float32'
+    return np.frombuffer(base64.b64decode(column['data']), dtype='<f4')
+
+def test_columnar_formats_round_trip_to_the_json_body(client, payload):
+    classic = client.post('/thermo', json=payload()).get_json()
+    columnar = client.post('/thermo?format=columnar', json=payload())
+    assert columnar.mimetype == 'application/vnd.thermo.columnar+json'
+    columnar = json.loads(columnar.data)
+    assert columnar['format'] == 'columnar' and columnar['points'] == classic['points']
+    liquid = classic['saturation']['liquid']
+    assert columnar['saturation']['liquid']['pressure'] == [point['pressure'] for point in liquid]
+    lengths = [row['length_m'] for row in classic['capillary']['capillary_lengths']]
+    assert columnar['capillary']['length_m'] == [value if isinstance(value, float) else None for value in lengths]
+
+    f32 = json.loads(client.post('/thermo', json=payload(), headers={'Accept': 'application/vnd.thermo.columnar-f32+json'}).data)
+    assert f32['format'] == 'columnar-f32' and f32['cop'] == classic['cop']
+    np.testing.assert_allclose(decode_f32(f32['saturation']['liquid']['pressure']), [point['pressure'] for point in liquid], rtol=1e-6)
+
+def test_msgpack_format_round_trip(client, payload):
+    msgpack = pytest.importorskip('msgpack')
+    body = msgpack.unpackb(client.post('/thermo?format=msgpack', json=payload()).data)
+    assert body['format'] == 'msgpack' and body['saturation']['temperature']['dtype'] == 'float32'
+
+def test_thermo_body_is_compressed_per_representation(client, payload):
+    plain = client.post('/thermo', json=payload())
+    compressed = client.post('/thermo', json=payload(), headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert compressed.headers['ETag'] != plain.headers['ETag'] and compressed.headers['X-Cache'] == 'MISS'
+
+def test_unknown_format_answers_406(client, payload):
+    assert client.post('/thermo?format=xml', json=payload()).status_code == 406
+
+def nodes(response, header):
+    return set(filter(None, response.headers.get(header, '').split(',')))
+
+def test_changing_cooling_power_reuses_the_cycle_nodes(client, payload):
+    client.post('/thermo', json=payload())
+    response = client.post('/thermo', json=payload(cooling_power={'value': 2000, 'unit': 'W'}))
+    assert response.headers['X-Cache'] == 'MISS'
+    assert nodes(response, 'X-Nodes-Computed') == {'capillary'}
+    assert {'p1', 'p2', 'p3', 'p4', 'rho4', 'saturation'} <= nodes(response, 'X-Nodes-Reused')
+
+def test_changing_superheat_recomputes_only_its_dependents(client, payload):
+    client.post('/thermo', json=payload())
+    response = client.post('/thermo', json=payload(superheat=8))
+    computed = nodes(response, 'X-Nodes-Computed')
+    assert {'p2', 'p3', 'capillary'} <= computed
+    assert not computed & {'p1', 'p4', 'rho4', 'saturation'}
+
+@pytest.mark.parametrize('refrigerant', ['R134a', 'R-454B'])
+def test_node_keys_follow_the_cycle_graph(thermo, payload, refrigerant):
+    evaluation = thermo.CycleEvaluation()
+    body, status_code = thermo.compute_thermo(payload(refrigerant=refrigerant), evaluation)
+    assert status_code == 200
+    for key in evaluation.values:
+        assert len(key) == len(thermo.CYCLE_GRAPH[key[0]]) + 1
+    rho4, = [key for key in evaluation.values if key[0] == 'rho4']
+    version = thermo.current_data().version if refrigerant == 'R-454B' else None
+    assert rho4[thermo.CYCLE_GRAPH['rho4'].index('data_version') + 1] == version
+
+def test_node_key_rejects_missing_and_extra_inputs(thermo):
+    assert thermo.node_key('limits', refrigerant='R134a', backend='HEOS') == ('limits', 'R134a', 'HEOS')
+    with pytest.raises(KeyError):
+        thermo.node_key('limits', refrigerant='R134a')
+    with pytest.raises(KeyError):
+        thermo.node_key('limits', refrigerant='R134a', backend='HEOS', evap_temp=263.15)
+
+def test_batch_reports_server_faults_as_500(client, thermo, payload, monkeypatch, request):
+    def fail(data):
+        raise RuntimeError('CoolProp no disponible')
+    # El pool se bifurca de nuevo para que los hijos vean el reemplazo, y se descarta al terminar
+    monkeypatch.setattr(thermo, 'compute_thermo', fail)
+    thermo.reset_batch_pool()
+    request.addfinalizer(thermo.reset_batch_pool)
+    body = client.post('/thermo/batch', json=[payload(), 'no es un objeto']).get_json()
+    assert [item['http_status'] for item in body['results']] == [500, 400]
+    assert 'CoolProp no disponible' in body['results'][0]['message']
+
+def test_sweep_rejects_oversized_axes_before_allocating(client, thermo):
+    started = time.perf_counter()
+    response = client.post('/thermo/sweep', json={'evap_temp': {'start': 250, 'stop': 260, 'num': 2e12}})
+    assert response.status_code == 400 and 'máximo' in response.get_json()['message']
+    response = client.post('/thermo/sweep', json={'evap_temp': {'start': 250, 'stop': 260, 'step': 1e-300}})
+    assert response.status_code == 400
+    assert time.perf_counter() - started < 1
+    assert thermo.sweep_axis_length({'start': 250, 'stop': 260, 'step': 2.5}) == 5
+
+@pytest.mark.parametrize('axis', [
+    {'start': 250, 'stop': 260, 'num': 0},
+    {'start': 250, 'stop': 260, 'num': 2.5},
+    {'start': 250, 'stop': 260, 'step': float('inf')},
+    {'start': 250, 'stop': float('nan'), 'step': 1},
+    [250, float('inf')]
+])
+def test_sweep_rejects_non_finite_ranges(client, axis):
+    response = client.post('/thermo/sweep', data=json.dumps({'evap_temp': axis}), content_type='application/json')
+    assert response.status_code == 400